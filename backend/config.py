@@ -0,0 +1,82 @@
+import os
+from dotenv import load_dotenv
+
+# Load overrides from a local .env file (if present)
+load_dotenv()
+
+# --- Ollama / LLM ---
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "ministral-3")
+# Comma-separated pool, e.g. "10.0.0.5,10.0.0.6:11434". Empty = auto-discover one host.
+OLLAMA_HOSTS = [h.strip() for h in os.getenv("OLLAMA_HOSTS", "").split(",") if h.strip()]
+OLLAMA_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_TIMEOUT_SECONDS", "60"))
+OLLAMA_CONNECT_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_CONNECT_TIMEOUT_SECONDS", "2"))
+# Max concurrent LLM calls per Ollama host (extra calls wait for a free slot)
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+# Circuit breaker: open after N consecutive failures, retry after the reset window
+OLLAMA_BREAKER_FAILURES = int(os.getenv("OLLAMA_BREAKER_FAILURES", "3"))
+OLLAMA_BREAKER_RESET_SECONDS = float(os.getenv("OLLAMA_BREAKER_RESET_SECONDS", "30"))
+OLLAMA_HEALTH_INTERVAL_SECONDS = float(os.getenv("OLLAMA_HEALTH_INTERVAL_SECONDS", "15"))
+# Follow-up requests allowed to fix invalid fields in an extraction
+EXTRACTION_MAX_REPAIRS = int(os.getenv("EXTRACTION_MAX_REPAIRS", "2"))
+
+# --- Batch onboarding ---
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+# Contracts rendered (or waiting to be written to the ZIP) at once by /contracts/bulk
+BULK_CONTRACT_CONCURRENCY = int(os.getenv("BULK_CONTRACT_CONCURRENCY", "8"))
+
+# --- Onboarding jobs (POST /jobs) ---
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join("data", "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_CALLBACK_TIMEOUT_SECONDS = float(os.getenv("JOB_CALLBACK_TIMEOUT_SECONDS", "10"))
+# Callbacks to loopback / private / link-local addresses are refused unless this is set
+JOB_CALLBACK_ALLOW_PRIVATE = os.getenv("JOB_CALLBACK_ALLOW_PRIVATE", "0") == "1"
+# Finished jobs are deleted this long after they complete
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", str(7 * 24 * 3600)))
+JOB_PRUNE_INTERVAL_SECONDS = float(os.getenv("JOB_PRUNE_INTERVAL_SECONDS", "3600"))
+
+# --- Onboarding history (every generated packet, searchable via /onboarding/history) ---
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", os.path.join("data", "onboarding.sqlite3"))
+HISTORY_POOL_SIZE = int(os.getenv("HISTORY_POOL_SIZE", "4"))
+# Packets written per transaction by the background writer
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "200"))
+HISTORY_PAGE_MAX = int(os.getenv("HISTORY_PAGE_MAX", "200"))
+
+# --- Extraction cache ---
+# Set EXTRACTION_CACHE_PATH to an empty string to keep the cache in memory only
+EXTRACTION_CACHE_PATH = os.getenv("EXTRACTION_CACHE_PATH", os.path.join("data", "extraction_cache.sqlite3"))
+EXTRACTION_CACHE_TTL_SECONDS = float(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+EXTRACTION_CACHE_MEMORY_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MEMORY_ENTRIES", "1024"))
+EXTRACTION_CACHE_DISK_ENTRIES = int(os.getenv("EXTRACTION_CACHE_DISK_ENTRIES", "50000"))
+
+# --- Compliance rules (reloaded automatically when the file changes) ---
+COMPLIANCE_RULES_PATH = os.getenv("COMPLIANCE_RULES_PATH", os.path.join("backend", "rules", "compliance_rules.json"))
+
+# Largest batch accepted by the bulk compliance audit
+AUDIT_MAX_ROWS = int(os.getenv("AUDIT_MAX_ROWS", "200000"))
+# Largest locations x start dates grid accepted by /compliance/feasibility
+FEASIBILITY_MAX_CELLS = int(os.getenv("FEASIBILITY_MAX_CELLS", "5000"))
+
+# --- Contract PDFs ---
+# Worker processes for PDF layout (0 = render inline in the request thread)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(os.cpu_count() or 1)))
+# Renders allowed to wait for a worker; beyond that, callers wait up to the timeout, then get a 503
+PDF_MAX_QUEUE = int(os.getenv("PDF_MAX_QUEUE", "32"))
+PDF_QUEUE_TIMEOUT_SECONDS = float(os.getenv("PDF_QUEUE_TIMEOUT_SECONDS", "10"))
+# Byte budget for reusing identical renders (0 disables the render cache)
+RENDER_CACHE_BYTES = int(os.getenv("RENDER_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+# Generated contracts: kept in memory up to the byte budget, then spilled to disk; expire after the TTL
+CONTRACT_STORE_DIR = os.getenv("CONTRACT_STORE_DIR", os.path.join("data", "contracts"))
+CONTRACT_STORE_MEMORY_BYTES = int(os.getenv("CONTRACT_STORE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+CONTRACT_STORE_SPILL_BYTES = int(os.getenv("CONTRACT_STORE_SPILL_BYTES", str(2 * 1024 * 1024)))
+CONTRACT_TTL_SECONDS = float(os.getenv("CONTRACT_TTL_SECONDS", "3600"))
+
+# Loose PDFs in data/ (e.g. from older releases) are deleted after this long
+ARTIFACT_RETENTION_SECONDS = float(os.getenv("ARTIFACT_RETENTION_SECONDS", "600"))
+# Background cleanup: how often due expiries are checked, and how often a full directory scan runs
+EXPIRY_SWEEP_INTERVAL_SECONDS = float(os.getenv("EXPIRY_SWEEP_INTERVAL_SECONDS", "30"))
+EXPIRY_RECONCILE_INTERVAL_SECONDS = float(os.getenv("EXPIRY_RECONCILE_INTERVAL_SECONDS", "3600"))
+
+# --- Ask HR (handbook retrieval) ---
+HANDBOOK_PATH = os.getenv("HANDBOOK_PATH", os.path.join("data", "handbook.txt"))
+HANDBOOK_TOP_K = int(os.getenv("HANDBOOK_TOP_K", "3"))
@@ -0,0 +1,200 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+from .models.db_models import OnboardingRecord, name_key
+from .models.schemas import OnboardingPackage
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS onboarding ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " candidate_name TEXT NOT NULL, name_key TEXT NOT NULL,"
+    " jurisdiction TEXT NOT NULL, job_family TEXT NOT NULL,"
+    " location_country TEXT NOT NULL, role TEXT NOT NULL,"
+    " alert_count INTEGER NOT NULL, package TEXT NOT NULL, created_at REAL NOT NULL)",
+    # Every list query filters on one of these and pages by id, so each index ends in id
+    "CREATE INDEX IF NOT EXISTS idx_onboarding_name ON onboarding(name_key, id)",
+    "CREATE INDEX IF NOT EXISTS idx_onboarding_jurisdiction ON onboarding(jurisdiction, id)",
+    "CREATE INDEX IF NOT EXISTS idx_onboarding_job_family ON onboarding(job_family, id)",
+    "CREATE INDEX IF NOT EXISTS idx_onboarding_created ON onboarding(created_at, id)",
+)
+
+# First id stored at or after a timestamp (NO_ID = none yet)
+FIRST_ID_AT = "SELECT id FROM onboarding WHERE created_at >= ? ORDER BY created_at, id LIMIT 1"
+NO_ID = 2 ** 63 - 1
+
+SUMMARY_COLUMNS = "id, candidate_name, name_key, jurisdiction, job_family, location_country, role, alert_count, created_at"
+
+
+def connect(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")  # WAL + NORMAL: durable across app crashes, no fsync per commit
+    db.execute("PRAGMA busy_timeout=5000")
+    return db
+
+
+class ConnectionPool:
+    """Fixed set of SQLite connections shared by request threads (WAL lets readers run alongside the writer)."""
+
+    def __init__(self, path: str, size: int = 4):
+        self._idle: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._all = [connect(path) for _ in range(max(1, size))]
+        for db in self._all:
+            self._idle.put(db)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        db = self._idle.get()
+        try:
+            yield db
+        finally:
+            self._idle.put(db)
+
+    def close(self):
+        for db in self._all:
+            db.close()
+
+
+class OnboardingHistory:
+    """
+    Every generated onboarding packet, in a WAL-mode SQLite file.
+    save() only enqueues; a writer thread inserts whatever has piled up in one
+    transaction (up to batch_size rows), so requests never wait on the disk.
+    Lists are keyset-paginated on id (newest first) and served from the pool.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, batch_size: int = 200):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._writer_db = connect(path)
+        for statement in SCHEMA:
+            self._writer_db.execute(statement)
+        self._writer_db.commit()
+        self.pool = ConnectionPool(path, pool_size)
+
+        self._pending: "queue.Queue[Optional[tuple]]" = queue.Queue()  # (package, created_at); None = stop
+        self.stats = {"queued": 0, "written": 0, "batches": 0, "errors": 0}
+        self._writer = threading.Thread(target=self._write_loop, name="onboarding-history-writer", daemon=True)
+        self._writer.start()
+
+    # --- Writes (background thread) ---
+
+    def save(self, package: OnboardingPackage):
+        """Queues the packet for the writer thread; never blocks on the database."""
+        self._pending.put((package, time.time()))
+        self.stats["queued"] += 1
+
+    def _write_loop(self):
+        while True:
+            item = self._pending.get()
+            batch: List[OnboardingRecord] = []
+            stop = item is None
+            # Take whatever else is already waiting, up to one batch
+            while not stop:
+                batch.append(OnboardingRecord.from_package(*item))
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                stop = item is None
+
+            if batch:
+                self._insert(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._pending.task_done()
+            if stop:
+                return
+
+    def _insert(self, batch: List[OnboardingRecord]):
+        placeholders = ", ".join("?" * len(OnboardingRecord.COLUMNS))
+        try:
+            with self._writer_db:
+                self._writer_db.executemany(
+                    f"INSERT INTO onboarding ({', '.join(OnboardingRecord.COLUMNS)}) VALUES ({placeholders})",
+                    [record.values() for record in batch],
+                )
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except sqlite3.Error as e:
+            self.stats["errors"] += 1
+            print(f"⚠️ Could not save {len(batch)} onboarding records: {e}")
+
+    @property
+    def pending(self) -> int:
+        return self._pending.qsize()
+
+    def flush(self):
+        """Blocks until every queued packet has been written."""
+        self._pending.join()
+
+    def close(self):
+        self._pending.put(None)
+        self._writer.join()
+        self._writer_db.close()
+        self.pool.close()
+
+    # --- Reads (request threads) ---
+
+    @staticmethod
+    def _record(row: sqlite3.Row, package: str = "") -> OnboardingRecord:
+        return OnboardingRecord(
+            id=row["id"], candidate_name=row["candidate_name"], name_key=row["name_key"],
+            jurisdiction=row["jurisdiction"], job_family=row["job_family"],
+            location_country=row["location_country"], role=row["role"],
+            alert_count=row["alert_count"], created_at=row["created_at"], package=package,
+        )
+
+    def get(self, record_id: int) -> Optional[OnboardingRecord]:
+        with self.pool.connection() as db:
+            row = db.execute(f"SELECT {SUMMARY_COLUMNS}, package FROM onboarding WHERE id = ?", (record_id,)).fetchone()
+        return self._record(row, row["package"]) if row else None
+
+    def list(self, limit: int = 50, before_id: Optional[int] = None, name: Optional[str] = None,
+             jurisdiction: Optional[str] = None, job_family: Optional[str] = None,
+             created_from: Optional[float] = None, created_to: Optional[float] = None) -> dict:
+        """
+        Newest first. Pass the returned next_cursor as before_id for the next page.
+        name is a case-insensitive prefix match on the candidate name.
+        """
+        where, params = [], []
+        if before_id is not None:
+            where.append("id < ?")
+            params.append(before_id)
+        if name:
+            # Prefix match as an index range: name_key >= 'ali' AND name_key < 'ali\uffff'
+            prefix = name_key(name)
+            where.append("name_key >= ? AND name_key < ?")
+            params += [prefix, prefix + "\uffff"]
+        if jurisdiction:
+            where.append("jurisdiction = ?")
+            params.append(jurisdiction)
+        if job_family:
+            where.append("job_family = ?")
+            params.append(job_family)
+        # One writer inserts in save() order, so ids grow with created_at: a date bound
+        # becomes an id bound (one index seek) and pages stay ordered by id alone
+        if created_from is not None:
+            where.append(f"id >= coalesce(({FIRST_ID_AT}), {NO_ID})")
+            params.append(created_from)
+        if created_to is not None:
+            where.append(f"id < coalesce(({FIRST_ID_AT}), {NO_ID})")
+            params.append(created_to)
+
+        sql = f"SELECT {SUMMARY_COLUMNS} FROM onboarding"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        with self.pool.connection() as db:
+            rows = db.execute(sql, params + [limit + 1]).fetchall()
+
+        items = [self._record(row).summary() for row in rows[:limit]]
+        next_cursor = items[-1]["id"] if len(rows) > limit else None
+        return {"items": items, "next_cursor": next_cursor}
@@ -1,57 +1,442 @@
-from fastapi import FastAPI, HTTPException
-from .models.schemas import RawJobDescription, OnboardingPackage, PolicyQuestion
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import List, Optional
+from fastapi import FastAPI, File, Header, HTTPException, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from .config import (
+    AUDIT_MAX_ROWS, BATCH_MAX_ITEMS, BULK_CONTRACT_CONCURRENCY, FEASIBILITY_MAX_CELLS,
+    HISTORY_BATCH_SIZE, HISTORY_DB_PATH, HISTORY_PAGE_MAX, HISTORY_POOL_SIZE,
+    JOB_CALLBACK_ALLOW_PRIVATE, JOB_CALLBACK_TIMEOUT_SECONDS, JOB_PRUNE_INTERVAL_SECONDS, JOB_RETENTION_SECONDS,
+    JOB_WORKERS, JOBS_DB_PATH,
+)
+from .database import OnboardingHistory
+from .models.schemas import (
+    AuditBatch, CandidateProfile, FeasibilityRequest, OnboardingJobRequest, OnboardingPackage,
+    PolicyQuestion, RawJobDescription,
+)
 from .services.ai_service import AIService
 from .services.pdf_service import PDFService
+from .services.pdf_render import RenderQueueFull
+from .services.contract_store import ascii_filename, content_disposition, parse_range
 from .services.compliance import ComplianceEngine
-
-app = FastAPI(title="Invisible Onboarding Engine")
+from .services.bulk_audit import BulkAuditor, load_table
+from .services.jobs import JobQueue, JobStore
+from .services.zip_stream import ZipStream
+from .services.metrics import REGISTRY, STAGE_SECONDS
 
 # Initialize Services
 ai_service = AIService()
 pdf_service = PDFService()
 compliance_engine = ComplianceEngine()
+bulk_auditor = BulkAuditor(compliance_engine)
+history = OnboardingHistory(HISTORY_DB_PATH, pool_size=HISTORY_POOL_SIZE, batch_size=HISTORY_BATCH_SIZE)
 
-@app.post("/generate-onboarding", response_model=OnboardingPackage)
-async def generate_onboarding_packet(input_data: RawJobDescription):
-    print(f"📥 Received Input: {input_data.raw_text[:50]}...")
+# Scrape-time gauges backed by service state
+REGISTRY.gauge("extraction_cache_hit_ratio", "Extraction cache hits / lookups",
+               fn=lambda: ai_service.cache.hit_ratio)
+REGISTRY.gauge("extraction_fast_path_hit_ratio", "Extractions served by the rule-based fast path",
+               fn=lambda: ai_service.fast_extractor.hit_rate)
+REGISTRY.gauge("ollama_outstanding_requests", "Requests currently assigned to Ollama hosts",
+               fn=lambda: ai_service.pool.outstanding)
+REGISTRY.gauge("pdf_render_in_flight", "PDF renders running or queued for a worker process",
+               fn=lambda: pdf_service.render_pool.in_flight)
+REGISTRY.gauge("contract_store_memory_bytes", "Bytes of generated contracts held in memory",
+               fn=lambda: pdf_service.store.memory_bytes)
+REGISTRY.gauge("contract_store_documents", "Generated contracts available for download",
+               fn=lambda: len(pdf_service.store))
+REGISTRY.gauge("expiry_scheduled_items", "Contracts and files waiting for their expiry",
+               fn=lambda: len(pdf_service.expiry))
+REGISTRY.gauge("render_cache_hit_ratio", "Contract renders served from the render cache",
+               fn=lambda: pdf_service.render_cache.hit_ratio)
+REGISTRY.gauge("render_cache_bytes", "Bytes of rendered PDFs held by the render cache",
+               fn=lambda: pdf_service.render_cache.bytes)
+REGISTRY.gauge("pdf_render_rejected", "PDF renders refused because the render queue was full",
+               fn=lambda: pdf_service.render_pool.rejected)
+
+def timed(stage: str, fn, *args):
+    """Runs fn(*args) and records its duration under the given pipeline stage."""
+    with STAGE_SECONDS.time(stage=stage):
+        return fn(*args)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background tasks that live as long as the server
+    tasks = [
+        asyncio.create_task(ai_service.pool.run_health_checks()),
+        # Artifact expiry: reconciliation scan now, then heap-driven deletes on a timer
+        asyncio.create_task(pdf_service.expiry.run()),
+        # Onboarding job workers (resumes jobs left queued or running by the last process)
+        asyncio.create_task(job_queue.run()),
+    ]
+    # Start the PDF worker processes now rather than on the first request
+    await asyncio.to_thread(pdf_service.render_pool.start)
+    yield
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    pdf_service.render_pool.shutdown()
+    # Write out any packets still queued for the history table
+    await asyncio.to_thread(history.flush)
+
+app = FastAPI(title="Invisible Onboarding Engine", lifespan=lifespan)
+
+@app.exception_handler(RenderQueueFull)
+async def render_queue_full(request, exc: RenderQueueFull):
+    # Backpressure: tell clients to retry instead of piling more work on the workers
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
+
+async def build_onboarding_package(raw_text: str, on_stage=None, strict: bool = False) -> OnboardingPackage:
+    """
+    The full onboarding pipeline for one hire: extraction -> jurisdiction -> PDF + compliance.
+    on_stage(stage, partial_result), if given, is awaited as each stage finishes (job progress).
+    strict=True fails on an LLM error instead of continuing with the mock candidate.
+    """
+    async def report(stage: str, **partial):
+        if on_stage is not None:
+            await on_stage(stage, partial)
 
-    # 1. AI Extraction (Gemini)
-    candidate = ai_service.extract_candidate_data(input_data.raw_text)
+    print(f"📥 Received Input: {raw_text[:50]}...")
+
+    # 1. AI Extraction (awaited, so the event loop keeps serving other requests)
+    with STAGE_SECONDS.time(stage="extraction"):
+        candidate = await ai_service.extract_candidate_data_async(raw_text, strict=strict)
     print(f"🤖 Extracted: {candidate.name} | {candidate.location_country}")
+    await report("extraction", candidate=candidate.model_dump())
 
     # 2. Determine Jurisdiction
-    jurisdiction = ai_service.determine_jurisdiction(candidate.location_country)
-    
-    # 3. Generate PDF (NEW)
-    print("📄 Generating PDF...")
-    pdf_result = pdf_service.generate_contract(candidate, jurisdiction)
-    
-    # 4. Compliance Logic (Simple)
-    print("⚖️ Running Compliance Checks...")
-    compliance_result = compliance_engine.analyze(candidate)
+    jurisdiction = timed("jurisdiction", ai_service.determine_jurisdiction, candidate.location_country)
+    await report("jurisdiction", jurisdiction_detected=jurisdiction)
+
+    # 3 & 4. Generate PDF + Compliance Checks (CPU/disk work, run in worker threads)
+    async def contract():
+        print("📄 Generating PDF...")
+        result = await asyncio.to_thread(timed, "pdf", pdf_service.generate_contract, candidate, jurisdiction)
+        await report("contract", generated_files=[result["url"]])
+        return result
+
+    async def compliance():
+        print("⚖️ Running Compliance Checks...")
+        result = await asyncio.to_thread(timed, "compliance", compliance_engine.analyze, candidate)
+        await report("compliance", compliance_alerts=[alert['message'] for alert in result['alerts']])
+        return result
+
+    pdf_result, compliance_result = await asyncio.gather(contract(), compliance())
     
     # Extract just the messages for the simple response model
     # (In a real app, you'd send the full object, but for now we map to List[str])
     alert_messages = [alert['message'] for alert in compliance_result['alerts']]
     
-    # 5. Return Response
-    return OnboardingPackage(
+    # 5. Return Response (and record it; the write happens in the background)
+    package = OnboardingPackage(
         candidate=candidate,
-        generated_files=[pdf_result["path"]],
+        generated_files=[pdf_result["url"]],
         compliance_alerts=alert_messages,
         jurisdiction_detected=jurisdiction,
         original_template_text=pdf_result["original_text"], # Pass to frontend
         final_contract_text=pdf_result["final_text"]        # Pass to frontend
     )
+    history.save(package)
+    return package
+
+async def run_onboarding_job(raw_text: str, on_stage) -> dict:
+    package = await build_onboarding_package(raw_text, on_stage, strict=True)
+    return timed("serialization", package.model_dump)
+
+job_queue = JobQueue(
+    JobStore(JOBS_DB_PATH),
+    run_onboarding_job,
+    workers=JOB_WORKERS,
+    callback_timeout=JOB_CALLBACK_TIMEOUT_SECONDS,
+    allow_private_callbacks=JOB_CALLBACK_ALLOW_PRIVATE,
+    retention_seconds=JOB_RETENTION_SECONDS,
+    prune_interval=JOB_PRUNE_INTERVAL_SECONDS,
+)
+REGISTRY.gauge("history_pending_writes", "Onboarding packets waiting for the history writer",
+               fn=lambda: history.pending)
+REGISTRY.gauge("onboarding_jobs_running", "Onboarding jobs currently being processed",
+               fn=lambda: job_queue.running)
+
+@app.post("/generate-onboarding", response_model=OnboardingPackage)
+async def generate_onboarding_packet(input_data: RawJobDescription):
+    package = await build_onboarding_package(input_data.raw_text)
+    # Serialize here (once, and timed) instead of letting FastAPI re-validate the model
+    body = timed("serialization", package.model_dump_json)
+    return Response(content=body, media_type="application/json")
+
+@app.post("/jobs", status_code=202)
+async def submit_onboarding_job(request: OnboardingJobRequest):
+    """
+    Asynchronous /generate-onboarding: returns a job id right away. Poll
+    GET /jobs/{job_id}, or pass callback_url to have the final status POSTed to you.
+    """
+    callback_url = str(request.callback_url) if request.callback_url else None
+    if callback_url:
+        # Same check the callback gets when it fires, so a bad URL fails now rather than silently later
+        try:
+            await job_queue.check_callback(callback_url)
+        except (ValueError, OSError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid callback_url: {e}")
+    job = await asyncio.to_thread(job_queue.submit, request.raw_text, callback_url)
+    return {"job_id": job["job_id"], "status": job["status"], "url": f"/jobs/{job['job_id']}"}
+
+@app.get("/jobs/{job_id}")
+async def get_onboarding_job(job_id: str):
+    """
+    Job status with per-stage progress. "result" fills in as stages finish
+    (the extracted candidate shows up before the contract is ready).
+    """
+    job = await asyncio.to_thread(job_queue.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/generate-onboarding/batch")
+async def generate_onboarding_batch(items: List[RawJobDescription]):
+    """
+    Cohort onboarding. Runs every hire concurrently (LLM calls are capped by
+    OLLAMA_MAX_CONCURRENCY) and streams one NDJSON line per hire as it finishes:
+    {"index": 3, "status": "ok", "package": {...}} or {"index": 3, "status": "error", "error": "..."}
+    """
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {BATCH_MAX_ITEMS} items)")
+
+    async def run_one(index: int, item: RawJobDescription) -> dict:
+        try:
+            package = await build_onboarding_package(item.raw_text, strict=True)
+            return {"index": index, "status": "ok", "package": timed("serialization", package.model_dump)}
+        except Exception as e:
+            print(f"❌ Batch item {index} failed: {e!r}")
+            return {"index": index, "status": "error", "error": str(e) or repr(e)}
+
+    async def result_lines():
+        tasks = [asyncio.create_task(run_one(i, item)) for i, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done) + "\n"
+        finally:
+            # Client went away: stop the remaining work
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+def audit_response(columns: dict) -> StreamingResponse:
+    """
+    Streams the bulk audit as NDJSON: one {"index", "id", "type", "severity", "message"}
+    line per alert in row order, then a final {"rows", "alerts"} summary line.
+    """
+    n_rows = max((len(v) for v in columns.values()), default=0)
+    if n_rows > AUDIT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Audit too large (max {AUDIT_MAX_ROWS} rows)")
+    if len({len(v) for v in columns.values() if len(v)}) > 1:
+        raise HTTPException(status_code=400, detail="All columns must have the same length")
+
+    # Sync generator: Starlette iterates it in a worker thread, off the event loop
+    def alert_lines():
+        count = 0
+        with STAGE_SECONDS.time(stage="bulk_audit"):
+            for alert in bulk_auditor.audit(columns):
+                count += 1
+                yield json.dumps(alert) + "\n"
+        yield json.dumps({"rows": n_rows, "alerts": count}) + "\n"
+
+    return StreamingResponse(alert_lines(), media_type="application/x-ndjson")
+
+@app.post("/compliance/audit")
+async def compliance_audit(batch: AuditBatch):
+    """
+    Bulk re-audit of open offers sent as columns:
+    {"location_country": [...], "citizenship": [...], "salary": [...], "start_date": [...]}
+    """
+    return audit_response(batch.model_dump())
+
+@app.post("/compliance/audit/file")
+async def compliance_audit_file(file: UploadFile = File(...)):
+    """
+    Same audit for an uploaded CSV (header row required) or Parquet file.
+    """
+    data = await file.read()
+    try:
+        columns = await asyncio.to_thread(load_table, data, file.filename or "")
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Could not read {file.filename}: {e}")
+    return audit_response(columns)
+
+@app.post("/compliance/feasibility")
+async def compliance_feasibility(request: FeasibilityRequest):
+    """
+    Where and when can this candidate start? Audits every location x start date
+    combination without touching the LLM.
+    """
+    dates = {d.isoformat() for d in request.start_dates}
+    for r in request.date_ranges:
+        if r.end < r.start:
+            raise HTTPException(status_code=400, detail=f"Date range ends before it starts: {r.start} > {r.end}")
+        span = (r.end - r.start).days // r.step_days + 1
+        if span * len(request.locations) > FEASIBILITY_MAX_CELLS:
+            raise HTTPException(status_code=413, detail=f"Grid too large (max {FEASIBILITY_MAX_CELLS} cells)")
+        dates.update((r.start + timedelta(days=i * r.step_days)).isoformat() for i in range(span))
+    if not dates:
+        raise HTTPException(status_code=400, detail="Provide start_dates or date_ranges")
+    if len(dates) * len(request.locations) > FEASIBILITY_MAX_CELLS:
+        raise HTTPException(status_code=413, detail=f"Grid too large (max {FEASIBILITY_MAX_CELLS} cells)")
+
+    results = await asyncio.to_thread(
+        timed, "feasibility", bulk_auditor.feasibility, request.candidate, request.locations, sorted(dates))
+    return {"locations": results}
+
+@app.post("/contracts/bulk")
+async def generate_contracts_bulk(candidates: List[CandidateProfile]):
+    """
+    Cohort contracts for already-extracted candidates (no LLM). Contracts render in
+    parallel and are streamed back as a ZIP, each PDF written as soon as it is ready.
+    manifest.json (last entry) lists every file with its compliance alerts, or the error.
+    """
+    if len(candidates) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {BATCH_MAX_ITEMS} items)")
+
+    # Caps finished-but-unsent PDFs too: a slot is freed only once its file is in the archive
+    slots = asyncio.Semaphore(BULK_CONTRACT_CONCURRENCY)
+
+    async def render_one(index: int, candidate: CandidateProfile) -> dict:
+        await slots.acquire()
+        entry = {"index": index, "name": candidate.name}
+        try:
+            jurisdiction = timed("jurisdiction", ai_service.determine_jurisdiction, candidate.location_country)
+            rendered, compliance_result = await asyncio.gather(
+                asyncio.to_thread(timed, "pdf", pdf_service.render_contract, candidate, jurisdiction),
+                asyncio.to_thread(timed, "compliance", compliance_engine.analyze, candidate),
+            )
+            entry.update({
+                "status": "ok",
+                "file": f"{index + 1:04d}_{ascii_filename(rendered['filename'])}",
+                "jurisdiction": jurisdiction,
+                "compliance_alerts": compliance_result["alerts"],
+                "pdf": rendered["pdf"],
+            })
+        except Exception as e:
+            print(f"❌ Bulk contract {index} failed: {e!r}")
+            entry.update({"status": "error", "error": str(e) or repr(e)})
+        return entry
+
+    async def archive_chunks():
+        archive = ZipStream()
+        manifest = []
+        tasks = [asyncio.create_task(render_one(i, c)) for i, c in enumerate(candidates)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                entry = await next_done
+                pdf = entry.pop("pdf", None)
+                if pdf is not None:
+                    yield archive.add(entry["file"], pdf, compress=False)  # PDF streams are already deflated
+                manifest.append(entry)
+                slots.release()
+            manifest.sort(key=lambda e: e["index"])
+            yield archive.add("manifest.json", json.dumps({"contracts": manifest}, indent=2).encode("utf-8"))
+            yield archive.close()
+        finally:
+            # Client went away: stop the remaining work
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(archive_chunks(), media_type="application/zip",
+                             headers={"Content-Disposition": 'attachment; filename="contracts.zip"'})
+
+@app.api_route("/contracts/{contract_id}", methods=["GET", "HEAD"])
+async def get_contract(contract_id: str, range_header: Optional[str] = Header(None, alias="Range"),
+                       if_none_match: Optional[str] = Header(None), if_range: Optional[str] = Header(None)):
+    """
+    Serves a generated contract PDF. Supports conditional GETs (ETag / If-None-Match)
+    and single byte ranges (Range / If-Range) so viewers can fetch pages lazily.
+    """
+    contract = pdf_service.store.meta(contract_id)
+    if contract is None:
+        raise HTTPException(status_code=404, detail="Contract not found or expired")
+
+    headers = {
+        "ETag": contract.etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": f"private, max-age={max(0, int(contract.expires_at - time.time()))}",
+        "Content-Disposition": content_disposition("inline", contract.display_name or contract.filename),
+    }
+    if if_none_match and contract.etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    # A stale If-Range means the client's partial copy is outdated: send everything
+    byte_range = None
+    if range_header and (not if_range or if_range.strip() == contract.etag):
+        try:
+            byte_range = parse_range(range_header, contract.size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{contract.size}"})
+
+    start, end = byte_range or (0, contract.size)
+    body = await asyncio.to_thread(pdf_service.store.read, contract_id, start, end)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Contract not found or expired")
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{contract.size}"
+    return Response(content=body, status_code=206 if byte_range else 200,
+                    media_type="application/pdf", headers=headers)
+
+@app.get("/onboarding/history")
+async def list_onboarding_history(limit: int = 50, cursor: Optional[int] = None, name: Optional[str] = None,
+                                  jurisdiction: Optional[str] = None, job_family: Optional[str] = None,
+                                  created_from: Optional[float] = None, created_to: Optional[float] = None):
+    """
+    Generated packets, newest first. Filters: name (prefix, case-insensitive), jurisdiction,
+    job_family, created_from / created_to (unix seconds). Pass next_cursor back as cursor for the next page.
+    """
+    if not 1 <= limit <= HISTORY_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {HISTORY_PAGE_MAX}")
+    return await asyncio.to_thread(
+        history.list, limit, cursor, name, jurisdiction, job_family, created_from, created_to)
+
+@app.get("/onboarding/history/{record_id}")
+async def get_onboarding_history(record_id: int):
+    """One stored packet, in the same shape /generate-onboarding returned it."""
+    record = await asyncio.to_thread(history.get, record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Onboarding record not found")
+    return {**record.summary(), "package": record.to_package()}
 
 @app.post("/ask-policy")
 async def ask_policy(query: PolicyQuestion):
     """
     Endpoint for the 'Ask HR' sidebar tab.
     """
-    answer = ai_service.answer_policy_question(query.question)
+    answer = await ai_service.answer_policy_question_async(query.question)
     return {"answer": answer}
 
+@app.post("/ask-policy/stream")
+async def ask_policy_stream(query: PolicyQuestion):
+    """
+    Streaming 'Ask HR' endpoint.
+    Emits NDJSON lines of the form {"token": "..."} as the model generates them.
+    """
+    async def token_lines():
+        async for token in ai_service.stream_policy_answer(query.question):
+            yield json.dumps({"token": token}) + "\n"
+
+    return StreamingResponse(token_lines(), media_type="application/x-ndjson")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus scrape endpoint: per-stage latency, LLM usage, cache and pool gauges.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/ollama")
+async def ollama_health():
+    """
+    Per-host status of the Ollama pool (health, circuit state, load).
+    """
+    return {"hosts": ai_service.pool.snapshot()}
+
 @app.get("/")
 async def root():
     return {"message": "Invisible Onboarding Engine is Online"}
\ No newline at end of file
@@ -0,0 +1,67 @@
+import json
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Optional
+from .schemas import OnboardingPackage
+
+
+def name_key(name: str) -> str:
+    """Case- and accent-insensitive form of a candidate name, used for indexed prefix search."""
+    decomposed = unicodedata.normalize("NFKD", name or "")
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+
+@dataclass
+class OnboardingRecord:
+    """
+    One generated onboarding packet as stored in the onboarding table.
+    The indexed columns are copied out of the package; the package itself is kept as JSON.
+    """
+    candidate_name: str
+    name_key: str
+    jurisdiction: str
+    job_family: str
+    location_country: str
+    role: str
+    alert_count: int
+    package: str                       # OnboardingPackage JSON
+    created_at: float = field(default_factory=time.time)
+    id: Optional[int] = None
+
+    COLUMNS = ("candidate_name", "name_key", "jurisdiction", "job_family", "location_country",
+               "role", "alert_count", "package", "created_at")
+
+    @classmethod
+    def from_package(cls, package: OnboardingPackage, created_at: Optional[float] = None) -> "OnboardingRecord":
+        candidate = package.candidate
+        return cls(
+            candidate_name=candidate.name,
+            name_key=name_key(candidate.name),
+            jurisdiction=package.jurisdiction_detected,
+            job_family=candidate.job_family,
+            location_country=candidate.location_country,
+            role=candidate.role,
+            alert_count=len(package.compliance_alerts),
+            package=package.model_dump_json(),
+            created_at=time.time() if created_at is None else created_at,
+        )
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, column) for column in self.COLUMNS)
+
+    def summary(self) -> dict:
+        """List view: everything but the (large) package body."""
+        return {
+            "id": self.id,
+            "candidate_name": self.candidate_name,
+            "jurisdiction": self.jurisdiction,
+            "job_family": self.job_family,
+            "location_country": self.location_country,
+            "role": self.role,
+            "alert_count": self.alert_count,
+            "created_at": self.created_at,
+        }
+
+    def to_package(self) -> dict:
+        return json.loads(self.package)
@@ -1,10 +1,14 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, HttpUrl
+from datetime import date
 from typing import Optional, List
 
 # 1. Input: What the HR Manager pastes
 class RawJobDescription(BaseModel):
     raw_text: str = Field(..., description="The raw email or notes")
 
+class OnboardingJobRequest(RawJobDescription):
+    callback_url: Optional[HttpUrl] = Field(None, description="POSTed the final job status when the job finishes (http/https)")
+
 # 2. Structured Data: RELAXED VALIDATION
 class CandidateProfile(BaseModel):
     name: str = Field("Unknown Candidate", description="Candidate Name")
@@ -33,4 +37,24 @@ class PolicyQuestion(BaseModel):
     Model for the HR Chatbot input.
     Defined here so Python knows what 'PolicyQuestion' is before the endpoint uses it.
     """
-    question: str
\ No newline at end of file
+    question: str
+
+# 5. Bulk compliance audit (columnar: one list per field, all the same length)
+class AuditBatch(BaseModel):
+    citizenship: List[Optional[str]] = Field(default_factory=list)
+    location_country: List[Optional[str]] = Field(default_factory=list)
+    salary: List[Optional[float]] = Field(default_factory=list)
+    currency: List[Optional[str]] = Field(default_factory=list)
+    start_date: List[Optional[str]] = Field(default_factory=list)
+
+# 6. Feasibility grid: one candidate, several locations x start dates
+class DateRange(BaseModel):
+    start: date
+    end: date
+    step_days: int = Field(7, ge=1, description="Spacing between probed start dates")
+
+class FeasibilityRequest(BaseModel):
+    candidate: CandidateProfile
+    locations: List[str] = Field(..., min_length=1)
+    start_dates: List[date] = Field(default_factory=list)
+    date_ranges: List[DateRange] = Field(default_factory=list)
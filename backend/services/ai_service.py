@@ -1,9 +1,44 @@
+import asyncio
 import json
 import os
-import re
+import time
+from contextlib import contextmanager
 from datetime import date
-from ollama import Client
+from typing import Optional
+from ..config import (
+    OLLAMA_MODEL, OLLAMA_TIMEOUT_SECONDS, OLLAMA_MAX_CONCURRENCY,
+    OLLAMA_HOSTS, OLLAMA_CONNECT_TIMEOUT_SECONDS, OLLAMA_BREAKER_FAILURES,
+    OLLAMA_BREAKER_RESET_SECONDS, OLLAMA_HEALTH_INTERVAL_SECONDS,
+    EXTRACTION_CACHE_PATH, EXTRACTION_CACHE_TTL_SECONDS,
+    EXTRACTION_CACHE_MEMORY_ENTRIES, EXTRACTION_CACHE_DISK_ENTRIES,
+    HANDBOOK_PATH, HANDBOOK_TOP_K, EXTRACTION_MAX_REPAIRS,
+)
+from pydantic import ValidationError
 from ..models.schemas import CandidateProfile
+from .cache import ExtractionCache, normalize_text
+from .fast_extractor import RuleBasedExtractor
+from .jurisdictions import RESOLVER, Jurisdiction
+from .metrics import LLM_IN_FLIGHT, LLM_REQUESTS, LLM_REQUEST_SECONDS, record_llm_usage
+from .ollama_pool import OllamaPool, PooledClient, AsyncPooledClient
+from .retrieval import HandbookIndex
+from .singleflight import SingleFlight
+
+# Bump whenever the extraction prompt changes so cached results are not reused
+EXTRACTION_PROMPT_VERSION = "extract-v2"
+
+# JSON schema handed to Ollama's structured output (`format=`).
+# job_family gets an enum here so the model can only pick a valid category.
+EXTRACTION_SCHEMA = CandidateProfile.model_json_schema()
+EXTRACTION_SCHEMA["properties"]["job_family"]["enum"] = ["Sales", "Engineering", "Executive", "General"]
+
+
+def _subschema(fields: list) -> dict:
+    """Schema restricted to the given CandidateProfile fields (used for repairs)."""
+    return {
+        "type": "object",
+        "properties": {f: EXTRACTION_SCHEMA["properties"][f] for f in fields if f in EXTRACTION_SCHEMA["properties"]},
+        "required": [f for f in fields if f in EXTRACTION_SCHEMA["properties"]],
+    }
 
 # Mock data for fallback
 MOCK_RESPONSE = {
@@ -19,6 +54,9 @@ MOCK_RESPONSE = {
     "equity_grant": True
 }
 
+class ExtractionFailed(RuntimeError):
+    """Raised by strict extraction when the LLM call fails (instead of returning MOCK_RESPONSE)."""
+
 def get_windows_host_ip():
     """
     Auto-detects the Windows Host IP from inside WSL.
@@ -37,148 +75,355 @@ def get_windows_host_ip():
     return "127.0.0.1"
 
 class AIService:
-    def __init__(self):
-        # 1. AUTO-DISCOVER THE HOST
-        self.windows_ip = get_windows_host_ip()
-        self.host_url = f"http://{self.windows_ip}:11434"
-        
-        print(f"🔍 Discovered Windows IP: {self.windows_ip}")
+    def __init__(self, cache: Optional[ExtractionCache] = None, hosts: Optional[list] = None):
+        # 1. HOSTS: explicit list (OLLAMA_HOSTS), else AUTO-DISCOVER the Windows host
+        hosts = hosts or OLLAMA_HOSTS
+        if not hosts:
+            self.windows_ip = get_windows_host_ip()
+            print(f"🔍 Discovered Windows IP: {self.windows_ip}")
+            hosts = [self.windows_ip]
+
+        self.pool = OllamaPool(
+            hosts,
+            timeout=OLLAMA_TIMEOUT_SECONDS,
+            connect_timeout=OLLAMA_CONNECT_TIMEOUT_SECONDS,
+            failure_threshold=OLLAMA_BREAKER_FAILURES,
+            reset_timeout=OLLAMA_BREAKER_RESET_SECONDS,
+            probe_interval=OLLAMA_HEALTH_INTERVAL_SECONDS,
+        )
+        self.host_url = ", ".join(self.pool.hosts)
         print(f"🦙 Connecting to Ollama at: {self.host_url}")
         
-        self.model = "ministral-3" # Ensure you have pulled this model!
-        
-        # 2. Initialize Client
+        self.model = OLLAMA_MODEL # Ensure you have pulled this model!
+        # Overall deadline, a little past the pool's per-host one: a hung host times out
+        # inside the pool first (and counts against its breaker) rather than being cancelled here
+        self.timeout = OLLAMA_TIMEOUT_SECONDS + OLLAMA_CONNECT_TIMEOUT_SECONDS
+        self.max_repairs = EXTRACTION_MAX_REPAIRS
+        # Caps concurrent generations (per host, so adding hosts adds capacity)
+        self.llm_slots = asyncio.Semaphore(OLLAMA_MAX_CONCURRENCY * len(self.pool.endpoints))
+        # Coalesces identical in-flight requests (double clicks, Streamlit reruns)
+        self.inflight = SingleFlight()
+
+        # 2. Clients (sync for scripts/tests, async for the API), both balanced over the pool
+        self.client = PooledClient(self.pool)
+        self.async_client = AsyncPooledClient(self.pool)
+
+        # 3. Extraction Cache (memory LRU + SQLite)
+        self.cache = cache or ExtractionCache(
+            path=EXTRACTION_CACHE_PATH,
+            max_memory_entries=EXTRACTION_CACHE_MEMORY_ENTRIES,
+            max_disk_entries=EXTRACTION_CACHE_DISK_ENTRIES,
+            ttl_seconds=EXTRACTION_CACHE_TTL_SECONDS,
+        )
+
+        # 4. Handbook Retrieval Index (rebuilt when the file changes)
+        self.handbook = HandbookIndex(HANDBOOK_PATH, top_k=HANDBOOK_TOP_K)
+
+        # 5. Shared jurisdiction registry + rule-based fast path (skips the LLM)
+        self.jurisdictions = RESOLVER
+        self.fast_extractor = RuleBasedExtractor(self.jurisdictions)
+
+    @contextmanager
+    def _track_llm(self, purpose: str):
+        """Latency, outcome and in-flight accounting for one LLM call."""
+        LLM_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        outcome = "error"
         try:
-            self.client = Client(host=self.host_url)
-        except Exception as e:
-            print(f"⚠️ Failed to initialize Client: {e}")
-            self.client = None
+            yield
+            outcome = "ok"
+        finally:
+            LLM_IN_FLIGHT.dec()
+            LLM_REQUEST_SECONDS.observe(time.perf_counter() - start, purpose=purpose)
+            LLM_REQUESTS.inc(purpose=purpose, outcome=outcome)
 
-    def extract_candidate_data(self, raw_text: str) -> CandidateProfile:
-        today_str = date.today().strftime("%Y-%m-%d")
+    def _chat(self, purpose: str, **kwargs):
+        with self._track_llm(purpose):
+            response = self.client.chat(model=self.model, **kwargs)
+        record_llm_usage(response, purpose)
+        return response
 
+    async def _chat_async(self, purpose: str, **kwargs):
+        """
+        Awaits a chat completion without blocking the event loop.
+        Waits for a free concurrency slot, then cancels the request
+        if it exceeds the per-call timeout.
+        """
+        async with self.llm_slots:
+            with self._track_llm(purpose):
+                response = await asyncio.wait_for(
+                    self.async_client.chat(model=self.model, **kwargs),
+                    timeout=self.timeout,
+                )
+        record_llm_usage(response, purpose)
+        return response
+
+    def _build_extraction_prompt(self, raw_text: str, today_str: str) -> str:
+        # The JSON shape is enforced by EXTRACTION_SCHEMA, so the prompt only covers semantics
         prompt = f"""
         Current Date: {today_str} (Use this to resolve relative dates like "next month")
-        
-        You are an expert HR Data Extractor. Your goal is to extract structured data from the text below.
-        
-        CRITICAL INSTRUCTION - "job_family":
-        Analyze the "role" and classify it into EXACTLY ONE of these categories:
-        - "Sales" (if role involves Sales, BD, Account Exec)
-        - "Engineering" (if role involves Dev, QA, Product, Data)
-        - "Executive" (if role is C-level, VP, Director)
-        - "General" (everything else)
-
-        CRITICAL INSTRUCTION - "citizenship" & "location_country":
-        Return the COUNTRY NAME ONLY. 
-        - Example: "UAE" (not "UAE citizen")
-        - Example: "Germany" (not "German")
-
-        Required JSON Structure:
-        {{
-            "name": string (use "Unknown" if missing),
-            "role": string (use "TBD" if missing),
-            "job_family": string,
-            "email": string or null,
-            "salary": number (0 if missing),
-            "currency": string (default "USD"),
-            "start_date": string (YYYY-MM-DD) or null,
-            "location_country": string (default "Unknown"),
-            "citizenship": string or null,
-            "equity_grant": boolean
-        }}
+
+        Extract the new hire's details from the text below.
+        - job_family: "Sales" (Sales, BD, Account Exec), "Engineering" (Dev, QA, Product, Data),
+          "Executive" (C-level, VP, Director) or "General" (everything else).
+        - location_country / citizenship: COUNTRY NAME ONLY, e.g. "Germany" (not "German").
+        - start_date as YYYY-MM-DD. Use null for unknown optional fields and 0 for a missing salary.
 
         Text to analyze: "{raw_text}"
-        
-        Return ONLY the JSON object. Do not include any explanation or markdown formatting like ```json.
         """
+        return prompt
+
+    def _extraction_messages(self, raw_text: str, today_str: str) -> list:
+        return [
+            {'role': 'system', 'content': 'You are a JSON extractor.'},
+            {'role': 'user', 'content': self._build_extraction_prompt(raw_text, today_str)}
+        ]
+
+    def _extraction_cache_key(self, raw_text: str, today_str: str) -> str:
+        return ExtractionCache.make_key(raw_text, self.model, EXTRACTION_PROMPT_VERSION, today_str)
+
+    def _fast_extract(self, raw_text: str, today: date) -> Optional[CandidateProfile]:
+        fast = self.fast_extractor.extract(raw_text, today)
+        if fast.candidate is not None:
+            print(f"⚡ Fast-path extraction (confidence {fast.confidence})")
+        return fast.candidate
+
+    def _extract_without_llm(self, raw_text: str, today: date, cache_key: str) -> Optional[CandidateProfile]:
+        """
+        Cheap paths tried before Ollama: the rule-based extractor, then the cache.
+        """
+        known = self._fast_extract(raw_text, today)
+        if known is not None:
+            return known
+
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return CandidateProfile(**cached)
+        return None
+
+    async def _extract_without_llm_async(self, raw_text: str, today: date, cache_key: str) -> Optional[CandidateProfile]:
+        known = self._fast_extract(raw_text, today)
+        if known is not None:
+            return known
+
+        cached = await self.cache.aget(cache_key)
+        if cached is not None:
+            return CandidateProfile(**cached)
+        return None
+
+    def _extraction_dialog(self, raw_text: str, today_str: str):
+        """
+        The extraction conversation as a generator: yields chat requests,
+        receives responses, and returns the validated CandidateProfile.
+        Invalid fields are re-asked on their own (bounded by max_repairs);
+        only unparseable output triggers a full re-generation.
+        """
+        messages = self._extraction_messages(raw_text, today_str)
+        response = yield {"messages": messages, "format": EXTRACTION_SCHEMA}
+        data = {}
+
+        for attempt in range(self.max_repairs + 1):
+            last_attempt = attempt == self.max_repairs
+            content = response.message.content
+            try:
+                patch = json.loads(content)
+                if not isinstance(patch, dict):
+                    raise ValueError("expected a JSON object")
+            except ValueError:
+                if last_attempt:
+                    raise
+                response = yield {"messages": messages, "format": EXTRACTION_SCHEMA}
+                continue
+
+            data.update(patch)
+            try:
+                return CandidateProfile(**data)
+            except ValidationError as e:
+                invalid = sorted({str(err["loc"][0]) for err in e.errors() if err["loc"]})
+                for field in invalid:
+                    data.pop(field, None)
+                if last_attempt:
+                    # Out of repairs: keep what's valid, defaults for the rest
+                    print(f"⚠️ Dropping invalid fields after {self.max_repairs} repairs: {invalid}")
+                    return CandidateProfile(**data)
+
+                print(f"🔧 Re-asking for invalid fields: {invalid}")
+                repair_messages = messages + [
+                    {'role': 'assistant', 'content': content},
+                    {'role': 'user', 'content': f"These fields were invalid: {', '.join(invalid)}. "
+                                                f"Return a JSON object with corrected values for only those fields."},
+                ]
+                response = yield {"messages": repair_messages, "format": _subschema(invalid)}
+
+    def _run_dialog(self, dialog):
+        request = next(dialog)
+        while True:
+            response = self._chat("extraction", **request)
+            try:
+                request = dialog.send(response)
+            except StopIteration as done:
+                return done.value
+
+    async def _run_dialog_async(self, dialog):
+        request = next(dialog)
+        while True:
+            response = await self._chat_async("extraction", **request)
+            try:
+                request = dialog.send(response)
+            except StopIteration as done:
+                return done.value
+
+    def _extraction_fallback(self, error: Exception) -> CandidateProfile:
+        print(f"❌ Ollama Extraction Failed: {error!r}")
+        print(f"   Target Host was: {self.host_url}")
+        return CandidateProfile(**MOCK_RESPONSE)
+
+    def extract_candidate_data(self, raw_text: str) -> CandidateProfile:
+        today = date.today()
+        today_str = today.strftime("%Y-%m-%d")
+        cache_key = self._extraction_cache_key(raw_text, today_str)
+        known = self._extract_without_llm(raw_text, today, cache_key)
+        if known is not None:
+            return known
 
         try:
-            # 3. USE CLIENT CHAT
-            response = self.client.chat(
-                model=self.model,
-                messages=[
-                    {'role': 'system', 'content': 'You are a JSON extractor.'},
-                    {'role': 'user', 'content': prompt}
-                ],
-            )
-            
-            # Clean Output
-            content = response.message.content.strip()
-            # Remove markdown blocks if present
-            content = re.sub(r'^```json\s*', '', content)
-            content = re.sub(r'^```\s*', '', content)
-            content = re.sub(r'\s*```$', '', content)
-            
-            data = json.loads(content)
-            return CandidateProfile(**data)
+            # 3. USE CLIENT CHAT (schema-constrained)
+            candidate = self._run_dialog(self._extraction_dialog(raw_text, today_str))
+            self.cache.set(cache_key, candidate.model_dump())
+            return candidate
 
         except Exception as e:
-            print(f"❌ Ollama Extraction Failed: {e}")
-            print(f"   Target Host was: {self.host_url}")
-            return CandidateProfile(**MOCK_RESPONSE)
+            return self._extraction_fallback(e)
+
+    async def extract_candidate_data_async(self, raw_text: str, strict: bool = False) -> CandidateProfile:
+        """
+        Non-blocking variant used by the API endpoints.
+        Timeouts fall back like any other failure; cancellation propagates.
+        strict=True raises ExtractionFailed instead of falling back, for callers
+        (batch items, jobs) that must not report the mock candidate as a success.
+        """
+        today = date.today()
+        today_str = today.strftime("%Y-%m-%d")
+        cache_key = self._extraction_cache_key(raw_text, today_str)
+        known = await self._extract_without_llm_async(raw_text, today, cache_key)
+        if known is not None:
+            return known
+
+        try:
+            # Identical texts already being extracted share that one generation
+            return await self.inflight.do(
+                ("extract", cache_key),
+                lambda: self._extract_with_llm_async(raw_text, today_str, cache_key),
+            )
+        except Exception as e:
+            if strict:
+                print(f"❌ Ollama Extraction Failed: {e!r}")
+                raise ExtractionFailed(f"Candidate extraction failed: {e!r}") from e
+            return self._extraction_fallback(e)
+
+    async def _extract_with_llm_async(self, raw_text: str, today_str: str, cache_key: str) -> CandidateProfile:
+        # Errors reach every coalesced caller, and each decides whether to fall back
+        candidate = await self._run_dialog_async(self._extraction_dialog(raw_text, today_str))
+        await self.cache.aset(cache_key, candidate.model_dump())
+        return candidate
+
+    def resolve_jurisdiction(self, country: str) -> Jurisdiction:
+        """
+        Full jurisdiction record (label, template, display name) for a location.
+        """
+        return self.jurisdictions.resolve(country)
 
     def determine_jurisdiction(self, country: str) -> str:
         """
         Robust Jurisdiction Matcher.
-        Handles full names ("United Arab Emirates") and codes ("UAE").
+        Handles full names ("United Arab Emirates"), cities ("Dubai") and codes ("UAE").
         """
-        if not country: 
-            return "General International Contractor Agreement"
-            
-        country = country.lower().strip()
+        return self.resolve_jurisdiction(country).label
+
+    def _build_policy_prompt(self, question: str) -> str:
+        # Only the most relevant handbook sections go into the prompt
+        if os.path.exists(self.handbook.path):
+            sections = self.handbook.search(question)
+            policy_text = "\n\n".join(s.text for s in sections) or "No relevant policy section found."
+        else:
+            policy_text = "No handbook found."
+
+        # OPTIMIZED PROMPT
+        prompt = f"""
+        You are the Deriv HR AI. Answer the employee's question based strictly on the policy text below.
         
-        # 1. UAE Logic (Added 'united arab emirates' and 'emirates')
-        uae_keywords = ["uae", "dubai", "difc", "united arab emirates", "emirates", "abu dhabi"]
-        if any(x in country for x in uae_keywords):
-            return "DIFC Employment Law (UAE)"
-            
-        # 2. UK Logic (Added 'united kingdom')
-        uk_keywords = ["uk", "britain", "london", "united kingdom", "england", "scotland"]
-        if any(x in country for x in uk_keywords):
-            return "Employment Rights Act 1996 (UK)"
-            
-        # 3. Germany Logic (Added 'deutschland')
-        de_keywords = ["germany", "berlin", "deutschland", "munich", "frankfurt"]
-        if any(x in country for x in de_keywords):
-            return "German Civil Code (BGB)"
-            
-        # Fallback
-        return "General International Contractor Agreement"
+        RULES:
+        1. Be extremely concise. Maximum 2 sentences.
+        2. Go straight to the answer. Do not say "Based on the handbook..." or "Hello".
+        3. If the answer involves money, bold the amount (e.g., *$50*)."
+        
+        POLICY TEXT:
+        {policy_text}
+        
+        QUESTION: {question}
+        """
+        return prompt
 
     def answer_policy_question(self, question: str) -> str:
         """
         Phase 2: Conversational HR Assistant
         """
         try:
-            # Check if handbook exists
-            path = os.path.join("data", "handbook.txt")
-            if os.path.exists(path):
-                with open(path, "r") as f:
-                    policy_text = f.read()
-            else:
-                policy_text = "No handbook found."
-
-            # OPTIMIZED PROMPT
-            prompt = f"""
-            You are the Deriv HR AI. Answer the employee's question based strictly on the policy text below.
-            
-            RULES:
-            1. Be extremely concise. Maximum 2 sentences.
-            2. Go straight to the answer. Do not say "Based on the handbook..." or "Hello".
-            3. If the answer involves money, bold the amount (e.g., *$50*)."
-            
-            POLICY TEXT:
-            {policy_text}
-            
-            QUESTION: {question}
-            """
-
-            response = self.client.chat(
-                model=self.model,
-                messages=[{'role': 'user', 'content': prompt}],
+            response = self._chat(
+                "policy",
+                messages=[{'role': 'user', 'content': self._build_policy_prompt(question)}],
+            )
+            return response.message.content
+
+        except Exception as e:
+            return f"Sorry, I couldn't process that. Error: {e}"
+
+    async def answer_policy_question_async(self, question: str) -> str:
+        """
+        Non-blocking variant of answer_policy_question for the API.
+        Concurrent identical questions share one generation.
+        """
+        key = ("policy", normalize_text(question).lower())
+        return await self.inflight.do(key, lambda: self._answer_policy_question_llm_async(question))
+
+    async def _answer_policy_question_llm_async(self, question: str) -> str:
+        try:
+            response = await self._chat_async(
+                "policy",
+                messages=[{'role': 'user', 'content': self._build_policy_prompt(question)}],
             )
             return response.message.content
 
         except Exception as e:
-            return f"Sorry, I couldn't process that. Error: {e}"
\ No newline at end of file
+            return f"Sorry, I couldn't process that. Error: {e!r}"
+
+    async def stream_policy_answer(self, question: str):
+        """
+        Streams the answer token by token (Ollama stream=True).
+        The timeout applies to the gap between tokens, not the whole answer.
+        """
+        try:
+            async with self.llm_slots:
+                with self._track_llm("policy_stream"):
+                    stream = await asyncio.wait_for(
+                        self.async_client.chat(
+                            model=self.model,
+                            messages=[{'role': 'user', 'content': self._build_policy_prompt(question)}],
+                            stream=True,
+                        ),
+                        timeout=self.timeout,
+                    )
+                    iterator = stream.__aiter__()
+                    while True:
+                        try:
+                            part = await asyncio.wait_for(iterator.__anext__(), timeout=self.timeout)
+                        except StopAsyncIteration:
+                            break
+                        if part.message.content:
+                            yield part.message.content
+                        if getattr(part, "done", False) is True:
+                            # The final chunk carries the token counts
+                            record_llm_usage(part, "policy_stream")
+
+        except Exception as e:
+            yield f"Sorry, I couldn't process that. Error: {e!r}"
\ No newline at end of file
@@ -0,0 +1,313 @@
+import csv
+import io
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+import numpy as np
+
+from ..models.schemas import CandidateProfile
+from .compliance import ComplianceEngine
+from .rules import BINARY_OPS, CompiledRule, Predicate
+
+try:  # Parquet input is optional
+    import pandas as pd
+except ImportError:
+    pd = None
+
+# Columns the audit reads; anything else in the input is ignored
+AUDIT_COLUMNS = ("citizenship", "location_country", "salary", "currency", "start_date")
+
+ONE_DAY = np.timedelta64(1, "D")
+
+# Alert types that make a (location, start date) cell infeasible.
+# WORKFLOW_TRIGGER (e.g. visa sponsorship) is work to schedule, not a blocker.
+BLOCKING_TYPES = frozenset({"DATA_ERROR", "COMPLIANCE_RISK"})
+
+
+def _clean(value):
+    if value is None:
+        return None
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def load_csv(data: bytes) -> Dict[str, list]:
+    """CSV bytes -> columns (header names are matched case-insensitively)."""
+    reader = csv.DictReader(io.StringIO(data.decode("utf-8-sig")))
+    columns = {name: [] for name in AUDIT_COLUMNS}
+    for row in reader:
+        row = {(k or "").strip().lower(): v for k, v in row.items()}
+        for name in AUDIT_COLUMNS:
+            columns[name].append(_clean(row.get(name)))
+    return columns
+
+
+def load_parquet(data: bytes) -> Dict[str, list]:
+    """Parquet bytes -> columns. Needs pandas + pyarrow."""
+    if pd is None:
+        raise ValueError("Parquet input needs pandas and pyarrow installed")
+    frame = pd.read_parquet(io.BytesIO(data))
+    frame.columns = [str(c).strip().lower() for c in frame.columns]
+    columns = {}
+    for name in AUDIT_COLUMNS:
+        if name not in frame:
+            columns[name] = [None] * len(frame)
+            continue
+        series = frame[name]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            series = series.dt.strftime("%Y-%m-%d")
+        columns[name] = [_clean(v) for v in series.astype(object).tolist()]
+    return columns
+
+
+def load_table(data: bytes, filename: str = "") -> Dict[str, list]:
+    """Picks the parser from the file name (or the Parquet magic bytes)."""
+    if filename.lower().endswith(".parquet") or data[:4] == b"PAR1":
+        return load_parquet(data)
+    return load_csv(data)
+
+
+def _present(values: np.ndarray) -> np.ndarray:
+    if values.dtype == bool:
+        return np.ones(len(values), dtype=bool)
+    if values.dtype.kind == "f":
+        return ~np.isnan(values)
+    return np.array([v is not None for v in values], dtype=bool)
+
+
+def vector_test(predicate: Predicate, values: np.ndarray) -> np.ndarray:
+    """Predicate.test over a whole column, with the same None/NaN semantics."""
+    present = _present(values)
+    if predicate.op == "known":
+        known = present.copy()
+        if values.dtype == object:
+            known[present] = values[present] != "unknown"
+        return known
+    if predicate.op in ("is_true", "is_false"):
+        if values.dtype == bool:
+            truthy = values.copy()
+        elif values.dtype.kind == "f":
+            truthy = present & (values != 0)
+        else:
+            truthy = np.array([bool(v) for v in values], dtype=bool)
+        return truthy if predicate.op == "is_true" else ~truthy
+
+    mask = np.zeros(len(values), dtype=bool)
+    if present.any():
+        mask[present] = np.asarray(BINARY_OPS[predicate.op](values[present], predicate.operand), dtype=bool)
+    return mask
+
+
+def _memoized(values: Sequence, fn: Callable) -> list:
+    """fn applied once per distinct value (countries and dates repeat a lot)."""
+    cache = {}
+    out = []
+    for v in values:
+        if v not in cache:
+            cache[v] = fn(v)
+        out.append(cache[v])
+    return out
+
+
+def _to_float(value) -> float:
+    if value is None or value == "":
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class BulkAuditor:
+    """
+    Vectorized ComplianceEngine.analyze over a columnar batch.
+    Rows are grouped by hiring country so every rule runs once per group
+    as NumPy comparisons against that country's compiled params.
+    """
+
+    def __init__(self, engine: ComplianceEngine, chunk_size: int = 5000):
+        self.engine = engine
+        self.chunk_size = chunk_size
+
+    def audit(self, columns: Dict[str, Sequence], now: Optional[datetime] = None,
+              category: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Yields one alert dict per (row, rule) hit, ordered by row then rule,
+        i.e. exactly what analyze() would return row by row, plus "index".
+        """
+        lengths = {len(v) for v in columns.values() if v is not None and len(v)}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(lengths)}")
+        n_rows = lengths.pop() if lengths else 0
+        now = now or datetime.now()
+
+        for start in range(0, n_rows, self.chunk_size):
+            stop = min(start + self.chunk_size, n_rows)
+            chunk = {}
+            for name in AUDIT_COLUMNS:
+                values = columns.get(name)
+                chunk[name] = list(values[start:stop]) if values is not None and len(values) else [None] * (stop - start)
+            yield from self._audit_chunk(chunk, start, now, category)
+
+    def _prepare(self, chunk: Dict[str, list], now: datetime) -> Dict[str, np.ndarray]:
+        normalize = self.engine._normalize_country
+        # CandidateProfile defaults a missing location to "Unknown"
+        location = [v if v is not None else "Unknown" for v in chunk["location_country"]]
+        citizenship = chunk["citizenship"]
+        citizenship_norm = np.array(_memoized(citizenship, normalize), dtype=object)
+        location_norm = np.array(_memoized(location, normalize), dtype=object)
+
+        # 1. Dates: parse each distinct string once, then one vectorized subtraction
+        parse = self.engine._parse_date
+        starts = np.array(
+            _memoized(chunk["start_date"], lambda s: np.datetime64(parse(s), "us") if s else np.datetime64("NaT", "us")),
+            dtype="datetime64[us]",
+        )
+        delta = starts - np.datetime64(now, "us")
+        days_until_start = np.full(len(starts), np.nan)
+        valid = ~np.isnat(delta)
+        # floor division matches timedelta.days for negative gaps too
+        days_until_start[valid] = delta[valid] // ONE_DAY
+
+        return {
+            "citizenship": np.array(citizenship, dtype=object),
+            "location_country": np.array(location, dtype=object),
+            "citizenship_norm": citizenship_norm,
+            "location_norm": location_norm,
+            "needs_visa": (citizenship_norm != "unknown") & (location_norm != "unknown") & (citizenship_norm != location_norm),
+            "salary": np.array([_to_float(v) for v in chunk["salary"]], dtype=float),
+            "currency": np.array(chunk["currency"], dtype=object),
+            "start_date": np.array(chunk["start_date"], dtype=object),
+            "days_until_start": days_until_start,
+        }
+
+    def _audit_chunk(self, chunk: Dict[str, list], offset: int, now: datetime,
+                     category: Optional[str]) -> Iterator[Dict]:
+        facts = self._prepare(chunk, now)
+
+        # 2. Group rows by canonical hiring country
+        countries, codes = np.unique(facts["location_norm"].astype(str), return_inverse=True)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(countries) + 1))
+
+        hit_rows: List[np.ndarray] = []
+        hit_rules: List[np.ndarray] = []
+        rule_refs: List[tuple] = []  # (CompiledRule, group facts for message formatting)
+        for k, country in enumerate(countries):
+            rows = order[bounds[k]:bounds[k + 1]]
+            table, scalar_facts = self.engine._facts_for_country(country, now)
+
+            # 3. Each applicable rule = AND of vectorized predicates over the group
+            for position, rule in enumerate(table.rules):
+                if category and rule.category != category:
+                    continue
+                mask = np.ones(len(rows), dtype=bool)
+                for predicate in rule.predicates:
+                    column = facts.get(predicate.fact)
+                    if column is not None:
+                        values = column[rows]
+                    else:
+                        values = np.full(len(rows), scalar_facts.get(predicate.fact), dtype=object)
+                    mask &= vector_test(predicate, values)
+                    if not mask.any():
+                        break
+                if mask.any():
+                    hit_rows.append(rows[mask])
+                    hit_rules.append(np.full(int(mask.sum()), len(rule_refs)))
+                    rule_refs.append((rule, position, scalar_facts))
+
+        if not hit_rows:
+            return
+
+        # 4. Back to input order: by row, then by rule position in the file
+        rows = np.concatenate(hit_rows)
+        refs = np.concatenate(hit_rules)
+        positions = np.array([rule_refs[r][1] for r in refs])
+        for i in np.lexsort((positions, rows)):
+            rule, _, scalar_facts = rule_refs[refs[i]]
+            yield self._alert(rule, scalar_facts, facts, int(rows[i]), offset)
+
+    @staticmethod
+    def _alert(rule: CompiledRule, scalar_facts: Dict, facts: Dict[str, np.ndarray], row: int, offset: int) -> Dict:
+        salary = facts["salary"][row]
+        days = facts["days_until_start"][row]
+        row_facts = dict(scalar_facts)
+        row_facts.update({
+            "citizenship": facts["citizenship"][row],
+            "location_country": facts["location_country"][row],
+            "citizenship_norm": facts["citizenship_norm"][row],
+            "location_norm": facts["location_norm"][row],
+            "needs_visa": bool(facts["needs_visa"][row]),
+            "salary": None if np.isnan(salary) else float(salary),
+            "currency": facts["currency"][row],
+            "start_date": facts["start_date"][row],
+            "days_until_start": None if np.isnan(days) else int(days),
+        })
+        return {
+            "index": offset + row,
+            "id": rule.id,
+            "type": rule.type,
+            "severity": rule.severity,
+            "message": rule.message.format(**row_facts),
+        }
+
+    def feasibility(self, candidate: CandidateProfile, locations: Sequence[str], start_dates: Sequence[str],
+                    now: Optional[datetime] = None) -> List[Dict]:
+        """
+        Every (location, start date) combination for one candidate, audited in a single
+        vectorized pass. Returns one entry per location with its cells in date order
+        and the earliest start date that raises no blocking alert.
+        """
+        now = now or datetime.now()
+        n_dates = len(start_dates)
+        n_cells = len(locations) * n_dates
+
+        # 1. The grid as a columnar batch: locations x dates
+        columns = {
+            "citizenship": [candidate.citizenship] * n_cells,
+            "location_country": [loc for loc in locations for _ in range(n_dates)],
+            "salary": [candidate.salary] * n_cells,
+            "currency": [candidate.currency] * n_cells,
+            "start_date": list(start_dates) * len(locations),
+        }
+        cell_alerts: List[List[Dict]] = [[] for _ in range(n_cells)]
+        for alert in self.audit(columns, now=now):
+            cell_alerts[alert.pop("index")].append(alert)
+
+        # 2. Days until start (a past date is never feasible, visa or not)
+        # and probation end dates: one datetime64 operation per location
+        dates = np.array(start_dates, dtype="datetime64[D]")
+        days_until_start = (dates.astype("datetime64[us]") - np.datetime64(now, "us")) // ONE_DAY
+        citizenship_norm = self.engine._normalize_country(candidate.citizenship)
+
+        results = []
+        for i, location in enumerate(locations):
+            location_norm = self.engine._normalize_country(location)
+            params = self.engine.rules.for_country(location_norm).params
+            probation_ends = np.datetime_as_string(dates + np.timedelta64(params.get("probation_days", 180), "D"))
+
+            cells = []
+            for j, start_date in enumerate(start_dates):
+                alerts = cell_alerts[i * n_dates + j]
+                cells.append({
+                    "start_date": start_date,
+                    "days_until_start": int(days_until_start[j]),
+                    "feasible": bool(days_until_start[j] >= 0) and not any(a["type"] in BLOCKING_TYPES for a in alerts),
+                    "probation_end": str(probation_ends[j]),
+                    "alerts": alerts,
+                })
+
+            feasible_dates = [c["start_date"] for c in cells if c["feasible"]]
+            results.append({
+                "location": location,
+                "jurisdiction": self.engine.resolver.resolve(location).label,
+                "visa_required": "unknown" not in (citizenship_norm, location_norm) and citizenship_norm != location_norm,
+                "visa_lead_days": params.get("visa_lead_days"),
+                "minimum_wage": params.get("minimum_wage"),
+                "earliest_feasible_start": min(feasible_dates) if feasible_dates else None,
+                "cells": cells,
+            })
+        return results
@@ -0,0 +1,312 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Optional
+
+_MONTH = r"(jan(uary)?|feb(ruary)?|mar(ch)?|apr(il)?|may|june?|july?|aug(ust)?|sep(t(ember)?)?|oct(ober)?|nov(ember)?|dec(ember)?)\.?"
+_DAY = r"\d{1,2}(st|nd|rd|th)?"
+
+# Dates that pin themselves down (they carry a year). Only texts whose dates are all
+# like this can share a cache entry across days; everything else is keyed on today too.
+ABSOLUTE_DATE_RE = re.compile(
+    r"\b(\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/.]\d{1,2}[/.]\d{4}|"
+    rf"({_DAY}\s+(of\s+)?)?{_MONTH}\s+({_DAY},?\s+)?\d{{4}})\b",
+    re.IGNORECASE,
+)
+
+# Phrases whose meaning depends on "today", even next to an absolute date
+# ("2026-03-01, or in two weeks if the visa is late").
+RELATIVE_DATE_RE = re.compile(
+    r"\b(today|tomorrow|yesterday|tonight|asap|immediately|fortnight|now|"
+    r"(next|this|coming|following|last|end\s+of|start\s+of|beginning\s+of)\s+(the\s+)?"
+    r"(day|week|month|quarter|year|monday|tuesday|wednesday|thursday|friday|saturday|sunday)|"
+    r"(in|within|after)\s+(\d+|a|an|one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|"
+    r"a\s+couple\s+of|a\s+few|several)\s+(days?|weeks?|months?|years?)|"
+    r"monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b",
+    re.IGNORECASE,
+)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFC, trimmed, single spaces."""
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+class LRUCache:
+    """
+    Small in-process LRU with optional per-entry expiry.
+    Not thread-safe on its own; callers hold their own lock.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at < time.time():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, expires_at: Optional[float] = None):
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ExtractionCache:
+    """
+    Two-tier cache for candidate extraction results.
+    Tier 1 is an in-memory LRU, tier 2 a SQLite file that survives restarts.
+    Values are plain dicts (CandidateProfile.model_dump()).
+    Use aget/aset from async code: they keep the SQLite tier off the event loop.
+    """
+
+    # Run disk eviction once every N writes rather than on every insert
+    EVICT_EVERY = 64
+    # Disk hits only note their access time in memory; it is written with the next write
+    TOUCH_FLUSH_EVERY = 256
+
+    def __init__(self, path: Optional[str] = None, max_memory_entries: int = 1024,
+                 max_disk_entries: int = 50000, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.memory = LRUCache(max_memory_entries)
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._touched: dict = {}  # key -> last access not yet written to disk
+        self._db = None
+
+        if path:
+            try:
+                os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                # A cache can lose its last commits on power loss; no fsync per write
+                self._db.execute("PRAGMA synchronous=NORMAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS extractions ("
+                    " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL, last_access REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_extractions_expires ON extractions(expires_at)")
+                self._db.execute("CREATE INDEX IF NOT EXISTS idx_extractions_access ON extractions(last_access)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Extraction cache disk tier disabled: {e}")
+                self._db = None
+
+    @staticmethod
+    def make_key(raw_text: str, model: str, prompt_version: str, today: str) -> str:
+        """
+        Content address for an extraction.
+        The date is left out only when the text gives an absolute date and no
+        relative phrase; "Hire Alex" alone may still get today-based defaults.
+        """
+        text = normalize_text(raw_text)
+        dated = ABSOLUTE_DATE_RE.search(text) and not RELATIVE_DATE_RE.search(text)
+        date_scope = "" if dated else today
+        payload = "\x1f".join([model, prompt_version, date_scope, text])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.time()
+        with self._lock:
+            value = self.memory.get(key)
+            if value is not None:
+                self.stats["memory_hits"] += 1
+                return value
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM extractions WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                if row:
+                    value = json.loads(row[0])
+                    self._touched[key] = now
+                    if len(self._touched) >= self.TOUCH_FLUSH_EVERY:
+                        self._flush_touched_locked()
+                        self._db.commit()
+                    self.memory.set(key, value, expires_at=row[1])
+                    self.stats["disk_hits"] += 1
+                    return value
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: dict):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self.memory.set(key, value, expires_at=expires_at)
+            self.stats["writes"] += 1
+            if self._db is None:
+                return
+
+            self._touched.pop(key, None)
+            self._flush_touched_locked()
+            self._db.execute(
+                "INSERT OR REPLACE INTO extractions (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= self.EVICT_EVERY:
+                self._evict_locked(now)
+            self._db.commit()
+
+    async def aget(self, key: str) -> Optional[dict]:
+        """get() for the event loop: memory hits answer inline, the disk tier runs on a worker thread."""
+        with self._lock:
+            value = self.memory.get(key)
+            if value is not None:
+                self.stats["memory_hits"] += 1
+                return value
+            if self._db is None:
+                self.stats["misses"] += 1
+                return None
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: dict):
+        if self._db is None:
+            self.set(key, value)
+        else:
+            await asyncio.to_thread(self.set, key, value)
+
+    def _flush_touched_locked(self):
+        if self._touched:
+            self._db.executemany("UPDATE extractions SET last_access = ? WHERE key = ?",
+                                 [(ts, key) for key, ts in self._touched.items()])
+            self._touched.clear()
+
+    def _evict_locked(self, now: float):
+        """Drops expired rows, then the least recently used rows above the size cap."""
+        self._writes_since_evict = 0
+        self._flush_touched_locked()
+        self._db.execute("DELETE FROM extractions WHERE expires_at <= ?", (now,))
+        (count,) = self._db.execute("SELECT COUNT(*) FROM extractions").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM extractions WHERE key IN "
+                "(SELECT key FROM extractions ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def evict(self):
+        with self._lock:
+            if self._db is not None:
+                self._evict_locked(time.time())
+                self._db.commit()
+
+    @property
+    def hit_ratio(self) -> float:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+
+class RenderCache:
+    """
+    Rendered contract PDFs keyed by a hash of everything that goes into them.
+    In-memory LRU bounded by total bytes. Entries remember which template files
+    they came from, so a template edit drops every render of the old version.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (pdf, extra, sources)
+        self._versions: dict = {}                              # template path -> digest
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(values: dict, fields: frozenset, template_digest: str, clause_digest: str,
+                 label: str, date: str) -> str:
+        """
+        Content address for a render: only the slots the template reads take part,
+        plus the formatted date (so a cached contract is never back-dated).
+        """
+        used = {field: values[field] for field in sorted(fields) if field in values}
+        payload = "\x1f".join([
+            template_digest, clause_digest, label, date,
+            json.dumps(used, sort_keys=True, default=str),
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def check_version(self, path: str, digest: str):
+        """Records the current digest of a template file; on change, drops renders of the old one."""
+        with self._lock:
+            previous = self._versions.get(path)
+            self._versions[path] = digest
+            if previous is None or previous == digest:
+                return
+            stale = [key for key, (_, _, sources) in self._data.items() if path in sources]
+            for key in stale:
+                self._remove_locked(key)
+            self.stats["invalidations"] += len(stale)
+
+    def _remove_locked(self, key: str):
+        pdf, _, _ = self._data.pop(key)
+        self.bytes -= len(pdf)
+
+    def get(self, key: str) -> Optional[tuple]:
+        """(pdf_bytes, extra) or None."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return item[0], item[1]
+
+    def set(self, key: str, pdf: bytes, extra: Any = None, sources: tuple = ()):
+        if len(pdf) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove_locked(key)
+            self._data[key] = (pdf, extra, frozenset(sources))
+            self.bytes += len(pdf)
+            while self.bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove_locked(oldest)
+                self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
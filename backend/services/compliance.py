@@ -1,55 +1,28 @@
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from ..models.schemas import CandidateProfile
+from ..config import COMPLIANCE_RULES_PATH
+from .jurisdictions import RESOLVER, JurisdictionResolver
+from .rules import CountryRules, RuleSet
 
 class ComplianceEngine:
-    def __init__(self):
-        # 1. Knowledge Base: Canonical Names -> Rules
-        self.minimum_wages = {
-            "germany": {"amount": 40000, "currency": "EUR"},
-            "united kingdom": {"amount": 25000, "currency": "GBP"},
-            "united arab emirates": {"amount": 5000, "currency": "AED"}
-        }
-        
-        self.visa_processing_times = {
-            "united arab emirates": 21,
-            "germany": 60,
-            "united kingdom": 45
-        }
+    def __init__(self, resolver: JurisdictionResolver = RESOLVER, rules: Optional[RuleSet] = None):
+        # 1. Country normalization: the shared jurisdiction registry
+        self.resolver = resolver
 
-        # 2. The Normalization Map
-        # Maps common variations to a single Canonical Name (lowercase)
-        self.country_aliases = {
-            # UAE Variations
-            "uae": "united arab emirates",
-            "dubai": "united arab emirates",
-            "abudhabi": "united arab emirates",
-            "u.a.e.": "united arab emirates",
-            "abu dhabi": "united arab emirates",
-            
-            # UK Variations
-            "uk": "united kingdom",
-            "britain": "united kingdom",
-            "great britain": "united kingdom",
-            "london": "united kingdom",
-            "england": "united kingdom",
-            
-            # Germany Variations
-            "de": "germany",
-            "deutschland": "germany",
-            "berlin": "germany",
-            "munich": "germany"
-        }
+        # 2. Knowledge Base: declarative rules (thresholds, lead times, messages), hot reloaded
+        self.rules = rules or RuleSet(COMPLIANCE_RULES_PATH, normalize=resolver.normalize_country)
+
+        # Kept for callers that read the alias map directly
+        self.country_aliases = resolver.aliases
 
     def _normalize_country(self, name: Optional[str]) -> str:
         """
-        Converts 'UAE', 'Dubai', 'U.A.E.' -> 'united arab emirates'
+        Converts 'UAE', 'Dubai', 'U.A.E.' -> 'united arab emirates'.
+        Aliases from the rules file count too ('Holland' -> 'netherlands'), so the
+        visa check and the rule lookup always agree on the country.
         """
-        if not name:
-            return "unknown"
-        
-        cleaned = name.lower().strip()
-        return self.country_aliases.get(cleaned, cleaned)
+        return self.rules.canonical(self.resolver.normalize_country(name))
 
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         try:
@@ -57,88 +30,78 @@ class ComplianceEngine:
         except:
             return None
 
-    def check_visa_requirements(self, candidate: CandidateProfile) -> List[Dict]:
-        alerts = []
-        
-        # 1. Normalize Inputs
-        citizenship_norm = self._normalize_country(candidate.citizenship)
-        location_norm = self._normalize_country(candidate.location_country)
+    def _facts_for_country(self, location_norm: str, now: datetime) -> Tuple[CountryRules, Dict]:
+        """
+        The rule table for a hiring country and the facts that only depend on
+        the country (its params, display title, suggested visa-safe start date).
+        """
+        table = self.rules.for_country(location_norm)
+        params = table.params
 
-        # 2. Comparison Logic
-        if citizenship_norm == "unknown" or location_norm == "unknown":
-            return alerts
-            
-        # If they match, NO Visa is needed
-        if citizenship_norm == location_norm:
-            return [] # Local Hire
+        lead_days = params.get("visa_lead_days")
+        suggested_start = None
+        if lead_days is not None:
+            buffer_days = params.get("suggested_buffer_days", 7)
+            suggested_start = (now + timedelta(days=lead_days + buffer_days)).strftime('%Y-%m-%d')
 
-        # 3. Visa Required Logic
-        alerts.append({
-            "type": "WORKFLOW_TRIGGER",
-            "severity": "HIGH",
-            "message": f"🛂 Visa Sponsorship Required: {candidate.citizenship} citizen hiring in {candidate.location_country}.",
+        facts = dict(params)
+        facts.update({
+            "location_norm": location_norm,
+            "country_title": location_norm.title(),
+            "suggested_start": suggested_start,
         })
+        return table, facts
 
-        # 4. Start Date Risk Analysis
-        start_date = self._parse_date(candidate.start_date)
-        if start_date:
-            days_until_start = (start_date - datetime.now()).days
-            
-            # Use normalized key for lookup
-            needed_days = self.visa_processing_times.get(location_norm, 30)
-
-            # LOGIC FIX: Handle Past vs. Future Dates
-            if days_until_start < 0:
-                alerts.append({
-                    "type": "DATA_ERROR",
-                    "severity": "HIGH",
-                    "message": f"⚠️ Invalid Start Date: The date {candidate.start_date} is in the past. Please check the year."
-                })
-            elif days_until_start < needed_days:
-                sugg_date = (datetime.now() + timedelta(days=needed_days + 7)).strftime('%Y-%m-%d')
-                alerts.append({
-                    "type": "COMPLIANCE_RISK",
-                    "severity": "CRITICAL",
-                    "message": f"⚠️ Start Date Risk: {days_until_start} days is too short for {candidate.location_country} visa (avg {needed_days} days). Suggested Start: {sugg_date}"
-                })
+    def _facts(self, candidate: CandidateProfile, now: Optional[datetime] = None) -> Tuple[CountryRules, Dict]:
+        """
+        Everything the rules can test or print for one candidate,
+        plus the rule table for the hiring country.
+        """
+        now = now or datetime.now()
 
-        return alerts
+        # 1. Normalize Inputs
+        citizenship_norm = self._normalize_country(candidate.citizenship)
+        location_norm = self._normalize_country(candidate.location_country)
+        table, facts = self._facts_for_country(location_norm, now)
 
-    def check_wage_compliance(self, candidate: CandidateProfile) -> List[Dict]:
-        alerts = []
-        if not candidate.salary:
-            return alerts
+        # 2. Candidate facts
+        start_date = self._parse_date(candidate.start_date)
+        facts.update({
+            "citizenship": candidate.citizenship,
+            "location_country": candidate.location_country,
+            "citizenship_norm": citizenship_norm,
+            # Local hires and unknown countries never need a visa
+            "needs_visa": "unknown" not in (citizenship_norm, location_norm) and citizenship_norm != location_norm,
+            "salary": candidate.salary,
+            "currency": candidate.currency,
+            "start_date": candidate.start_date,
+            "days_until_start": (start_date - now).days if start_date else None,
+        })
+        return table, facts
 
-        # Normalize location to find the rule
-        location_norm = self._normalize_country(candidate.location_country)
-        rule = self.minimum_wages.get(location_norm)
-        
-        if rule:
-            # Check Amount
-            if candidate.salary < rule["amount"]:
-                alerts.append({
-                    "type": "COMPLIANCE_RISK",
-                    "severity": "HIGH",
-                    "message": f"📉 Low Salary Warning: {candidate.salary} is below the {location_norm.title()} minimum of {rule['amount']}."
-                })
+    def check_visa_requirements(self, candidate: CandidateProfile, now: Optional[datetime] = None) -> List[Dict]:
+        table, facts = self._facts(candidate, now)
+        return self.rules.evaluate(table, facts, category="visa")
 
-        return alerts
+    def check_wage_compliance(self, candidate: CandidateProfile, now: Optional[datetime] = None) -> List[Dict]:
+        table, facts = self._facts(candidate, now)
+        return self.rules.evaluate(table, facts, category="wage")
 
-    def analyze(self, candidate: CandidateProfile) -> Dict:
+    def analyze(self, candidate: CandidateProfile, now: Optional[datetime] = None) -> Dict:
         """
         Main entry point. Runs all checks and returns a summary.
         """
-        all_alerts = []
-        all_alerts.extend(self.check_visa_requirements(candidate))
-        all_alerts.extend(self.check_wage_compliance(candidate))
+        table, facts = self._facts(candidate, now)
+        all_alerts = self.rules.evaluate(table, facts)
         
         # Calculate Key Dates
         start_date = self._parse_date(candidate.start_date)
         key_dates = {}
         if start_date:
-            key_dates["probation_end"] = (start_date + timedelta(days=180)).strftime("%Y-%m-%d")
+            probation_days = table.params.get("probation_days", 180)
+            key_dates["probation_end"] = (start_date + timedelta(days=probation_days)).strftime("%Y-%m-%d")
         
         return {
             "alerts": all_alerts,
             "projected_dates": key_dates
-        }
\ No newline at end of file
+        }
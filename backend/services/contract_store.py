@@ -0,0 +1,229 @@
+import hashlib
+import os
+import re
+import secrets
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import quote
+from .expiry import ExpiryScheduler
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^A-Za-z0-9-]+")
+
+
+def ascii_filename(name: str, default: str = "contract.pdf") -> str:
+    """
+    'Contract_Zoë_O"Neil.pdf' -> 'Contract_Zoe_O_Neil.pdf'. Safe inside a quoted
+    header value or a ZIP entry: ASCII letters, digits, '_', '-' and one '.' before the extension.
+    """
+    ascii_name = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode("ascii")
+    stem, ext = os.path.splitext(ascii_name)
+    stem = _UNSAFE_FILENAME_RE.sub("_", stem).strip("_-")
+    ext = _UNSAFE_FILENAME_RE.sub("", ext)
+    if not stem:
+        return default
+    return f"{stem}.{ext}" if ext else stem
+
+
+def content_disposition(disposition: str, display_name: str) -> str:
+    """Header value with an ASCII filename plus the UTF-8 name for clients that support RFC 5987."""
+    # No control characters or path separators in what the client saves
+    display_name = "".join(ch for ch in display_name or ""
+                           if unicodedata.category(ch)[0] != "C" and ch not in "/\\")
+    fallback = ascii_filename(display_name)
+    header = f'{disposition}; filename="{fallback}"'
+    if display_name and display_name != fallback:
+        header += f"; filename*=UTF-8''{quote(display_name, safe='')}"
+    return header
+
+
+@dataclass
+class StoredContract:
+    id: str
+    filename: str               # ASCII (ascii_filename)
+    size: int
+    etag: str                   # quoted strong validator (sha256 of the bytes)
+    created_at: float
+    expires_at: float
+    path: Optional[str] = None  # set once the bytes live on disk
+    display_name: str = ""      # the name as given, may be any Unicode
+
+    @property
+    def url(self) -> str:
+        return f"/contracts/{self.id}"
+
+
+class ContractStore:
+    """
+    Generated PDFs, held in memory up to a byte budget and spilled to disk past it.
+    Least recently read documents are spilled first; documents larger than
+    spill_threshold go straight to disk. Everything expires after ttl_seconds.
+    """
+
+    def __init__(self, spill_dir: str, max_memory_bytes: int = 64 * 1024 * 1024,
+                 spill_threshold: int = 2 * 1024 * 1024, ttl_seconds: float = 3600,
+                 scheduler: Optional[ExpiryScheduler] = None):
+        self.spill_dir = spill_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_threshold = spill_threshold
+        self.ttl_seconds = ttl_seconds
+        # With a scheduler, expiry happens in the background; without one, put() sweeps inline
+        self.scheduler = scheduler
+        self._lock = threading.Lock()
+        self._entries: Dict[str, StoredContract] = {}        # creation order == expiry order
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()  # LRU order
+        self.memory_bytes = 0
+        self.stats = {"stored": 0, "spilled": 0, "expired": 0}
+
+        os.makedirs(spill_dir, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _spill(self, entry: StoredContract, data: bytes):
+        path = os.path.join(self.spill_dir, f"{entry.id}.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+        entry.path = path
+        self.stats["spilled"] += 1
+
+    def _drop(self, contract_id: str):
+        entry = self._entries.pop(contract_id, None)
+        data = self._memory.pop(contract_id, None)
+        if data is not None:
+            self.memory_bytes -= len(data)
+        if entry is not None and entry.path:
+            self._remove_file(entry.path)
+
+    def _expire(self, now: float):
+        # Same TTL for every entry, so the oldest entries are always the first to expire
+        while self._entries:
+            oldest = next(iter(self._entries.values()))
+            if oldest.expires_at > now:
+                break
+            self._drop(oldest.id)
+            self.stats["expired"] += 1
+
+    def put(self, data: bytes, filename: str) -> StoredContract:
+        now = time.time()
+        entry = StoredContract(
+            id=secrets.token_urlsafe(16),
+            filename=ascii_filename(filename),
+            display_name=filename,
+            size=len(data),
+            etag=f'"{hashlib.sha256(data).hexdigest()}"',
+            created_at=now,
+            expires_at=now + self.ttl_seconds,
+        )
+        if self.scheduler is not None:
+            self.scheduler.schedule(entry.expires_at, self.expire, entry.id)
+        with self._lock:
+            if self.scheduler is None:
+                self._expire(now)
+            self._entries[entry.id] = entry
+            self.stats["stored"] += 1
+            if len(data) > self.spill_threshold:
+                self._spill(entry, data)
+                return entry
+
+            self._memory[entry.id] = data
+            self.memory_bytes += len(data)
+            # Over budget: move the least recently read documents to disk
+            while self.memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+                old_id, old_data = self._memory.popitem(last=False)
+                self.memory_bytes -= len(old_data)
+                self._spill(self._entries[old_id], old_data)
+        return entry
+
+    def meta(self, contract_id: str) -> Optional[StoredContract]:
+        with self._lock:
+            entry = self._entries.get(contract_id)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                self._drop(contract_id)
+                self.stats["expired"] += 1
+                return None
+            return entry
+
+    def read(self, contract_id: str, start: int = 0, end: Optional[int] = None) -> Optional[bytes]:
+        """Bytes [start, end) of a document; disk entries only read that range."""
+        entry = self.meta(contract_id)
+        if entry is None:
+            return None
+        end = entry.size if end is None else min(end, entry.size)
+        with self._lock:
+            data = self._memory.get(contract_id)
+            if data is not None:
+                self._memory.move_to_end(contract_id)
+                return data[start:end]
+            path = entry.path
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                f.seek(start)
+                return f.read(max(0, end - start))
+        except OSError:
+            return None
+
+    def expire(self, contract_id: str):
+        """Drops the document if its TTL has passed (safe to call more than once)."""
+        with self._lock:
+            entry = self._entries.get(contract_id)
+            if entry is not None and entry.expires_at <= time.time():
+                self._drop(contract_id)
+                self.stats["expired"] += 1
+
+    def reconcile(self):
+        """
+        Full scan: sweeps expired entries and deletes spill files no entry points to
+        (e.g. left behind by a previous run). Holds the lock throughout, so a
+        put() can't spill a new file between the snapshot and the deletes.
+        """
+        with self._lock:
+            self._expire(time.time())
+            known = {e.path for e in self._entries.values() if e.path}
+            for name in os.listdir(self.spill_dir):
+                path = os.path.join(self.spill_dir, name)
+                if name.endswith(".pdf") and path not in known:
+                    self._remove_file(path)
+                    print(f"🗑️ Cleaned up orphaned contract: {name}")
+
+    def delete(self, contract_id: str):
+        with self._lock:
+            self._drop(contract_id)
+
+
+def parse_range(header: Optional[str], size: int):
+    """
+    Single-range 'bytes=' header -> (start, end) with end exclusive.
+    None = no usable range (serve the whole document); ValueError = unsatisfiable.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length <= 0:
+                raise ValueError(header)
+            return max(0, size - length), size
+        start = int(first)
+        end = int(last) + 1 if last else size
+    except ValueError:
+        raise ValueError(header)
+    if start >= size or end <= start:
+        raise ValueError(header)
+    return start, min(end, size)
@@ -0,0 +1,81 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+
+class ExpiryScheduler:
+    """
+    Min-heap of (expires_at, action). A background task pops whatever is due
+    on a timer, so request handlers only ever pay for a heap push.
+    A periodic reconciliation scan catches anything the heap doesn't know about
+    (files left by a previous run, entries scheduled before a restart).
+    """
+
+    def __init__(self, reconcile: Optional[Callable[[], None]] = None,
+                 interval: float = 30.0, reconcile_interval: float = 3600.0):
+        self.reconcile_fn = reconcile
+        self.interval = interval
+        self.reconcile_interval = reconcile_interval
+        self._heap: List[Tuple[float, int, Callable, tuple]] = []
+        self._seq = itertools.count()  # tie-breaker so actions are never compared
+        self._lock = threading.Lock()
+        self.stats = {"scheduled": 0, "expired": 0, "reconciles": 0, "errors": 0}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def schedule(self, expires_at: float, action: Callable, *args):
+        """Runs action(*args) once expires_at has passed. Actions must be idempotent."""
+        with self._lock:
+            heapq.heappush(self._heap, (expires_at, next(self._seq), action, args))
+            self.stats["scheduled"] += 1
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def run_due(self, now: Optional[float] = None) -> int:
+        """Runs every action that is due; returns how many ran."""
+        now = time.time() if now is None else now
+        ran = 0
+        while True:
+            with self._lock:
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, _, action, args = heapq.heappop(self._heap)
+            try:
+                action(*args)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Expiry action failed: {e!r}")
+            ran += 1
+        self.stats["expired"] += ran
+        return ran
+
+    def reconcile(self):
+        if self.reconcile_fn is None:
+            return
+        try:
+            self.reconcile_fn()
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"⚠️ Reconciliation scan failed: {e!r}")
+        self.stats["reconciles"] += 1
+
+    async def run(self):
+        """Background loop; started from the FastAPI lifespan. Reconciles first, then on a timer."""
+        next_reconcile = 0.0
+        while True:
+            now = time.time()
+            if now >= next_reconcile:
+                await asyncio.to_thread(self.reconcile)
+                next_reconcile = time.time() + self.reconcile_interval
+            if self.next_due() is not None and self.next_due() <= time.time():
+                await asyncio.to_thread(self.run_due)  # file deletes stay off the event loop
+            # Wake up for the next expiry, but never sleep past the regular interval
+            due = self.next_due()
+            delay = self.interval if due is None else min(self.interval, max(0.0, due - time.time()))
+            await asyncio.sleep(max(delay, 0.05))
@@ -0,0 +1,275 @@
+import calendar
+import re
+from datetime import date, timedelta
+from typing import List, NamedTuple, Optional
+from ..models.schemas import CandidateProfile
+from .jurisdictions import RESOLVER, JurisdictionResolver
+
+# Nationality adjectives -> canonical country (same keys as the jurisdiction registry)
+DEMONYMS = {
+    "emirati": "united arab emirates",
+    "british": "united kingdom",
+    "english": "united kingdom",
+    "german": "germany",
+}
+
+CURRENCY_CODES = ("AED", "USD", "EUR", "GBP", "CHF", "INR", "SGD", "CAD", "AUD", "JPY")
+CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP"}
+CURRENCY_WORDS = {"dirham": "AED", "dollar": "USD", "euro": "EUR", "pound": "GBP"}
+MULTIPLIERS = {"k": 1_000, "thousand": 1_000, "m": 1_000_000, "mn": 1_000_000, "million": 1_000_000}
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): i for i, name in enumerate(calendar.month_abbr) if name})
+MONTHS["sept"] = 9
+
+_NAME = r"[A-ZÀ-Ý][A-Za-zÀ-ÿ'’-]+(?:\s+[A-ZÀ-Ý][A-Za-zÀ-ÿ'’-]+){1,3}"
+_MONTH = r"(?:" + "|".join(sorted(MONTHS, key=len, reverse=True)) + r")\.?"
+
+# 1. Precompiled patterns for the house format and simple "Key: value" notes
+HIRE_RE = re.compile(
+    r"\b(?i:hire|hiring|onboard|onboarding|offer\s+to|bring\s+on)\s+(?P<name>" + _NAME + r")"
+    r"\s+(?i:as)\s+(?i:an?\s+|our\s+|the\s+|new\s+)?(?P<role>.+?)"
+    r"(?=\s+(?i:in|at|based|located|from|for|starting|starts|start|on|with|who|paid|earning)\b|\s*[,;.(]|\s*$)",
+)
+FIELD_RE = {
+    "name": re.compile(r"^\s*(?:name|candidate)\s*[:\-]\s*(?P<v>" + _NAME + r")\s*$", re.I | re.M),
+    "role": re.compile(r"^\s*(?:role|title|position|job title)\s*[:\-]\s*(?P<v>.+?)\s*$", re.I | re.M),
+    "location": re.compile(r"^\s*(?:location|country|city|based in|office)\s*[:\-]\s*(?P<v>.+?)\s*$", re.I | re.M),
+    "citizenship": re.compile(r"^\s*(?:citizenship|nationality|passport)\s*[:\-]\s*(?P<v>.+?)\s*$", re.I | re.M),
+}
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+SALARY_RE = re.compile(
+    r"(?P<sym>[$€£])?\s?(?P<code1>\b(?:" + "|".join(CURRENCY_CODES) + r")\s?)?"
+    r"(?P<amount>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s?"
+    r"(?P<mult>k|thousand|mn|m|million)?\b\s?"
+    r"(?P<code2>(?:" + "|".join(CURRENCY_CODES) + r")\b|(?:dirham|dollar|euro|pound)s?\b)?",
+    re.I,
+)
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+MONTH_DAY_RE = re.compile(r"\b(?P<month>" + _MONTH + r")\s+(?P<day>\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(?P<year>\d{4}))?\b", re.I)
+DAY_MONTH_RE = re.compile(r"\b(?P<day>\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<month>" + _MONTH + r")(?:,?\s+(?P<year>\d{4}))?\b", re.I)
+RELATIVE_RE = re.compile(
+    r"\b(?:(?P<simple>today|tomorrow|asap|immediately)"
+    r"|next\s+(?P<unit>week|month|year)"
+    r"|(?:next\s+|this\s+|on\s+)?(?P<weekday>" + "|".join(WEEKDAYS) + r")"
+    r"|in\s+(?P<n>\d+)\s+(?P<n_unit>days?|weeks?|months?))\b",
+    re.I,
+)
+DATE_HINT_RE = re.compile(r"\b(?:start|starts|starting|joining|joins|commence|commencing|from)\b", re.I)
+CITIZEN_HINT_RE = re.compile(r"\b(?:citizen|citizenship|national|nationality|passport)\b", re.I)
+# Citizenship words directly after ("UK citizen") or before ("citizen of Germany") a place
+CITIZEN_AFTER_RE = re.compile(r"[\s-]*(?:citizen|national|passport)", re.I)
+CITIZEN_BEFORE_RE = re.compile(r"(?:citizen\s+of|citizenship|nationality|passport)\W*$", re.I)
+EQUITY_RE = re.compile(r"\b(?:equity|stock\s+options?|rsus?|esop|shares)\b", re.I)
+NO_EQUITY_RE = re.compile(r"\b(?:no|without)\s+(?:equity|stock\s+options?|rsus?|esop|shares)\b", re.I)
+
+JOB_FAMILY_PATTERNS = [
+    ("Executive", re.compile(r"\b(?:c[etfoim]o|chief|vp|vice\s+president|director|head\s+of|president)\b", re.I)),
+    ("Sales", re.compile(r"\b(?:sales|business\s+development|bdr?|sdr|account\s+(?:exec(?:utive)?|manager))\b", re.I)),
+    ("Engineering", re.compile(r"\b(?:engineer\w*|developer|dev\w*|qa|product|data|software|sre|architect)\b", re.I)),
+]
+
+
+class FastPathResult(NamedTuple):
+    candidate: Optional[CandidateProfile]
+    confidence: float
+    missing: List[str]
+
+
+def _add_months(d: date, months: int) -> date:
+    month_index = d.month - 1 + months
+    year, month = d.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(d.day, calendar.monthrange(year, month)[1]))
+
+
+def resolve_start_date(text: str, today: date) -> Optional[date]:
+    """
+    Resolves the first absolute or relative date in the text.
+    "next month" means the 1st of next month; dates without a year roll forward.
+    """
+    m = ISO_DATE_RE.search(text)
+    if m:
+        try:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            return None
+
+    for pattern in (MONTH_DAY_RE, DAY_MONTH_RE):
+        m = pattern.search(text)
+        if m:
+            month = MONTHS[m.group("month").lower().rstrip(".")]
+            try:
+                if m.group("year"):
+                    return date(int(m.group("year")), month, int(m.group("day")))
+                candidate = date(today.year, month, int(m.group("day")))
+                return candidate if candidate >= today else date(today.year + 1, month, int(m.group("day")))
+            except ValueError:
+                return None
+
+    m = RELATIVE_RE.search(text)
+    if not m:
+        return None
+    if m.group("simple"):
+        return today + timedelta(days=1) if m.group("simple").lower() == "tomorrow" else today
+    if m.group("unit"):
+        unit = m.group("unit").lower()
+        if unit == "week":
+            return today + timedelta(days=7 - today.weekday())  # next Monday
+        if unit == "month":
+            return _add_months(today.replace(day=1), 1)
+        return date(today.year + 1, 1, 1)
+    if m.group("weekday"):
+        delta = (WEEKDAYS.index(m.group("weekday").lower()) - today.weekday()) % 7
+        return today + timedelta(days=delta or 7)
+    n, unit = int(m.group("n")), m.group("n_unit").lower()
+    if unit.startswith("day"):
+        return today + timedelta(days=n)
+    if unit.startswith("week"):
+        return today + timedelta(weeks=n)
+    return _add_months(today, n)
+
+
+class RuleBasedExtractor:
+    """
+    Deterministic extractor for well-formed input, tried before the LLM.
+    Returns a candidate only when every required field is present and unambiguous.
+    """
+
+    REQUIRED_FIELDS = ("name", "role", "location_country")
+
+    def __init__(self, resolver: JurisdictionResolver = RESOLVER, min_confidence: float = 0.7):
+        self.resolver = resolver
+        self.min_confidence = min_confidence
+        self.stats = {"attempts": 0, "hits": 0}
+
+        # 2. Gazetteer: registry aliases (canonical names included) + demonyms -> canonical country
+        gazetteer = dict(resolver.aliases)
+        gazetteer.update(DEMONYMS)
+        self.gazetteer = gazetteer
+
+        # Short codes ("UK", "UAE", "DE") only count when written in capitals
+        long_aliases = sorted((a for a in gazetteer if len(a) > 3), key=len, reverse=True)
+        short_aliases = sorted((a for a in gazetteer if len(a) <= 3), key=len, reverse=True)
+        self._place_re = re.compile(r"(?<!\w)(" + "|".join(re.escape(a) for a in long_aliases) + r")(?!\w)", re.I)
+        self._code_re = re.compile(r"(?<!\w)(" + "|".join(re.escape(a.upper()) for a in short_aliases) + r")(?!\w)")
+
+    @property
+    def hit_rate(self) -> float:
+        return self.stats["hits"] / self.stats["attempts"] if self.stats["attempts"] else 0.0
+
+    def _places(self, text: str) -> List[tuple]:
+        """All gazetteer matches as (start, end, canonical_country)."""
+        found = [(m.start(), m.end(), self.gazetteer[m.group(1).lower()]) for m in self._place_re.finditer(text)]
+        found += [(m.start(), m.end(), self.gazetteer[m.group(1).lower()]) for m in self._code_re.finditer(text)]
+        return sorted(found)
+
+    def _lookup_place(self, value: str) -> Optional[str]:
+        places = {canon for _, _, canon in self._places(value)}
+        return places.pop() if len(places) == 1 else None
+
+    def _parse_salary(self, text: str):
+        """Returns (amount, currency) for the first amount that carries a currency."""
+        for m in SALARY_RE.finditer(text):
+            currency = None
+            if m.group("sym"):
+                currency = CURRENCY_SYMBOLS[m.group("sym")]
+            code = (m.group("code1") or m.group("code2") or "").strip()
+            if code:
+                currency = CURRENCY_WORDS.get(code.lower().rstrip("s"), code.upper())
+            if not currency:
+                continue
+            amount = float(m.group("amount").replace(",", ""))
+            amount *= MULTIPLIERS.get((m.group("mult") or "").lower(), 1)
+            return amount, currency
+        return None, None
+
+    def _display_name(self, country: str) -> str:
+        record = self.resolver.by_country.get(country)
+        return record.display_name if record else country.title()
+
+    def _job_family(self, role: str) -> str:
+        for family, pattern in JOB_FAMILY_PATTERNS:
+            if pattern.search(role):
+                return family
+        return "General"
+
+    def extract(self, raw_text: str, today: Optional[date] = None) -> FastPathResult:
+        self.stats["attempts"] += 1
+        today = today or date.today()
+        text = raw_text or ""
+        ambiguous = []
+
+        # 3. Name + Role
+        name = role = None
+        m = HIRE_RE.search(text)
+        if m:
+            name, role = m.group("name").strip(), m.group("role").strip()
+        fm = FIELD_RE["name"].search(text)
+        name = name or (fm and fm.group("v").strip())
+        fm = FIELD_RE["role"].search(text)
+        role = role or (fm and fm.group("v").strip())
+
+        # 4. Location vs Citizenship (gazetteer hits, split by nearby citizenship words)
+        location = citizenship = None
+        fm = FIELD_RE["citizenship"].search(text)
+        if fm:
+            citizenship = self._lookup_place(fm.group("v"))
+        fm = FIELD_RE["location"].search(text)
+        if fm:
+            location = self._lookup_place(fm.group("v"))
+
+        locations, citizenships = set(), set()
+        for start, end, canon in self._places(text):
+            if CITIZEN_AFTER_RE.match(text, end) or CITIZEN_BEFORE_RE.search(text[max(0, start - 25):start]):
+                citizenships.add(canon)
+            else:
+                locations.add(canon)
+        if location is None:
+            if len(locations) == 1:
+                location = locations.pop()
+            elif len(locations) > 1:
+                ambiguous.append("location_country")
+        if citizenship is None:
+            if len(citizenships) == 1:
+                citizenship = citizenships.pop()
+            elif citizenships or CITIZEN_HINT_RE.search(text):
+                ambiguous.append("citizenship")
+
+        # 5. Salary / Currency
+        salary, currency = self._parse_salary(text)
+        if salary is None and re.search(r"\b(?:salary|paid|pay|earning|comp(?:ensation)?)\b", text, re.I):
+            ambiguous.append("salary")
+
+        # 6. Start Date
+        start = resolve_start_date(text, today)
+        if start is None and DATE_HINT_RE.search(text) and re.search(r"\d|" + _MONTH, text, re.I):
+            ambiguous.append("start_date")
+
+        fields = {"name": name, "role": role, "location_country": location}
+        missing = [f for f in self.REQUIRED_FIELDS if not fields[f] and f not in ambiguous]
+
+        confidence = 1.0
+        confidence -= 0.25 * len(missing)
+        confidence -= 0.3 * len(ambiguous)
+        confidence -= 0.1 * (salary is None)
+        confidence = max(0.0, round(confidence, 2))
+
+        if missing or ambiguous or confidence < self.min_confidence:
+            return FastPathResult(None, confidence, missing + ambiguous)
+
+        email = EMAIL_RE.search(text)
+        candidate = CandidateProfile(
+            name=name,
+            role=role,
+            job_family=self._job_family(role),
+            email=email.group(0) if email else None,
+            salary=salary or 0.0,
+            currency=currency or "USD",
+            start_date=start.strftime("%Y-%m-%d") if start else None,
+            location_country=self._display_name(location),
+            citizenship=self._display_name(citizenship) if citizenship else None,
+            equity_grant=bool(EQUITY_RE.search(text)) and not NO_EQUITY_RE.search(text),
+        )
+        self.stats["hits"] += 1
+        return FastPathResult(candidate, confidence, [])
@@ -0,0 +1,296 @@
+import asyncio
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+import httpx
+
+# Pipeline stages in the order a job reports them
+STAGES = ("extraction", "jurisdiction", "contract", "compliance")
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+# pipeline(raw_text, on_stage) -> final result dict; on_stage(stage, partial_result) is awaited after each stage
+Pipeline = Callable[[str, Callable[[str, dict], Awaitable[None]]], Awaitable[dict]]
+
+
+class JobStore:
+    """
+    Onboarding jobs in a local SQLite file (WAL), so queued and half-finished
+    jobs survive a restart. Thread-safe; every call is a short transaction.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, raw_text TEXT NOT NULL,"
+                " callback_url TEXT, stages TEXT NOT NULL, result TEXT NOT NULL,"
+                " error TEXT, callback TEXT, attempts INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+            self._db.commit()
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        return {
+            "job_id": row["id"],
+            "status": row["status"],
+            "stages": json.loads(row["stages"]),
+            "result": json.loads(row["result"]),
+            "error": row["error"],
+            "callback": row["callback"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+    def create(self, raw_text: str, callback_url: Optional[str] = None) -> dict:
+        now = time.time()
+        job_id = secrets.token_urlsafe(12)
+        stages = json.dumps({stage: "pending" for stage in STAGES})
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, raw_text, callback_url, stages, result, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, '{}', ?, ?)",
+                (job_id, QUEUED, raw_text, callback_url, stages, now, now),
+            )
+            self._db.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def claim(self, job_id: str) -> Optional[sqlite3.Row]:
+        """queued -> running; None if another worker got there first (or the job is gone)."""
+        with self._lock:
+            cur = self._db.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, time.time(), job_id, QUEUED),
+            )
+            self._db.commit()
+            if cur.rowcount == 0:
+                return None
+            return self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+
+    def record_stage(self, job_id: str, stage: str, partial: dict):
+        with self._lock:
+            row = self._db.execute("SELECT stages, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            stages, result = json.loads(row["stages"]), json.loads(row["result"])
+            stages[stage] = DONE
+            result.update(partial)
+            self._db.execute(
+                "UPDATE jobs SET stages = ?, result = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(stages), json.dumps(result), time.time(), job_id),
+            )
+            self._db.commit()
+
+    def finish(self, job_id: str, result: Optional[dict] = None, error: Optional[str] = None):
+        with self._lock:
+            if error is None:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, result = ?, updated_at = ? WHERE id = ?",
+                    (DONE, json.dumps(result or {}), time.time(), job_id),
+                )
+            else:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                    (FAILED, error, time.time(), job_id),
+                )
+            self._db.commit()
+
+    def set_callback(self, job_id: str, outcome: str):
+        with self._lock:
+            self._db.execute("UPDATE jobs SET callback = ? WHERE id = ?", (outcome, job_id))
+            self._db.commit()
+
+    def recover(self) -> List[str]:
+        """
+        After a restart: jobs that were running start over (their worker died with
+        the process). Returns every queued job id, oldest first.
+        """
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, stages = ?, result = '{}' WHERE status = ?",
+                (QUEUED, json.dumps({stage: "pending" for stage in STAGES}), RUNNING),
+            )
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at", (QUEUED,)).fetchall()
+        return [row["id"] for row in rows]
+
+    def prune(self, older_than: float) -> int:
+        """Drops finished jobs last updated before the cutoff."""
+        with self._lock:
+            cur = self._db.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, older_than))
+            self._db.commit()
+        return cur.rowcount
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+async def resolve_host(host: str, port: int) -> List[str]:
+    """Every address the callback host resolves to."""
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+async def check_callback_url(url: str) -> str:
+    """
+    Raises ValueError unless url is http(s) and its host only resolves to public
+    addresses, so a callback can't be pointed at the server's own network.
+    Returns the checked address the callback should connect to.
+    """
+    parsed = httpx.URL(url)
+    if parsed.scheme not in ("http", "https") or not parsed.host:
+        raise ValueError(f"unsupported callback URL {url!r}")
+    addresses = await resolve_host(parsed.host, parsed.port or (443 if parsed.scheme == "https" else 80))
+    if not addresses:
+        raise ValueError(f"callback host {parsed.host} does not resolve")
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise ValueError(f"callback host {parsed.host} resolves to non-public address {address}")
+    return addresses[0]
+
+
+class JobQueue:
+    """
+    Runs onboarding jobs on a fixed number of asyncio workers (started from the
+    lifespan). The SQLite store is the source of truth; the in-memory queue only
+    carries ids, and is refilled from the store on startup.
+    """
+
+    def __init__(self, store: JobStore, pipeline: Pipeline, workers: int = 4,
+                 callback_timeout: float = 10.0, retention_seconds: float = 7 * 24 * 3600,
+                 allow_private_callbacks: bool = False, prune_interval: float = 3600.0):
+        self.store = store
+        self.pipeline = pipeline
+        self.workers = max(1, workers)
+        self.callback_timeout = callback_timeout
+        self.allow_private_callbacks = allow_private_callbacks
+        self.retention_seconds = retention_seconds
+        self.prune_interval = prune_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.running = 0
+
+    async def check_callback(self, url: str) -> Optional[str]:
+        """check_callback_url, unless private callbacks are allowed (then None: connect as usual)."""
+        if self.allow_private_callbacks:
+            return None
+        return await check_callback_url(url)
+
+    def submit(self, raw_text: str, callback_url: Optional[str] = None) -> dict:
+        job = self.store.create(raw_text, callback_url)
+        # Without running workers (e.g. before startup) the job just waits in the store
+        if self._queue is not None:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, job["job_id"])
+        return job
+
+    async def run(self):
+        """
+        Background task: recovers queued jobs, then keeps the workers busy (and
+        prunes expired jobs every prune_interval) until cancelled.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        pending = await asyncio.to_thread(self.store.recover)
+        if pending:
+            print(f"📋 Job queue: resuming {len(pending)} jobs")
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+
+        tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        tasks.append(asyncio.create_task(self._prune_loop()))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._queue = None
+
+    async def _prune_loop(self):
+        while True:
+            try:
+                pruned = await asyncio.to_thread(self.store.prune, time.time() - self.retention_seconds)
+                if pruned:
+                    print(f"🧹 Job queue: pruned {pruned} old jobs")
+            except Exception as e:
+                print(f"⚠️ Job prune failed: {e!r}")
+            await asyncio.sleep(self.prune_interval)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self.process(job_id)
+            except Exception as e:
+                print(f"❌ Job {job_id} crashed the worker loop: {e!r}")
+
+    async def process(self, job_id: str):
+        row = await asyncio.to_thread(self.store.claim, job_id)
+        if row is None:
+            return
+
+        async def on_stage(stage: str, partial: dict):
+            await asyncio.to_thread(self.store.record_stage, job_id, stage, partial)
+
+        self.running += 1
+        try:
+            result = await self.pipeline(row["raw_text"], on_stage)
+            await asyncio.to_thread(self.store.finish, job_id, result)
+            print(f"✅ Job {job_id} done")
+        except Exception as e:
+            print(f"❌ Job {job_id} failed: {e!r}")
+            await asyncio.to_thread(self.store.finish, job_id, None, str(e) or repr(e))
+        finally:
+            self.running -= 1
+
+        if row["callback_url"]:
+            await self.notify(job_id, row["callback_url"])
+
+    async def notify(self, job_id: str, url: str):
+        """POSTs the final job status to the callback URL (one attempt, outcome recorded on the job)."""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        try:
+            address = await self.check_callback(url)
+            target, headers, extensions = url, {}, {}
+            if address is not None:
+                # Connect to the address we just checked, not whatever a second lookup returns
+                # (DNS rebinding); Host and TLS SNI/certificate checks still use the real name
+                parsed = httpx.URL(url)
+                target = parsed.copy_with(host=address.split("%")[0])
+                headers["Host"] = parsed.netloc.decode("ascii")
+                if parsed.scheme == "https":
+                    extensions["sni_hostname"] = parsed.host
+            # No redirects: a public host could otherwise bounce the POST to an internal one
+            async with httpx.AsyncClient(timeout=self.callback_timeout, follow_redirects=False) as http:
+                response = await http.post(target, json=job, headers=headers, extensions=extensions)
+            outcome = f"delivered ({response.status_code})"
+        except Exception as e:
+            # Any failure (bad URL, refused host, network) is recorded; cancellation still propagates
+            outcome = f"failed: {e!r}"
+            print(f"⚠️ Callback for job {job_id} failed: {e!r}")
+        await asyncio.to_thread(self.store.set_callback, job_id, outcome)
@@ -0,0 +1,162 @@
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Jurisdiction:
+    """
+    Everything the services need to know about one hiring location.
+    Wage floors and visa lead times live in the compliance rules (backend/rules).
+    """
+    country: str                     # canonical lowercase key, e.g. "united arab emirates"
+    display_name: str                # what we show / store on the candidate, e.g. "UAE"
+    label: str                       # legal framework shown on the contract
+    template_file: str               # markdown template under backend/templates
+    aliases: Tuple[str, ...] = ()
+
+
+# 1. The Registry (add a jurisdiction here and every service picks it up)
+JURISDICTIONS = (
+    Jurisdiction(
+        country="united arab emirates", display_name="UAE",
+        label="DIFC Employment Law (UAE)", template_file="uae_labor.md",
+        aliases=("uae", "u.a.e.", "dubai", "difc", "emirates", "abu dhabi", "abudhabi"),
+    ),
+    Jurisdiction(
+        country="united kingdom", display_name="United Kingdom",
+        label="Employment Rights Act 1996 (UK)", template_file="uk_employment.md",
+        aliases=("uk", "britain", "great britain", "london", "england", "scotland"),
+    ),
+    Jurisdiction(
+        country="germany", display_name="Germany",
+        label="German Civil Code (BGB)", template_file="german_employment.md",
+        aliases=("de", "deutschland", "berlin", "munich", "frankfurt"),
+    ),
+)
+
+DEFAULT_JURISDICTION = Jurisdiction(
+    country="unknown", display_name="Unknown",
+    label="General International Contractor Agreement", template_file="contractor_agreement.md",
+)
+
+# Aliases this short ("de", "uk") only count when they are the whole input,
+# so "Rio de Janeiro" doesn't resolve to Germany.
+MIN_EMBEDDED_ALIAS_LEN = 3
+
+
+class AhoCorasick:
+    """
+    Multi-pattern matcher: finds every pattern occurrence in one pass over the text.
+    Patterns are matched case-insensitively on whole words.
+    """
+
+    def __init__(self, patterns: Dict[str, object]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, object]]] = [[]]  # (pattern length, value)
+
+        for pattern, value in patterns.items():
+            node = 0
+            for ch in pattern.lower():
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(pattern), value))
+
+        # Breadth-first pass to wire up failure links (depth-1 nodes fail to the root)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0) if node else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def search(self, text: str) -> List[Tuple[int, int, object]]:
+        """All whole-word matches as (start, end, value)."""
+        text = text.lower()
+        matches = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._out[node]:
+                start, end = i - length + 1, i + 1
+                if (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum()):
+                    matches.append((start, end, value))
+        return matches
+
+
+class JurisdictionResolver:
+    """
+    Resolves free-text locations ("Dubai", "London, UK") to a Jurisdiction
+    record with one automaton pass, compiled once at startup.
+    """
+
+    def __init__(self, jurisdictions: Iterable[Jurisdiction] = JURISDICTIONS,
+                 default: Jurisdiction = DEFAULT_JURISDICTION):
+        self.jurisdictions = tuple(jurisdictions)
+        self.default = default
+        self.by_country = {j.country: j for j in self.jurisdictions}
+        self.by_label = {j.label.lower(): j for j in self.jurisdictions}
+        self.by_label[default.label.lower()] = default
+
+        # alias -> canonical country, canonical names included
+        self.aliases: Dict[str, str] = {}
+        for j in self.jurisdictions:
+            self.aliases[j.country] = j.country
+            for alias in j.aliases:
+                self.aliases[alias.lower()] = j.country
+
+        self._automaton = AhoCorasick({
+            alias: country for alias, country in self.aliases.items()
+            if len(alias) >= MIN_EMBEDDED_ALIAS_LEN
+        })
+
+    def _match_country(self, text: str) -> Optional[str]:
+        cleaned = text.lower().strip()
+        exact = self.aliases.get(cleaned)
+        if exact:
+            return exact
+        matches = self._automaton.search(cleaned)
+        if not matches:
+            return None
+        # Leftmost, then longest match wins
+        start, end, country = min(matches, key=lambda m: (m[0], -(m[1] - m[0])))
+        return country
+
+    def resolve(self, location: Optional[str]) -> Jurisdiction:
+        """Location text -> Jurisdiction (the default contractor record if unknown)."""
+        if not location:
+            return self.default
+        country = self._match_country(location)
+        return self.by_country[country] if country else self.default
+
+    def normalize_country(self, name: Optional[str]) -> str:
+        """
+        'UAE', 'Dubai', 'U.A.E.' -> 'united arab emirates'.
+        Unknown countries come back lowercased so they can still be compared.
+        """
+        if not name:
+            return "unknown"
+        return self._match_country(name) or name.lower().strip()
+
+    def from_label(self, label: Optional[str]) -> Jurisdiction:
+        """Jurisdiction label (as returned by AIService) -> record."""
+        if not label:
+            return self.default
+        return self.by_label.get(label.lower().strip()) or self.resolve(label)
+
+
+# Shared instance, compiled once at import
+RESOLVER = JurisdictionResolver()
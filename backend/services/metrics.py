@@ -0,0 +1,220 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels + extra]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(labels: dict) -> Tuple[Tuple[str, str], ...]:
+        return tuple(sorted(labels.items()))
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_label_str(k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    """A gauge that is either set directly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, fn: Optional[Callable[[], float]] = None):
+        super().__init__(name, help_text)
+        self.fn = fn
+        self._values: Dict[tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        if self.fn is not None:
+            return float(self.fn())
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        if self.fn is not None:
+            try:
+                items = [((), float(self.fn()))]
+            except Exception:
+                items = []
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [f"{self.name}{_label_str(k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, list] = {}  # key -> [bucket_counts, sum, count]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._series.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_label_str(key, (('le', _fmt(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_str(key)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_label_str(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str, fn: Optional[Callable[[], float]] = None) -> Gauge:
+        gauge = self._register(Gauge(name, help_text, fn))
+        if fn is not None:
+            gauge.fn = fn  # re-registration rebinds the callback
+        return gauge
+
+    def histogram(self, name: str, help_text: str, buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry and the metrics shared across services
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "onboarding_stage_seconds", "Time spent in each onboarding pipeline stage")
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "llm_request_seconds", "Wall-clock time of Ollama chat calls")
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "Ollama chat calls by purpose and outcome")
+LLM_PROMPT_TOKENS = REGISTRY.counter(
+    "llm_prompt_tokens_total", "Prompt tokens evaluated (prompt_eval_count)")
+LLM_COMPLETION_TOKENS = REGISTRY.counter(
+    "llm_completion_tokens_total", "Tokens generated (eval_count)")
+LLM_EVAL_SECONDS = REGISTRY.counter(
+    "llm_eval_seconds_total", "Generation time reported by Ollama (eval_duration)")
+LLM_PROMPT_EVAL_SECONDS = REGISTRY.counter(
+    "llm_prompt_eval_seconds_total", "Prompt evaluation time reported by Ollama (prompt_eval_duration)")
+LLM_LOAD_SECONDS = REGISTRY.counter(
+    "llm_load_seconds_total", "Model load time reported by Ollama (load_duration)")
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    "llm_in_flight", "Ollama chat calls currently in flight")
+
+
+def record_llm_usage(response, purpose: str):
+    """Adds the token/timing fields of an Ollama response to the LLM counters."""
+    def number(field):
+        value = getattr(response, field, None)
+        return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+    if number("prompt_eval_count") is not None:
+        LLM_PROMPT_TOKENS.inc(number("prompt_eval_count"), purpose=purpose)
+    if number("eval_count") is not None:
+        LLM_COMPLETION_TOKENS.inc(number("eval_count"), purpose=purpose)
+    if number("eval_duration") is not None:
+        LLM_EVAL_SECONDS.inc(number("eval_duration") / 1e9, purpose=purpose)
+    if number("prompt_eval_duration") is not None:
+        LLM_PROMPT_EVAL_SECONDS.inc(number("prompt_eval_duration") / 1e9, purpose=purpose)
+    if number("load_duration") is not None:
+        LLM_LOAD_SECONDS.inc(number("load_duration") / 1e9, purpose=purpose)
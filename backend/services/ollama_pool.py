@@ -0,0 +1,287 @@
+import asyncio
+import threading
+import time
+from typing import List, Optional
+import httpx
+from ollama import Client, AsyncClient
+
+
+class NoHealthyHostError(RuntimeError):
+    """Raised when every Ollama host is down or has its circuit open."""
+
+
+def normalize_host(host: str) -> str:
+    """'10.0.0.5' -> 'http://10.0.0.5:11434'"""
+    host = host.strip().rstrip("/")
+    if "://" not in host:
+        host = f"http://{host}"
+    if host.count(":") < 2:
+        host = f"{host}:11434"
+    return host
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker.
+    CLOSED: requests flow. OPEN: host skipped until reset_timeout passes.
+    HALF_OPEN: one trial request; success closes, failure re-opens.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def would_allow(self) -> bool:
+        """Like allow(), but without claiming the half-open trial slot."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        return not self._trial_in_flight
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """The half-open trial ended without a verdict (caller cancelled): let the next request try."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class OllamaEndpoint:
+    def __init__(self, host: str, timeout: httpx.Timeout, breaker: CircuitBreaker):
+        self.host = host
+        self.client = Client(host=host, timeout=timeout)
+        self.async_client = AsyncClient(host=host, timeout=timeout)
+        self.breaker = breaker
+        self.healthy = True  # optimistic until the first probe says otherwise
+        self.outstanding = 0
+        self.total_requests = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def available(self) -> bool:
+        return self.healthy and self.breaker.would_allow()
+
+    def snapshot(self) -> dict:
+        return {
+            "host": self.host,
+            "healthy": self.healthy,
+            "circuit": self.breaker.state,
+            "outstanding": self.outstanding,
+            "total_requests": self.total_requests,
+            "last_error": self.last_error,
+        }
+
+
+class OllamaPool:
+    """
+    A set of Ollama hosts behind least-outstanding-requests balancing.
+    Each host has a circuit breaker; failed calls fail over to the next host.
+    """
+
+    def __init__(self, hosts: List[str], timeout: float = 60.0, connect_timeout: float = 2.0,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0, probe_interval: float = 15.0):
+        if not hosts:
+            raise ValueError("OllamaPool needs at least one host")
+        http_timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        # Per-host deadline for a whole call (or the gap between streamed chunks).
+        # Hitting it is a host failure; callers should give up later than this.
+        self.request_timeout = timeout
+        self.endpoints = [
+            OllamaEndpoint(normalize_host(h), http_timeout, CircuitBreaker(failure_threshold, reset_timeout))
+            for h in dict.fromkeys(hosts)
+        ]
+        self.connect_timeout = connect_timeout
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+
+    @property
+    def hosts(self) -> List[str]:
+        return [e.host for e in self.endpoints]
+
+    @property
+    def outstanding(self) -> int:
+        return sum(e.outstanding for e in self.endpoints)
+
+    def _ranked(self) -> List[OllamaEndpoint]:
+        """Available hosts, least busy first (ties go to the least used)."""
+        ranked = sorted(
+            (e for e in self.endpoints if e.available),
+            key=lambda e: (e.outstanding, e.total_requests),
+        )
+        if not ranked:
+            raise NoHealthyHostError(f"No healthy Ollama host among {self.hosts}")
+        return ranked
+
+    def _acquire(self, endpoint: OllamaEndpoint) -> bool:
+        if not endpoint.breaker.allow():
+            return False
+        with self._lock:
+            endpoint.outstanding += 1
+            endpoint.total_requests += 1
+        return True
+
+    def _release(self, endpoint: OllamaEndpoint, error: Optional[BaseException] = None):
+        with self._lock:
+            endpoint.outstanding -= 1
+        if error is None:
+            endpoint.breaker.record_success()
+        elif not isinstance(error, Exception):
+            # Cancelled or abandoned by the caller (e.g. a client closed the chat):
+            # says nothing about the host, but must not keep the half-open trial slot
+            endpoint.breaker.release_trial()
+        else:
+            # Includes our own request_timeout, so a hung host does trip its breaker
+            endpoint.last_error = repr(error)
+            endpoint.breaker.record_failure()
+            print(f"⚠️ Ollama host {endpoint.host} failed: {error!r}")
+
+    def chat(self, **kwargs):
+        """Blocking chat with failover across hosts."""
+        last_error = None
+        for endpoint in self._ranked():
+            if not self._acquire(endpoint):
+                continue
+            try:
+                response = endpoint.client.chat(**kwargs)
+            except Exception as e:
+                self._release(endpoint, e)
+                last_error = e
+                continue
+            self._release(endpoint)
+            return response
+        raise last_error or NoHealthyHostError(f"No healthy Ollama host among {self.hosts}")
+
+    async def achat(self, **kwargs):
+        """Async chat with failover across hosts."""
+        last_error = None
+        for endpoint in self._ranked():
+            if not self._acquire(endpoint):
+                continue
+            try:
+                response = await asyncio.wait_for(endpoint.async_client.chat(**kwargs), self.request_timeout)
+            except BaseException as e:
+                self._release(endpoint, e)
+                if not isinstance(e, Exception):
+                    raise  # cancellation: don't fail over
+                last_error = e
+                continue
+            self._release(endpoint)
+            return response
+        raise last_error or NoHealthyHostError(f"No healthy Ollama host among {self.hosts}")
+
+    async def astream(self, **kwargs):
+        """
+        Streaming chat. Fails over only until the first chunk arrives;
+        after that the host is committed to the answer.
+        """
+        last_error = None
+        for endpoint in self._ranked():
+            if not self._acquire(endpoint):
+                continue
+            started = False
+            try:
+                stream = await asyncio.wait_for(endpoint.async_client.chat(stream=True, **kwargs),
+                                                self.request_timeout)
+                iterator = stream.__aiter__()
+                while True:
+                    try:
+                        part = await asyncio.wait_for(iterator.__anext__(), self.request_timeout)
+                    except StopAsyncIteration:
+                        break
+                    started = True
+                    yield part
+            except BaseException as e:
+                self._release(endpoint, e)
+                if started or not isinstance(e, Exception):
+                    raise
+                last_error = e
+                continue
+            self._release(endpoint)
+            return
+        raise last_error or NoHealthyHostError(f"No healthy Ollama host among {self.hosts}")
+
+    async def probe(self, endpoint: OllamaEndpoint) -> bool:
+        """Marks the host healthy if it answers /api/version quickly."""
+        try:
+            async with httpx.AsyncClient(timeout=self.connect_timeout) as http:
+                response = await http.get(f"{endpoint.host}/api/version")
+                response.raise_for_status()
+        except Exception as e:
+            if endpoint.healthy:
+                print(f"🩺 Ollama host {endpoint.host} is DOWN: {e!r}")
+            endpoint.healthy = False
+            endpoint.last_error = repr(e)
+            return False
+
+        # Only liveness here: /api/version answering says nothing about chat calls,
+        # so an open breaker still goes through its own half-open trial
+        if not endpoint.healthy:
+            print(f"🩺 Ollama host {endpoint.host} is back UP")
+        endpoint.healthy = True
+        return True
+
+    async def probe_all(self):
+        await asyncio.gather(*(self.probe(e) for e in self.endpoints))
+
+    async def run_health_checks(self):
+        """Background loop; started from the FastAPI lifespan."""
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.probe_interval)
+
+    def snapshot(self) -> List[dict]:
+        return [e.snapshot() for e in self.endpoints]
+
+
+class PooledClient:
+    """Drop-in for ollama.Client whose chat() goes through the pool."""
+
+    def __init__(self, pool: OllamaPool):
+        self.pool = pool
+
+    def chat(self, **kwargs):
+        return self.pool.chat(**kwargs)
+
+
+class AsyncPooledClient:
+    """Drop-in for ollama.AsyncClient whose chat() goes through the pool."""
+
+    def __init__(self, pool: OllamaPool):
+        self.pool = pool
+
+    async def chat(self, stream: bool = False, **kwargs):
+        if stream:
+            return self.pool.astream(**kwargs)
+        return await self.pool.achat(**kwargs)
@@ -0,0 +1,269 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from fpdf import FPDF
+
+from .cache import LRUCache
+from .templates import BLANK, H1, H2, CompiledTemplate, TemplateCache
+
+# Placeholders generate_contract fills; anything else makes a template render as-is
+TEMPLATE_FIELDS = frozenset({
+    "date", "timestamp", "name", "role", "citizenship",
+    "start_date", "currency", "salary", "dynamic_clauses",
+})
+INCLUDE_FIELDS = frozenset({"dynamic_clauses"})
+
+
+def compile_contract_template(text: str) -> CompiledTemplate:
+    return CompiledTemplate(text, TEMPLATE_FIELDS, INCLUDE_FIELDS)
+
+
+def missing_template(path: str) -> str:
+    return f"Error: Template {os.path.basename(path)} not found."
+
+
+def missing_clause(path: str) -> str:
+    return ""
+
+
+class RenderJob(NamedTuple):
+    """Everything a worker needs to draw one contract. Plain data, so it pickles cheaply."""
+    template_path: str
+    clause_path: str          # "" = no extra clause
+    values: Dict[str, object]  # already sanitized slot values
+    jurisdiction_label: str   # sanitized header text
+
+
+# Per-process caches: each worker compiles a template once and re-checks its mtime per job
+_TEMPLATES = TemplateCache(compile_contract_template, missing=missing_template)
+_CLAUSES = TemplateCache(CompiledTemplate, missing=missing_clause)
+
+# Line breaks of static paragraphs: (font, size, width, text) -> [(line, word spacing)]
+_LAYOUTS = LRUCache(max_entries=4096)
+_LAYOUTS_LOCK = threading.Lock()
+
+
+class LayoutPDF(FPDF):
+    """
+    FPDF whose justified multi_cell splits lines once per static paragraph and
+    replays the cached breaks afterwards. Page breaks still happen in cell(), so
+    the output is identical to plain FPDF. Only texts in `static` are cached;
+    candidate-specific paragraphs are split fresh on every render.
+    """
+
+    def __init__(self, static: Tuple[frozenset, ...] = (), layouts: LRUCache = _LAYOUTS):
+        super().__init__()
+        self.static = static
+        self.layouts = layouts
+
+    def _break_lines(self, w: float, txt: str) -> List[Tuple[str, Optional[float]]]:
+        """
+        Same algorithm as FPDF.multi_cell (align='J', no border), recording each line
+        and the word spacing set before it (None = reset to 0 if it was set).
+        """
+        cw = self.current_font['cw']
+        wmax = (w - 2 * self.c_margin) * 1000.0 / self.font_size
+        s = txt.replace("\r", '')
+        nb = len(s)
+        if nb > 0 and s[nb - 1] == "\n":
+            nb -= 1
+        lines = []
+        sep, i, j, l, ls, ns = -1, 0, 0, 0, 0, 0
+        while i < nb:
+            c = s[i]
+            if c == "\n":
+                lines.append((s[j:i], None))
+                i += 1
+                sep, j, l, ns = -1, i, 0, 0
+                continue
+            if c == ' ':
+                sep, ls = i, l
+                ns += 1
+            l += cw.get(c, 0)
+            if l > wmax:
+                if sep == -1:
+                    if i == j:
+                        i += 1
+                    lines.append((s[j:i], None))
+                else:
+                    ws = (wmax - ls) / 1000.0 * self.font_size / (ns - 1) if ns > 1 else 0
+                    lines.append((s[j:sep], ws))
+                    i = sep + 1
+                sep, j, l, ns = -1, i, 0, 0
+            else:
+                i += 1
+        lines.append((s[j:i], None))
+        return lines
+
+    def multi_cell(self, w, h, txt='', border=0, align='J', fill=0, split_only=False):
+        if border or split_only or align != 'J' or self.unifontsubset:
+            return super().multi_cell(w, h, txt, border, align, fill, split_only)
+        if w == 0:
+            w = self.w - self.r_margin - self.x
+
+        cacheable = any(txt in texts for texts in self.static)
+        key = (self.font_family, self.font_style, self.font_size_pt, w, txt)
+        plan = None
+        if cacheable:
+            with _LAYOUTS_LOCK:
+                plan = self.layouts.get(key)
+        if plan is None:
+            plan = self._break_lines(w, txt)
+            if cacheable:
+                with _LAYOUTS_LOCK:
+                    self.layouts.set(key, plan)
+
+        # Replay: same Tw operators and cells multi_cell would have emitted
+        for line, ws in plan:
+            if ws is None:
+                if self.ws > 0:
+                    self.ws = 0
+                    self._out('0 Tw')
+            else:
+                self.ws = ws
+                self._out('%.3f Tw' % (ws * self.k))
+            self.cell(w, h, line, 0, 2, align, fill)
+        self.x = self.l_margin
+        return []
+
+
+def draw_contract(pdf: FPDF, job: RenderJob) -> FPDF:
+    """Lays the contract out on pdf (any FPDF)."""
+    template = _TEMPLATES.get(job.template_path)
+    clause = _CLAUSES.get(job.clause_path)
+    rendered = template.render(job.values, includes={"dynamic_clauses": clause})
+
+    pdf.add_page()
+
+    # Header (Sanitized just in case)
+    pdf.set_font("Arial", "B", 16)
+    pdf.cell(0, 10, "DERIV", ln=True, align="C")
+    pdf.ln(5)
+
+    pdf.set_font("Arial", "I", 10)
+    pdf.cell(0, 10, f"Generated via Invisible Onboarding Engine | {job.jurisdiction_label}", ln=True, align="C")
+    pdf.line(10, 30, 200, 30)
+    pdf.ln(10)
+
+    # Body
+    pdf.set_font("Arial", size=11)
+
+    # Use SAFE blocks
+    for kind, text in rendered.blocks:
+        if kind == BLANK:
+            pdf.ln(2)
+        elif kind == H1:
+            pdf.set_font("Arial", "B", 14)
+            pdf.cell(0, 10, text, ln=True)
+            pdf.set_font("Arial", size=11)
+        elif kind == H2:
+            pdf.ln(4)
+            pdf.set_font("Arial", "B", 12)
+            pdf.cell(0, 8, text, ln=True)
+            pdf.set_font("Arial", size=11)
+        else:
+            pdf.multi_cell(0, 6, text)
+    return pdf
+
+
+def render_contract_pdf(job: RenderJob) -> bytes:
+    """
+    Lays out and encodes the contract PDF. Pure CPU work; runs in a worker process.
+    """
+    template = _TEMPLATES.get(job.template_path)
+    clause = _CLAUSES.get(job.clause_path)
+    pdf = draw_contract(LayoutPDF(static=(template.static_texts, clause.static_texts)), job)
+
+    # fpdf 1.x returns the document as a Latin-1 str
+    return pdf.output(dest='S').encode('latin-1')
+
+
+class RenderQueueFull(RuntimeError):
+    """Raised when every PDF worker is busy and the wait queue is full for too long."""
+
+
+def _warm_up() -> bool:
+    return True
+
+
+class RenderPool:
+    """
+    Process pool for PDF layout, so rendering scales with cores instead of
+    serializing on the GIL. At most workers + max_queue jobs are admitted;
+    callers wait up to queue_timeout for a slot, then get RenderQueueFull.
+    workers=0 renders inline in the calling thread (same limits apply).
+    """
+
+    def __init__(self, workers: int, max_queue: int = 32, queue_timeout: float = 10.0):
+        self.workers = max(0, workers)
+        self.capacity = max(1, self.workers) + max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # spawn: forking a threaded server process can deadlock the children
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def start(self):
+        """Spins the workers up ahead of the first request (called from the lifespan)."""
+        if self.workers:
+            executor = self._get_executor()
+            for future in [executor.submit(_warm_up) for _ in range(self.workers)]:
+                future.result()
+
+    def render(self, job: RenderJob) -> bytes:
+        """Blocking render with backpressure; call it from a worker thread, not the event loop."""
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.rejected += 1
+            raise RenderQueueFull(f"PDF render queue is full ({self.capacity} jobs in flight)")
+        with self._lock:
+            self.in_flight += 1
+        try:
+            if not self.workers:
+                return render_contract_pdf(job)
+            try:
+                return self._render_in_pool(job)
+            except BrokenProcessPool as e:
+                # A worker died (OOM kill, crash); the executor is unusable from here on
+                print(f"⚠️ PDF worker pool broke ({e!r}), starting a new one")
+                return self._render_in_pool(job)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def _render_in_pool(self, job: RenderJob) -> bytes:
+        executor = self._get_executor()
+        try:
+            future: Future = executor.submit(render_contract_pdf, job)
+            return future.result()
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Drops a broken executor so the next render creates a fresh one."""
+        with self._executor_lock:
+            # Another thread may already have replaced it
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
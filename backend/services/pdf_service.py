@@ -1,202 +1,199 @@
 import os
-from fpdf import FPDF
 from datetime import datetime
 import time
+from typing import Optional
+from ..config import (
+    ARTIFACT_RETENTION_SECONDS, EXPIRY_RECONCILE_INTERVAL_SECONDS, EXPIRY_SWEEP_INTERVAL_SECONDS,
+    CONTRACT_STORE_DIR, CONTRACT_STORE_MEMORY_BYTES, CONTRACT_STORE_SPILL_BYTES, CONTRACT_TTL_SECONDS,
+    PDF_MAX_QUEUE, PDF_QUEUE_TIMEOUT_SECONDS, PDF_WORKERS, RENDER_CACHE_BYTES,
+)
+from .cache import RenderCache
+from .contract_store import ContractStore
+from .expiry import ExpiryScheduler
+from .jurisdictions import RESOLVER, Jurisdiction
+from .pdf_render import RenderJob, RenderPool, compile_contract_template, missing_clause, missing_template
+from .templates import CompiledTemplate, TemplateCache, sanitize_text
+
+# Job family -> extra clause file under templates/clauses
+CLAUSE_FILES = {
+    "Engineering": "ip_assignment.md",
+    "Sales": "sales_commission.md",
+    "Executive": "executive_severance.md",
+}
 
 class PDFService:
-    def __init__(self):
+    def __init__(self, render_pool: Optional[RenderPool] = None, store: Optional[ContractStore] = None,
+                 render_cache: Optional[RenderCache] = None):
         # Ensure output directory exists
         self.output_dir = "data"
         self.template_dir = "backend/templates"
         os.makedirs(self.output_dir, exist_ok=True)
         os.makedirs(self.template_dir, exist_ok=True)
 
-        # CLEANUP: Run immediately on startup
-        self._cleanup_old_files()
+        # Templates and clauses are parsed once and recompiled only when the file changes
+        self.templates = TemplateCache(compile_contract_template, missing=missing_template)
+        self.clauses = TemplateCache(CompiledTemplate, missing=missing_clause)
+
+        # PDF layout runs in worker processes (PDF_WORKERS=0 renders inline)
+        self.render_pool = render_pool or RenderPool(PDF_WORKERS, PDF_MAX_QUEUE, PDF_QUEUE_TIMEOUT_SECONDS)
+
+        # Identical inputs + identical template versions = identical PDF, so re-renders are skipped
+        self.render_cache = render_cache if render_cache is not None else RenderCache(RENDER_CACHE_BYTES)
+
+        # CLEANUP: expiries live in a min-heap drained by a background task (started in the lifespan),
+        # with a full reconciliation scan at startup and every EXPIRY_RECONCILE_INTERVAL_SECONDS
+        self.expiry = ExpiryScheduler(
+            reconcile=self._reconcile_artifacts,
+            interval=EXPIRY_SWEEP_INTERVAL_SECONDS,
+            reconcile_interval=EXPIRY_RECONCILE_INTERVAL_SECONDS,
+        )
+
+        # Finished PDFs are served over HTTP from here (/contracts/{id}), not read off a shared disk
+        # (empty stores and caches are falsy, hence the explicit None checks)
+        self.store = store if store is not None else ContractStore(
+            CONTRACT_STORE_DIR,
+            max_memory_bytes=CONTRACT_STORE_MEMORY_BYTES,
+            spill_threshold=CONTRACT_STORE_SPILL_BYTES,
+            ttl_seconds=CONTRACT_TTL_SECONDS,
+            scheduler=self.expiry,
+        )
 
     def _load_template(self, filename: str) -> str:
         """Reads a markdown file from the templates directory."""
-        path = os.path.join(self.template_dir, filename)
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                return f.read()
-        except FileNotFoundError:
-            return f"Error: Template {filename} not found."
+        return self.templates.get(os.path.abspath(os.path.join(self.template_dir, filename))).text
 
-    def _select_template_file(self, jurisdiction: str) -> str:
+    def _select_template_file(self, jurisdiction) -> str:
         """
         Maps AI detected jurisdiction to a physical file.
-        Handles: "United Arab Emirates", "UAE", "Dubai", "DIFC", etc.
+        Accepts a Jurisdiction record or a label / location string ("DIFC Employment Law (UAE)", "Dubai").
         """
-        if not jurisdiction:
-            return "contractor_agreement.md"
-
-        # 1. Normalize
-        j_lower = jurisdiction.lower().strip()
-
-        # 2. MATCHING LOGIC
-        
-        # UAE / Dubai Logic
-        if any(x in j_lower for x in ["united arab emirates", "uae", "dubai", "abudhabi", "difc"]):
-            return "uae_labor.md"
-        
-        # UK Logic
-        elif any(x in j_lower for x in ["united kingdom", "uk", "britain", "england", "london"]):
-            return "uk_employment.md"
-        
-        # Germany Logic
-        elif any(x in j_lower for x in ["germany", "deutschland", "berlin", "munich"]):
-            return "german_employment.md"
-        
-        # Fallback
-        else:
+        if isinstance(jurisdiction, Jurisdiction):
+            return jurisdiction.template_file
+
+        record = RESOLVER.from_label(jurisdiction)
+        if jurisdiction and record is RESOLVER.default and jurisdiction.strip().lower() != record.label.lower():
             print(f"⚠️ Jurisdiction '{jurisdiction}' not recognized. Using Default.")
-            return "contractor_agreement.md"
+        return record.template_file
     
     def _sanitize_text(self, text: str) -> str:
         """
         Aggressively converts text to Latin-1 compatible format.
         """
-        # 1. Manual replacements for common "smart" characters
-        replacements = {
-            '\u2018': "'", '\u2019': "'",  # Smart quotes
-            '\u201c': '"', '\u201d': '"',  # Smart double quotes
-            '\u2013': '-', '\u2014': '-',  # Dashes
-            '\u2026': '...',               # Ellipsis
-            '\u00A0': ' ',                 # Non-breaking space
-        }
-        for char, replacement in replacements.items():
-            text = text.replace(char, replacement)
-            
-        # 2. NUCLEAR OPTION: Encode to Latin-1, ignoring errors.
-        # This guarantees no crash, even if it skips a weird emoji.
-        return text.encode('latin-1', 'ignore').decode('latin-1')
+        return sanitize_text(text)
+
+    def _clause_path(self, job_family: str) -> str:
+        """
+        Selects the extra clause file for the Job Family ("" if none applies).
+        """
+        filename = CLAUSE_FILES.get(job_family)
+        return os.path.abspath(os.path.join(self.template_dir, "clauses", filename)) if filename else ""
 
     def _get_dynamic_clauses(self, job_family: str) -> str:
         """
         Selects extra clauses based on Job Family.
         """
-        clauses = []
-        clause_dir = os.path.join(self.template_dir, "clauses")
-        
-        # 1. Engineering Clause
-        if job_family == "Engineering":
-            path = os.path.join(clause_dir, "ip_assignment.md")
-            if os.path.exists(path):
-                with open(path, "r") as f: clauses.append(f.read())
-
-        # 2. Sales Clause
-        elif job_family == "Sales":
-            path = os.path.join(clause_dir, "sales_commission.md")
-            if os.path.exists(path):
-                with open(path, "r") as f: clauses.append(f.read())
-
-        # 3. Executive Clause
-        elif job_family == "Executive":
-            path = os.path.join(clause_dir, "executive_severance.md")
-            if os.path.exists(path):
-                with open(path, "r") as f: clauses.append(f.read())
-        
-        return "\n\n".join(clauses)
+        return self.clauses.get(self._clause_path(job_family)).text
     
-    def _cleanup_old_files(self, age_minutes: int = 10):
-        """
-        Deletes PDF files older than 'age_minutes' to save space and privacy.
-        """
+    def _remove_artifact(self, file_path: str):
         try:
-            now = time.time()
-            cutoff = now - (age_minutes * 60)
-            
-            for filename in os.listdir(self.output_dir):
-                file_path = os.path.join(self.output_dir, filename)
-                
-                # Check if it's a PDF and older than cutoff
-                if filename.endswith(".pdf") and os.path.isfile(file_path):
-                    file_creation_time = os.path.getctime(file_path)
-                    if file_creation_time < cutoff:
-                        os.remove(file_path)
-                        print(f"🗑️ Cleaned up old file: {filename}")
-                        
+            os.remove(file_path)
+            print(f"🗑️ Cleaned up old file: {os.path.basename(file_path)}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
             print(f"⚠️ Cleanup failed: {e}")
 
-    def generate_contract(self, candidate_data, jurisdiction: str) -> dict:
-        # Every time we generate a new file, we check for old ones.
-        self._cleanup_old_files(age_minutes=10)
-
+    def _reconcile_artifacts(self):
+        """
+        Full scan of the output directory: deletes PDFs older than the retention
+        window and schedules the rest. Also reconciles the contract store's spill files.
+        """
+        cutoff = time.time() - ARTIFACT_RETENTION_SECONDS
+        for filename in os.listdir(self.output_dir):
+            file_path = os.path.join(self.output_dir, filename)
+
+            # Check if it's a PDF and older than cutoff
+            if filename.endswith(".pdf") and os.path.isfile(file_path):
+                file_creation_time = os.path.getctime(file_path)
+                if file_creation_time < cutoff:
+                    self._remove_artifact(file_path)
+                else:
+                    self.expiry.schedule(file_creation_time + ARTIFACT_RETENTION_SECONDS,
+                                         self._remove_artifact, file_path)
+
+        self.store.reconcile()
+
+    def render_contract(self, candidate_data, jurisdiction) -> dict:
+        """
+        Renders the contract without storing it: {"pdf", "filename", "original_text", "final_text"}.
+        """
         # 1. Load Original
+        if isinstance(jurisdiction, Jurisdiction):
+            jurisdiction_label = jurisdiction.label
+        else:
+            jurisdiction_label = jurisdiction or ""
         template_file = self._select_template_file(jurisdiction)
-        raw_text = self._load_template(template_file)
+        template_path = os.path.abspath(os.path.join(self.template_dir, template_file))
+        template = self.templates.get(template_path)
 
         # 2. Fetch Dynamic Clauses (The Logic Layer)
-        dynamic_text = self._get_dynamic_clauses(candidate_data.job_family)
+        clause_path = self._clause_path(candidate_data.job_family)
+        clause = self.clauses.get(clause_path)
 
-        # 3. Fill Data
+        # 3. Fill Data (dynamic_clauses is spliced in as pre-compiled blocks)
+        now = datetime.now()
         fmt_data = {
-            "date": datetime.now().strftime("%B %d, %Y"),
-            "timestamp": int(datetime.now().timestamp()),
+            "date": now.strftime("%B %d, %Y"),
+            "timestamp": int(now.timestamp()),
             "name": self._sanitize_text(candidate_data.name), # Sanitize Name!
             "role": self._sanitize_text(candidate_data.role), # Sanitize Role!
             "citizenship": self._sanitize_text(candidate_data.citizenship or "Not Specified"),
             "start_date": candidate_data.start_date or "TBD",
             "currency": candidate_data.currency or "USD",
             "salary": candidate_data.salary or 0.0,
-            "dynamic_clauses": dynamic_text
         }
+        label = self._sanitize_text(jurisdiction_label) # Sanitize Jurisdiction too
+
+        # 4. Reuse an earlier render of the same contract (e.g. after a Reject / Edit cycle).
+        # {timestamp} is only a contract number, so it stays out of the key and a hit keeps the old one.
+        self.render_cache.check_version(template_path, template.digest)
+        if clause_path:
+            self.render_cache.check_version(clause_path, clause.digest)
+        cache_key = RenderCache.make_key(
+            fmt_data, template.fields - {"timestamp"}, template.digest, clause.digest, label, fmt_data["date"])
+        cached = self.render_cache.get(cache_key)
+        if cached is not None:
+            pdf_bytes, fmt_data["timestamp"] = cached
+        filled_text = template.fill(fmt_data, includes={"dynamic_clauses": clause})
+
+        # 5. Layout + encoding happen in a worker process; only plain data crosses over
+        if cached is None:
+            job = RenderJob(
+                template_path=template_path,
+                clause_path=clause_path,
+                values=fmt_data,
+                jurisdiction_label=label,
+            )
+            pdf_bytes = self.render_pool.render(job)
+            self.render_cache.set(cache_key, pdf_bytes, fmt_data["timestamp"], sources=(template_path, clause_path))
 
-        try:
-            filled_text = raw_text.format(**fmt_data)
-        except Exception:
-            filled_text = raw_text
-
-        # 4. Sanitize the WHOLE body before PDF generation
-        safe_body_text = self._sanitize_text(filled_text)
-
-        # 5. Generate PDF
-        pdf = FPDF()
-        pdf.add_page()
-        
-        # Header (Sanitized just in case)
-        pdf.set_font("Arial", "B", 16)
-        pdf.cell(0, 10, "DERIV", ln=True, align="C")
-        pdf.ln(5)
-
-        pdf.set_font("Arial", "I", 10)
-        # Sanitize Jurisdiction too
-        safe_jurisdiction = self._sanitize_text(jurisdiction)
-        pdf.cell(0, 10, f"Generated via Invisible Onboarding Engine | {safe_jurisdiction}", ln=True, align="C")
-        pdf.line(10, 30, 200, 30)
-        pdf.ln(10)
-
-        # Body
-        pdf.set_font("Arial", size=11)
-        
-        # Use SAFE text
-        for line in safe_body_text.split('\n'):
-            line = line.strip()
-            if not line:
-                pdf.ln(2)
-                continue
-                
-            if line.startswith("# "):
-                pdf.set_font("Arial", "B", 14)
-                pdf.cell(0, 10, line.replace("# ", "").upper(), ln=True)
-                pdf.set_font("Arial", size=11)
-            elif line.startswith("## "):
-                pdf.ln(4)
-                pdf.set_font("Arial", "B", 12)
-                pdf.cell(0, 8, line.replace("## ", ""), ln=True)
-                pdf.set_font("Arial", size=11)
-            else:
-                pdf.multi_cell(0, 6, line)
-
-        # 6. Save
         filename = f"Contract_{candidate_data.name.replace(' ', '_')}_{int(datetime.now().timestamp())}.pdf"
-        file_path = os.path.join(self.output_dir, filename)
-        pdf.output(file_path)
-        
         return {
-            "path": file_path,
-            "original_text": raw_text,
+            "pdf": pdf_bytes,
+            "filename": filename,
+            "original_text": template.text,
             "final_text": filled_text # Return pretty text to UI
-        }
\ No newline at end of file
+        }
+
+    def generate_contract(self, candidate_data, jurisdiction) -> dict:
+        rendered = self.render_contract(candidate_data, jurisdiction)
+
+        # 6. Store
+        contract = self.store.put(rendered["pdf"], rendered["filename"])
+
+        return {
+            "contract_id": contract.id,
+            "url": contract.url,
+            "original_text": rendered["original_text"],
+            "final_text": rendered["final_text"]
+        }
@@ -0,0 +1,148 @@
+import heapq
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, NamedTuple
+
+# Numbered section headings, e.g. "4. RELOCATION & VISA SUPPORT"
+HEADING_RE = re.compile(r"^\s*\d+(\.\d+)*\.?\s+\S")
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do for from how i in is it my of on or "
+    "the to we what when where which who will with you your".split()
+)
+
+
+def _stem(token: str) -> str:
+    """Very light suffix stripping so 'remotely'/'remote' and 'visas'/'visa' match."""
+    for suffix in ("ly", "ing", "ed", "es", "s"):
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [_stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class Chunk(NamedTuple):
+    title: str
+    text: str
+
+
+def split_sections(text: str, max_chars: int = 2000) -> List[Chunk]:
+    """
+    Splits the handbook on its numbered headings.
+    Oversized sections are cut on blank lines; each piece keeps the heading.
+    """
+    sections = []
+    title, lines = "", []
+    for line in text.splitlines():
+        if HEADING_RE.match(line):
+            if any(l.strip() for l in lines):
+                sections.append((title, lines))
+            title, lines = line.strip(), [line]
+        else:
+            lines.append(line)
+    if any(l.strip() for l in lines):
+        sections.append((title, lines))
+
+    chunks = []
+    for title, lines in sections:
+        body = "\n".join(lines).strip()
+        if len(body) <= max_chars:
+            chunks.append(Chunk(title, body))
+            continue
+
+        # Long section: pack paragraphs into pieces of at most max_chars
+        piece = ""
+        for para in re.split(r"\n\s*\n", body):
+            if piece and len(piece) + len(para) > max_chars:
+                chunks.append(Chunk(title, piece.strip()))
+                piece = f"{title} (cont.)\n"
+            piece += para + "\n\n"
+        if piece.strip():
+            chunks.append(Chunk(title, piece.strip()))
+    return chunks
+
+
+class _Index(NamedTuple):
+    chunks: List[Chunk]
+    postings: Dict[str, List[tuple]]
+    doc_len: List[int]
+    avg_len: float
+    idf: Dict[str, float]
+
+
+EMPTY_INDEX = _Index([], {}, [], 0.0, {})
+
+
+class HandbookIndex:
+    """
+    BM25 index over handbook sections.
+    Built once and rebuilt only when the file's mtime changes.
+    """
+
+    def __init__(self, path: str, top_k: int = 3, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.top_k = top_k
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._index = EMPTY_INDEX
+
+    @property
+    def chunks(self) -> List[Chunk]:
+        self._ensure_fresh()
+        return self._index.chunks
+
+    def _ensure_fresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime != self._mtime:
+                self._build(mtime)
+
+    def _build(self, mtime):
+        if mtime is None:
+            chunks = []
+        else:
+            with open(self.path, "r", encoding="utf-8") as f:
+                chunks = split_sections(f.read())
+
+        postings = defaultdict(list)
+        doc_len = []
+        for doc_id, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk.text))
+            doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings[term].append((doc_id, tf))
+
+        n = len(chunks)
+        idf = {t: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5)) for t, p in postings.items()}
+        # Swap the whole index in at once so concurrent readers never see a half-built one
+        self._index = _Index(chunks, dict(postings), doc_len, (sum(doc_len) / n) if n else 0.0, idf)
+        self._mtime = mtime
+        print(f"📚 Indexed handbook: {n} sections")
+
+    def search(self, question: str, k: int = None) -> List[Chunk]:
+        """Returns the top-k sections for the question, best first."""
+        self._ensure_fresh()
+        index = self._index
+
+        scores = defaultdict(float)
+        for term in set(tokenize(question)):
+            for doc_id, tf in index.postings.get(term, ()):
+                norm = self.k1 * (1 - self.b + self.b * index.doc_len[doc_id] / index.avg_len)
+                scores[doc_id] += index.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+
+        best = heapq.nlargest(k or self.top_k, scores.items(), key=lambda item: item[1])
+        return [index.chunks[doc_id] for doc_id, _ in best]
@@ -0,0 +1,220 @@
+import json
+import operator
+import os
+import string
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Comparison ops take (fact, operand); a missing fact (None) never matches
+BINARY_OPS = {
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "eq": operator.eq,
+    "ne": operator.ne,
+}
+UNARY_OPS = {
+    "is_true": bool,
+    "is_false": lambda value: not value,
+    "known": lambda value: value is not None and value != "unknown",
+}
+
+# Facts the ComplianceEngine computes per candidate (country params are added on top)
+FACTS = frozenset({
+    "citizenship", "location_country", "citizenship_norm", "location_norm", "country_title",
+    "needs_visa", "salary", "currency", "start_date", "days_until_start", "suggested_start",
+})
+
+
+class Predicate(NamedTuple):
+    fact: str
+    op: str
+    operand: object = None
+
+    def test(self, facts: Dict) -> bool:
+        value = facts.get(self.fact)
+        unary = UNARY_OPS.get(self.op)
+        if unary is not None:
+            return unary(value)
+        if value is None:
+            return False
+        return BINARY_OPS[self.op](value, self.operand)
+
+
+class CompiledRule(NamedTuple):
+    id: str
+    category: str
+    type: str
+    severity: str
+    message: str
+    predicates: Tuple[Predicate, ...]
+
+
+class CountryRules(NamedTuple):
+    """The rules that apply in one country, with their params already bound."""
+    params: Dict[str, object]
+    rules: Tuple[CompiledRule, ...]
+
+
+class _Tables(NamedTuple):
+    by_country: Dict[str, CountryRules]
+    fallback: CountryRules  # unknown / unlisted countries
+    aliases: Dict[str, str]  # normalized alias -> canonical country
+
+
+EMPTY_TABLES = _Tables({}, CountryRules({}, ()), {})
+
+
+def _message_fields(template: str) -> List[str]:
+    return [field.split(".")[0].split("[")[0] for _, field, _, _ in string.Formatter().parse(template) if field]
+
+
+def compile_rules(data: Dict, normalize: Callable[[str], str] = lambda c: c.lower().strip()) -> _Tables:
+    """
+    Rules JSON -> one lookup table per canonical country.
+    A rule lands in a country's table only if its country filter matches and
+    every param it references is defined there, so evaluation never has to skip.
+    """
+    defaults = dict(data.get("defaults", {}))
+    rules = data.get("rules", [])
+
+    # 1. Per-country params (defaults overlaid with the country's own values)
+    params_by_country: Dict[str, Dict] = {}
+    alias_of: Dict[str, str] = {}
+    for name, entry in data.get("countries", {}).items():
+        country = normalize(name)
+        entry = dict(entry)
+        for alias in entry.pop("aliases", ()):
+            alias_of[normalize(alias)] = country
+        params_by_country[country] = {**defaults, **entry}
+
+    # 2. Validate every rule once, up front
+    for rule in rules:
+        for key in ("id", "type", "severity", "message"):
+            if key not in rule:
+                raise ValueError(f"Rule {rule.get('id', '?')} is missing '{key}'")
+        for cond in rule.get("when", []):
+            if cond.get("op") not in BINARY_OPS and cond.get("op") not in UNARY_OPS:
+                raise ValueError(f"Rule {rule['id']}: unknown op {cond.get('op')!r}")
+        for country in rule.get("countries", ()):
+            params_by_country.setdefault(normalize(country), dict(defaults))
+
+    def build(params: Dict, country: Optional[str]) -> CountryRules:
+        known = FACTS | params.keys()
+        compiled = []
+        for rule in rules:
+            countries = rule.get("countries")
+            if countries and (country is None or country not in {normalize(c) for c in countries}):
+                continue
+
+            predicates = []
+            applicable = True
+            for cond in rule.get("when", []):
+                if cond["fact"] not in known:
+                    raise ValueError(f"Rule {rule['id']}: unknown fact {cond['fact']!r}")
+                if "param" in cond:
+                    if cond["param"] not in params:
+                        applicable = False  # e.g. no minimum wage defined for this country
+                        break
+                    operand = params[cond["param"]]
+                else:
+                    operand = cond.get("value")
+                predicates.append(Predicate(cond["fact"], cond["op"], operand))
+            if not applicable:
+                continue
+
+            for field in _message_fields(rule["message"]):
+                if field not in known:
+                    raise ValueError(f"Rule {rule['id']}: message uses unknown field {field!r}")
+
+            compiled.append(CompiledRule(
+                rule["id"], rule.get("category", "general"), rule["type"], rule["severity"],
+                rule["message"], tuple(predicates),
+            ))
+        return CountryRules(params, tuple(compiled))
+
+    # 3. One table per canonical country; aliases are resolved before lookup (RuleSet.canonical)
+    by_country = {country: build(params, country) for country, params in params_by_country.items()}
+    aliases = {alias: country for alias, country in alias_of.items() if alias not in by_country}
+    return _Tables(by_country, build(defaults, None), aliases)
+
+
+class RuleSet:
+    """
+    Compliance rules loaded from JSON and compiled into per-country tables.
+    Recompiled only when the file's mtime changes; a broken edit keeps the last good rules.
+    """
+
+    def __init__(self, path: str, normalize: Callable[[str], str] = lambda c: c.lower().strip()):
+        self.path = path
+        self.normalize = normalize
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._tables = EMPTY_TABLES
+        self._ensure_fresh()
+
+    def _ensure_fresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        with self._lock:
+            if mtime != self._mtime:
+                self._build(mtime)
+
+    def _build(self, mtime):
+        if mtime is None:
+            print(f"⚠️ Compliance rules not found at {self.path}. No rules loaded.")
+            self._tables = EMPTY_TABLES
+            self._mtime = mtime
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                tables = compile_rules(json.load(f), self.normalize)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # Keep serving the previous rules until the file is fixed
+            print(f"⚠️ Compliance rules reload failed, keeping previous rules: {e}")
+            self._mtime = mtime
+            return
+        # Swap the whole table set at once so concurrent readers never see a half-built one
+        self._tables = tables
+        self._mtime = mtime
+        print(f"📜 Compiled compliance rules for {len(tables.by_country)} countries")
+
+    @property
+    def countries(self) -> List[str]:
+        self._ensure_fresh()
+        return list(self._tables.by_country)
+
+    def canonical(self, country: str) -> str:
+        """
+        Folds the rule file's own aliases ('holland', 'usa') into their country.
+        Takes a name already normalized with self.normalize.
+        """
+        self._ensure_fresh()
+        return self._tables.aliases.get(country, country)
+
+    def for_country(self, country: str) -> CountryRules:
+        """Rules + params for a canonical country (the '*' defaults if unlisted)."""
+        self._ensure_fresh()
+        tables = self._tables
+        return tables.by_country.get(country, tables.fallback)
+
+    @staticmethod
+    def evaluate(table: CountryRules, facts: Dict, category: Optional[str] = None) -> List[Dict]:
+        """Runs only the rules that apply to this country, in file order."""
+        alerts = []
+        for rule in table.rules:
+            if category and rule.category != category:
+                continue
+            if all(p.test(facts) for p in rule.predicates):
+                alerts.append({
+                    "id": rule.id,
+                    "type": rule.type,
+                    "severity": rule.severity,
+                    "message": rule.message.format(**facts),
+                })
+        return alerts
@@ -0,0 +1,236 @@
+import hashlib
+import os
+import string
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Single pass replacement table for "smart" characters fpdf's Latin-1 fonts can't draw
+SMART_CHARS = str.maketrans({
+    '\u2018': "'", '\u2019': "'",  # Smart quotes
+    '\u201c': '"', '\u201d': '"',  # Smart double quotes
+    '\u2013': '-', '\u2014': '-',  # Dashes
+    '\u2026': '...',               # Ellipsis
+    '\u00A0': ' ',                 # Non-breaking space
+})
+
+
+def sanitize_text(text: str) -> str:
+    """Converts text to Latin-1: smart characters replaced, anything else unencodable dropped."""
+    return text.translate(SMART_CHARS).encode('latin-1', 'ignore').decode('latin-1')
+
+
+# A markdown line as the PDF renders it
+BLANK, H1, H2, TEXT = "blank", "h1", "h2", "text"
+
+
+class Block(NamedTuple):
+    kind: str
+    text: str
+
+
+def classify_line(line: str) -> Block:
+    """One (already sanitized) line -> the block the PDF draws for it."""
+    line = line.strip()
+    if not line:
+        return Block(BLANK, "")
+    if line.startswith("# "):
+        return Block(H1, line.replace("# ", "").upper())
+    if line.startswith("## "):
+        return Block(H2, line.replace("## ", ""))
+    return Block(TEXT, line)
+
+
+def compile_blocks(text: str) -> Tuple[Block, ...]:
+    return tuple(classify_line(line) for line in sanitize_text(text).split('\n'))
+
+
+class Slot(NamedTuple):
+    field: str
+    spec: str
+    conversion: Optional[str]
+
+
+class Segment(NamedTuple):
+    literal: str            # raw text before the slot (for final_text)
+    safe_literal: str       # same, sanitized (for the PDF)
+    slot: Optional[Slot]
+
+
+# One template line: fully static (pre-built Block), a lone include slot, or literals + slots
+class StaticLine(NamedTuple):
+    block: Block
+
+
+class IncludeLine(NamedTuple):
+    field: str
+
+
+class DynamicLine(NamedTuple):
+    segments: Tuple[Segment, ...]
+
+
+class RenderedTemplate(NamedTuple):
+    final_text: str            # filled, unsanitized (shown in the UI)
+    blocks: List[Block]        # sanitized and classified (drawn in the PDF)
+
+
+_FORMATTER = string.Formatter()
+
+
+class CompiledTemplate:
+    """
+    A markdown template parsed once: pre-sanitized literals, placeholder slots
+    and pre-classified static lines. Rendering only fills the slots.
+    fields=None compiles the text as a literal (no placeholders), e.g. a clause.
+    """
+
+    def __init__(self, text: str, fields: Optional[frozenset] = None, includes: frozenset = frozenset()):
+        self.text = text
+        # Content hash: changes whenever the file on disk changes (render cache key)
+        self.digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        self.raw_blocks = compile_blocks(text)
+        # False = render the text as-is (literal, or str.format would fail on it)
+        self.formattable = fields is not None
+        self.segments: Tuple[Segment, ...] = ()
+        self.lines: Tuple = ()
+        if self.formattable:
+            try:
+                self.segments = self._parse(text, fields)
+                self.lines = tuple(self._parse_line(line, fields, includes) for line in text.split('\n'))
+            except (ValueError, KeyError):
+                self.formattable = False
+                self.segments = ()
+        # Placeholders this template actually reads (empty = renders as-is)
+        self.fields = frozenset(s.slot.field for s in self.segments if s.slot)
+        # Paragraph texts identical in every render (their PDF layout can be cached)
+        static = [line.block for line in self.lines if isinstance(line, StaticLine)] \
+            if self.formattable else self.raw_blocks
+        self.static_texts = frozenset(b.text for b in static if b.kind == TEXT)
+
+    @staticmethod
+    def _parse(text: str, fields: frozenset) -> Tuple[Segment, ...]:
+        segments = []
+        for literal, field, spec, conversion in _FORMATTER.parse(text):
+            slot = None
+            if field is not None:
+                # Only keyword fields we fill, with static format specs, get the fast path
+                if field not in fields or (spec and "{" in spec):
+                    raise KeyError(field)
+                slot = Slot(field, spec or "", conversion)
+            segments.append(Segment(literal, sanitize_text(literal), slot))
+        return tuple(segments)
+
+    def _parse_line(self, line: str, fields: frozenset, includes: frozenset):
+        segments = self._parse(line, fields)
+        slots = [s.slot for s in segments if s.slot]
+        if not slots:
+            return StaticLine(classify_line(sanitize_text(line)))
+        field = slots[0].field
+        if field in includes and line.strip() == "{" + field + "}":
+            return IncludeLine(field)
+        return DynamicLine(segments)
+
+    @staticmethod
+    def _format(slot: Slot, values: Dict) -> str:
+        value = _FORMATTER.convert_field(values[slot.field], slot.conversion)
+        return format(value, slot.spec)
+
+    def _fill_slots(self, values: Dict, includes: Dict[str, "CompiledTemplate"]) -> Optional[Dict[Slot, str]]:
+        """Each distinct slot formatted once; None if the template can't be filled."""
+        if not self.formattable:
+            return None
+        all_values = dict(values)
+        for field, compiled in includes.items():
+            all_values[field] = compiled.text
+        rendered: Dict[Slot, str] = {}
+        try:
+            for segment in self.segments:
+                if segment.slot and segment.slot not in rendered:
+                    rendered[segment.slot] = self._format(segment.slot, all_values)
+        except Exception:
+            return None
+        return rendered
+
+    def fill(self, values: Dict, includes: Optional[Dict[str, "CompiledTemplate"]] = None) -> str:
+        """Just the filled text (what the UI shows), without building PDF blocks."""
+        rendered = self._fill_slots(values, includes or {})
+        if rendered is None:
+            return self.text
+        return "".join(s.literal + (rendered[s.slot] if s.slot else "") for s in self.segments)
+
+    def render(self, values: Dict, includes: Optional[Dict[str, "CompiledTemplate"]] = None) -> RenderedTemplate:
+        """
+        values: slot -> value. includes: slot -> compiled literal text spliced in
+        as whole pre-built blocks (its raw text is what appears in final_text).
+        Same result as str.format + sanitize + split, including the fallback to
+        the raw template when filling fails.
+        """
+        includes = includes or {}
+        rendered = self._fill_slots(values, includes)
+        if rendered is None:
+            return RenderedTemplate(self.text, list(self.raw_blocks))
+
+        final_text = "".join(s.literal + (rendered[s.slot] if s.slot else "") for s in self.segments)
+
+        # 2. PDF blocks: static lines as-is, includes spliced in, the rest filled and classified
+        safe_values: Dict[Slot, str] = {}
+        blocks: List[Block] = []
+        for line in self.lines:
+            if isinstance(line, StaticLine):
+                blocks.append(line.block)
+            elif isinstance(line, IncludeLine):
+                if line.field in includes:
+                    blocks.extend(includes[line.field].raw_blocks)
+                else:
+                    blocks.extend(compile_blocks(rendered[Slot(line.field, "", None)]))
+            else:
+                parts = []
+                for s in line.segments:
+                    parts.append(s.safe_literal)
+                    if s.slot:
+                        if s.slot not in safe_values:
+                            safe_values[s.slot] = sanitize_text(rendered[s.slot])
+                        parts.append(safe_values[s.slot])
+                blocks.extend(classify_line(l) for l in "".join(parts).split('\n'))
+        return RenderedTemplate(final_text, blocks)
+
+
+class TemplateCache:
+    """
+    Compiled templates keyed by path, recompiled when the file's mtime changes.
+    Missing files compile to the fallback text.
+    """
+
+    def __init__(self, compile_fn: Callable[[str], CompiledTemplate], missing: Callable[[str], str]):
+        self.compile_fn = compile_fn
+        self.missing = missing
+        self._entries: Dict[str, Tuple[Optional[int], CompiledTemplate]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> CompiledTemplate:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            return entry[1]
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == mtime:
+                return entry[1]
+            text = self.missing(path)
+            if mtime is not None:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        text = f.read()
+                except OSError:
+                    mtime = None
+            compiled = self.compile_fn(text)
+            self._entries[path] = (mtime, compiled)
+            return compiled
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,42 @@
+import zipfile
+from datetime import datetime
+from typing import List
+
+
+class ZipStream:
+    """
+    A ZIP archive built one file at a time for streaming responses.
+    zipfile writes into this object; take() hands back whatever has been
+    written since the last call, so only the current file is ever buffered.
+    The output is not seekable, so entries use data descriptors (standard,
+    readable by every unzip tool).
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._zip = zipfile.ZipFile(self, mode="w")
+
+    # File-like interface used by zipfile
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+    def add(self, name: str, data: bytes, compress: bool = True) -> bytes:
+        """Writes one member and returns the archive bytes it produced."""
+        info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        self._zip.writestr(info, data)
+        return self.take()
+
+    def close(self) -> bytes:
+        """Writes the central directory and returns the final bytes."""
+        self._zip.close()
+        return self.take()
@@ -0,0 +1,118 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+# Each timed round runs the function enough times to last at least this long
+MIN_ROUND_SECONDS = 0.005
+
+
+class Case(NamedTuple):
+    name: str                  # "<group>/<what>[<size>]", e.g. "pdf/generate_contract[long]"
+    fn: Callable[[], object]
+
+
+def _calibrate(fn: Callable[[], object]) -> int:
+    """Calls per round so one round lasts at least MIN_ROUND_SECONDS (timer noise stays small)."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        if time.perf_counter() - start >= MIN_ROUND_SECONDS or loops >= 1 << 20:
+            return loops
+        loops *= 2
+
+
+def measure(fn: Callable[[], object], min_time: float = 0.5, min_rounds: int = 5, warmup: int = 1) -> dict:
+    """
+    Times fn in rounds until min_time has passed (and at least min_rounds ran).
+    All figures are seconds per call.
+    """
+    for _ in range(warmup):
+        fn()
+    loops = _calibrate(fn)
+    samples: List[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < min_rounds or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+
+    samples.sort()
+    return {
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "min": samples[0],
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "rounds": len(samples),
+        "loops": loops,
+    }
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run_cases(cases: List[Case], min_time: float, log: Callable[[str], None] = print) -> Dict[str, dict]:
+    results = {}
+    for case in cases:
+        stats = measure(case.fn, min_time=min_time)
+        results[case.name] = stats
+        log(f"  {case.name:<52} {format_seconds(stats['median']):>10}  (p95 {format_seconds(stats['p95'])})")
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[dict]:
+    """
+    Median vs baseline median per case. ratio > 1 + threshold is a regression,
+    ratio < 1 - threshold an improvement. Cases missing on either side are reported, never failed.
+    """
+    rows = []
+    for name in sorted(set(results) | set(baseline)):
+        current, base = results.get(name), baseline.get(name)
+        if current is None or base is None:
+            rows.append({"name": name, "status": "new" if base is None else "missing"})
+            continue
+        ratio = current["median"] / base["median"] if base["median"] else float("inf")
+        status = "regression" if ratio > 1 + threshold else "faster" if ratio < 1 - threshold else "ok"
+        rows.append({"name": name, "status": status, "ratio": ratio,
+                     "baseline": base["median"], "current": current["median"]})
+    return rows
+
+
+def format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "-"
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def load_report(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_report(path: str, results: Dict[str, dict], comparison: Optional[List[dict]] = None):
+    report = {"environment": environment(), "results": results}
+    if comparison is not None:
+        report["comparison"] = comparison
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
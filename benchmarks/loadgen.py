@@ -0,0 +1,222 @@
+"""
+Open-loop load generator for a running backend (pair it with benchmarks.stub_ollama).
+
+    python -m benchmarks.stub_ollama --latency-ms 800 --tokens-per-second 40 &
+    OLLAMA_HOSTS=127.0.0.1:11435 uvicorn backend.main:app --workers 2 &
+    python -m benchmarks.loadgen --rps 20 --duration 60 --mix generate-onboarding=1,ask-policy=3
+
+Requests are started on a fixed schedule (--rps), whether or not earlier ones have
+finished, so a slow server shows up as latency and errors instead of a lower send rate.
+Latency is measured from the scheduled start, so client-side queueing counts too.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from .harness import environment, format_seconds
+
+# Phrased so the regex fast path gives up and every packet reaches the LLM
+ONBOARDING_TEXTS = [
+    "Alex from the Dubai panel is a yes - same package as we discussed for the platform team.",
+    "Let's bring Priya on board for the data science group in Berlin, numbers as agreed last week.",
+    "Good news: Tom accepted. He'll join the London office in sales, comp per the offer letter.",
+    "Maria is our pick for the Singapore finance role; start her once the paperwork clears.",
+]
+POLICY_QUESTIONS = [
+    "How many days of annual leave do I get?",
+    "Can I carry unused holiday over to next year?",
+    "What is the notice period during probation?",
+    "How do I claim travel expenses?",
+    "Am I allowed to work remotely from another country?",
+]
+ENDPOINTS = {"generate-onboarding": "/generate-onboarding", "ask-policy": "/ask-policy"}
+
+# A failed LLM call still comes back as a 200, so these are spotted in the body:
+# /ask-policy apologises, /generate-onboarding returns ai_service.MOCK_RESPONSE
+FALLBACK_ANSWER_PREFIX = "Sorry, I couldn't process that"
+FALLBACK_CANDIDATE = {"name": "Alex Smith", "email": "alex.smith@example.com", "start_date": "2023-11-01"}
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """'generate-onboarding=1,ask-policy=3' -> relative weights per endpoint."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"unknown endpoint '{name}' (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight) if weight else 1.0
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError("the mix needs at least one endpoint with a positive weight")
+    return mix
+
+
+def request_body(endpoint: str, seq: int) -> dict:
+    if endpoint == "generate-onboarding":
+        # The sequence number keeps each text unique, so the extraction cache never answers
+        return {"raw_text": f"{ONBOARDING_TEXTS[seq % len(ONBOARDING_TEXTS)]} (ref #{seq})"}
+    return {"question": POLICY_QUESTIONS[seq % len(POLICY_QUESTIONS)]}
+
+
+def is_llm_fallback(endpoint: str, body) -> bool:
+    """True if a 200 response is the backend's stand-in for a failed LLM call."""
+    if not isinstance(body, dict):
+        return False
+    if endpoint == "ask-policy":
+        return str(body.get("answer", "")).startswith(FALLBACK_ANSWER_PREFIX)
+    candidate = body.get("candidate") or {}
+    return all(candidate.get(k) == v for k, v in FALLBACK_CANDIDATE.items())
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0..100) of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[min(len(sorted_values), int(rank)) - 1]
+
+
+def summarize(samples: List[Tuple[str, float, str]], elapsed: float) -> dict:
+    """
+    samples: (endpoint, latency seconds, outcome) where outcome is "ok", an HTTP status
+    like "503", "llm_fallback" (a 200 carrying the LLM-failure fallback), "timeout" or
+    "connection". Latency percentiles cover successful requests only.
+    """
+    def block(rows):
+        ok = sorted(latency for _, latency, outcome in rows if outcome == "ok")
+        errors = Counter(outcome for _, _, outcome in rows if outcome != "ok")
+        return {
+            "requests": len(rows),
+            "ok": len(ok),
+            "throughput_rps": len(ok) / elapsed if elapsed else 0.0,
+            "error_rate": (len(rows) - len(ok)) / len(rows) if rows else 0.0,
+            "p50": percentile(ok, 50),
+            "p95": percentile(ok, 95),
+            "p99": percentile(ok, 99),
+            "max": ok[-1] if ok else None,
+            "errors": dict(errors.most_common()),
+        }
+
+    report = {"elapsed_seconds": elapsed, "overall": block(samples), "endpoints": {}}
+    for endpoint in sorted({s[0] for s in samples}):
+        report["endpoints"][endpoint] = block([s for s in samples if s[0] == endpoint])
+    return report
+
+
+async def _send(client: httpx.AsyncClient, endpoint: str, seq: int, scheduled: float,
+                slots: asyncio.Semaphore, samples: list):
+    outcome = "ok"
+    try:
+        async with slots:
+            response = await client.post(ENDPOINTS[endpoint], json=request_body(endpoint, seq))
+        if response.status_code >= 400:
+            outcome = str(response.status_code)
+        else:
+            try:
+                body = response.json()
+            except ValueError:
+                body = None
+            if is_llm_fallback(endpoint, body):
+                outcome = "llm_fallback"
+    except httpx.TimeoutException:
+        outcome = "timeout"
+    except httpx.TransportError:
+        outcome = "connection"
+    samples.append((endpoint, time.perf_counter() - scheduled, outcome))
+
+
+async def run_load(url: str, rps: float, duration: float, mix: Dict[str, float], max_in_flight: int = 256,
+                   timeout: float = 120.0, seed: Optional[int] = None, client: Optional[httpx.AsyncClient] = None,
+                   progress=None) -> dict:
+    """
+    Fires requests at rps for duration seconds, then waits for the stragglers.
+    max_in_flight caps open connections; requests over the cap wait (and that wait counts as latency).
+    """
+    rnd = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    slots = asyncio.Semaphore(max_in_flight)
+    samples: List[Tuple[str, float, str]] = []
+    tasks = []
+    own_client = client is None
+    if own_client:
+        limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+        client = httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits)
+    try:
+        started = time.perf_counter()
+        total = int(rps * duration)
+        for seq in range(total):
+            scheduled = started + seq / rps
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            endpoint = rnd.choices(names, weights)[0]
+            tasks.append(asyncio.create_task(_send(client, endpoint, seq, scheduled, slots, samples)))
+            if progress and seq and seq % max(1, int(rps)) == 0:
+                progress(seq, len(samples))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    finally:
+        if own_client:
+            await client.aclose()
+
+    report = summarize(samples, elapsed)
+    report["config"] = {"url": url, "rps": rps, "duration": duration, "mix": mix,
+                        "max_in_flight": max_in_flight, "timeout": timeout}
+    return report
+
+
+def _print_report(report: dict):
+    print(f"\n{'endpoint':<22}{'requests':>9}{'ok':>7}{'rps':>8}{'p50':>11}{'p95':>11}{'p99':>11}{'max':>11}  errors")
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    for name, stats in rows:
+        errors = ", ".join(f"{k}: {v}" for k, v in stats["errors"].items()) or "-"
+        print(f"{name:<22}{stats['requests']:>9}{stats['ok']:>7}{stats['throughput_rps']:>8.1f}"
+              f"{format_seconds(stats['p50']):>11}{format_seconds(stats['p95']):>11}"
+              f"{format_seconds(stats['p99']):>11}{format_seconds(stats['max']):>11}  {errors}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="backend base URL")
+    parser.add_argument("--rps", type=float, default=10.0, help="target requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to keep sending")
+    parser.add_argument("--mix", default="generate-onboarding=1,ask-policy=1",
+                        help="relative endpoint weights, e.g. generate-onboarding=1,ask-policy=3")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="cap on concurrent connections")
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", default="load_results.json", help="where to write the JSON report")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 2
+    if args.rps <= 0 or args.duration <= 0:
+        print("❌ --rps and --duration must be positive")
+        return 2
+
+    print(f"🚀 {args.rps:g} req/s for {args.duration:g}s against {args.url} "
+          f"({', '.join(f'{k}={v:g}' for k, v in mix.items())})")
+    report = asyncio.run(run_load(
+        args.url, args.rps, args.duration, mix, max_in_flight=args.max_in_flight, timeout=args.timeout,
+        seed=args.seed, progress=lambda sent, done: print(f"  sent {sent}, finished {done}", flush=True),
+    ))
+    _print_report(report)
+
+    report["environment"] = environment()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
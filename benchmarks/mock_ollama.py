@@ -0,0 +1,57 @@
+import json
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+
+def chat_response(content: str, prompt_tokens: int = 300, completion_tokens: int = 80) -> SimpleNamespace:
+    """Just the fields AIService reads from an ollama ChatResponse."""
+    return SimpleNamespace(
+        message=SimpleNamespace(content=content, role="assistant"),
+        prompt_eval_count=prompt_tokens,
+        eval_count=completion_tokens,
+        eval_duration=0,
+        prompt_eval_duration=0,
+        load_duration=0,
+    )
+
+
+class MockOllamaClient:
+    """
+    Stands in for AIService.client / async_client: no network, canned replies.
+    replies(request) -> content string, called with the chat kwargs (messages, format, ...).
+    """
+
+    def __init__(self, replies: Callable[[dict], str]):
+        self.replies = replies
+        self.calls = 0
+
+    def chat(self, model: Optional[str] = None, **kwargs):
+        self.calls += 1
+        return chat_response(self.replies(kwargs))
+
+
+class AsyncMockOllamaClient(MockOllamaClient):
+    async def chat(self, model: Optional[str] = None, **kwargs):
+        self.calls += 1
+        return chat_response(self.replies(kwargs))
+
+
+def scripted(*contents: str) -> Callable[[dict], str]:
+    """Replies with each content in turn (for multi-turn dialogs), then starts over."""
+    queue: List[str] = []
+
+    def reply(request: dict) -> str:
+        if not queue:
+            queue.extend(contents)
+        return queue.pop(0)
+    return reply
+
+
+def candidate_json(**overrides) -> str:
+    data = {
+        "name": "Alex Smith", "role": "Senior DevOps Engineer", "job_family": "Engineering",
+        "email": None, "salary": 25000, "currency": "AED", "start_date": "2026-03-01",
+        "location_country": "UAE", "citizenship": "India", "equity_grant": False,
+    }
+    data.update(overrides)
+    return json.dumps(data)
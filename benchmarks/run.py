@@ -0,0 +1,213 @@
+"""
+Microbenchmarks for the service hot paths. Ollama is mocked, so this runs anywhere.
+
+    python -m benchmarks.run                          # all cases -> bench_results.json
+    python -m benchmarks.run -k pdf --min-time 1      # only cases whose name contains "pdf"
+    python -m benchmarks.run --baseline old.json      # exit 1 if a median got > 20% slower
+"""
+import argparse
+import contextlib
+import dataclasses
+import io
+import os
+import shutil
+import sys
+import tempfile
+from datetime import date
+from typing import List
+
+from .harness import Case, compare, format_seconds, load_report, run_cases, write_report
+from .mock_ollama import MockOllamaClient, candidate_json, scripted
+
+TEMPLATE_DIR = os.path.join("backend", "templates")
+HANDBOOK = os.path.join("data", "handbook.txt")
+
+
+def _copy_templates(workdir: str) -> str:
+    """Templates plus a long contract (every template body, several times over) for the large cases."""
+    template_dir = os.path.join(workdir, "templates")
+    shutil.copytree(TEMPLATE_DIR, template_dir)
+    bodies = []
+    for name in sorted(os.listdir(TEMPLATE_DIR)):
+        if name.endswith(".md"):
+            with open(os.path.join(TEMPLATE_DIR, name), encoding="utf-8") as f:
+                # One clause slot at the very end, like the real templates
+                bodies.append(f.read().replace("{dynamic_clauses}", ""))
+    with open(os.path.join(template_dir, "long_contract.md"), "w", encoding="utf-8") as f:
+        f.write("\n\n".join(bodies * 4) + "\n\n{dynamic_clauses}\n")
+    return template_dir
+
+
+def _big_handbook(workdir: str, copies: int = 200) -> str:
+    path = os.path.join(workdir, "handbook_big.txt")
+    with open(HANDBOOK, encoding="utf-8") as src:
+        text = src.read()
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(copies):
+            f.write(text.replace("\n\n", f"\n\n[Part {i}] ", 1) + "\n\n")
+    return path
+
+
+def build_cases(workdir: str) -> List[Case]:
+    # Imported here so `--help` doesn't pay for (or print from) service start-up
+    from backend.models.schemas import CandidateProfile
+    from backend.services.ai_service import AIService
+    from backend.services.cache import ExtractionCache, RenderCache
+    from backend.services.compliance import ComplianceEngine
+    from backend.services.contract_store import ContractStore
+    from backend.services.jurisdictions import RESOLVER
+    from backend.services.pdf_render import RenderPool
+    from backend.services.pdf_service import PDFService
+    from backend.services.retrieval import HandbookIndex
+    from backend.services.templates import sanitize_text
+
+    cases: List[Case] = []
+    today = date.today()
+
+    # --- Text sanitizing ---
+    with open(os.path.join(TEMPLATE_DIR, "uk_employment.md"), encoding="utf-8") as f:
+        contract_text = f.read()
+    smart = "Zoë O’Neil — “Staff Engineer” … " * 2
+    long_text = (contract_text + smart) * 20
+    cases += [
+        Case("sanitize/sanitize_text[name]", lambda: sanitize_text(smart)),
+        Case("sanitize/sanitize_text[contract x20]", lambda: sanitize_text(long_text)),
+    ]
+
+    # --- AI service with a mocked Ollama client ---
+    ai = AIService(cache=ExtractionCache(path=None), hosts=["127.0.0.1:11434"])
+    prose = ("Following up on yesterday's panel, the team was impressed and wants to move quickly. " * 30)
+    cases += [
+        Case("jurisdiction/determine_jurisdiction[alias]", lambda: ai.determine_jurisdiction("Dubai")),
+        Case("jurisdiction/determine_jurisdiction[unknown]", lambda: ai.determine_jurisdiction("Atlantis")),
+        Case("jurisdiction/determine_jurisdiction[long text]",
+             lambda: ai.determine_jurisdiction(prose + " She will be based in Berlin.")),
+    ]
+
+    well_formed = "Hire Alex Smith as Senior DevOps Engineer in Dubai for 25k AED starting next month."
+    needs_llm = "Alex from the Dubai panel is a yes - same package as we discussed for the platform team."
+    valid = candidate_json()
+    invalid_then_fixed = (candidate_json(salary="a lot", start_date="soon"),
+                          '{"salary": 25000, "start_date": "2026-03-01"}')
+
+    def dialog(client, text):
+        def run():
+            ai.client = client
+            return ai._run_dialog(ai._extraction_dialog(text, today.isoformat()))
+        return run
+
+    def full_extraction():
+        ai.client = MockOllamaClient(scripted(valid))
+        ai.cache.memory.clear()  # every call misses the cache and reaches the (mocked) LLM
+        return ai.extract_candidate_data(needs_llm)
+
+    cases += [
+        Case("extraction/fast_path[well formed]", lambda: ai.fast_extractor.extract(well_formed, today)),
+        Case("extraction/fast_path[long prose]", lambda: ai.fast_extractor.extract(prose, today)),
+        Case("extraction/post_process[valid json]", dialog(MockOllamaClient(scripted(valid)), needs_llm)),
+        Case("extraction/post_process[one repair]",
+             dialog(MockOllamaClient(scripted(*invalid_then_fixed)), needs_llm)),
+        Case("extraction/extract_candidate_data[mocked llm]", full_extraction),
+    ]
+
+    # --- Handbook retrieval ---
+    small = HandbookIndex(HANDBOOK)
+    big = HandbookIndex(_big_handbook(workdir))
+    question = "How many days of annual leave do I get and can I carry them over?"
+    big.search(question)  # build once; the build itself is its own case
+    cases += [
+        Case("handbook/search[handbook]", lambda: small.search(question)),
+        Case("handbook/search[handbook x200]", lambda: big.search(question)),
+        Case("handbook/build_index[handbook x200]", lambda: HandbookIndex(big.path).search(question)),
+    ]
+
+    # --- Compliance ---
+    engine = ComplianceEngine()
+    local_hire = CandidateProfile(name="Ada", location_country="United Kingdom", citizenship="United Kingdom",
+                                  salary=50000, currency="GBP", start_date=today.isoformat())
+    visa_hire = CandidateProfile(name="Alex", location_country="UAE", citizenship="India",
+                                 salary=25000, currency="AED", start_date=today.isoformat())
+    countries = sorted(engine.rules.countries)
+    cohort = [CandidateProfile(name=f"Hire {i}", location_country=countries[i % len(countries)],
+                               citizenship=countries[(i * 7) % len(countries)], salary=1000 + i, currency="USD",
+                               start_date=today.isoformat())
+              for i in range(1000)]
+    cases += [
+        Case("compliance/analyze[local hire]", lambda: engine.analyze(local_hire)),
+        Case("compliance/analyze[visa hire]", lambda: engine.analyze(visa_hire)),
+        Case("compliance/analyze[1000 candidates]", lambda: [engine.analyze(c) for c in cohort]),
+    ]
+
+    # --- Contract PDFs (rendered inline; ttl 0 keeps the download store from growing) ---
+    def pdf_service(render_cache_bytes: int) -> PDFService:
+        service = PDFService(render_pool=RenderPool(workers=0),
+                             store=ContractStore(os.path.join(workdir, "contracts"), ttl_seconds=0),
+                             render_cache=RenderCache(render_cache_bytes))
+        service.template_dir = template_dir
+        return service
+
+    template_dir = _copy_templates(workdir)
+    cold, warm = pdf_service(0), pdf_service(32 * 1024 * 1024)
+    uae = RESOLVER.from_label("DIFC Employment Law (UAE)")
+    long_contract = dataclasses.replace(RESOLVER.from_label("German Civil Code (BGB)"),
+                                        template_file="long_contract.md")
+    executive = visa_hire.model_copy(update={"job_family": "Executive"})
+    cases += [
+        Case("pdf/generate_contract[uae]", lambda: cold.generate_contract(visa_hire, uae)),
+        Case("pdf/generate_contract[long + executive clause]", lambda: cold.generate_contract(executive, long_contract)),
+        Case("pdf/generate_contract[render cache hit]", lambda: warm.generate_contract(executive, long_contract)),
+    ]
+    return cases
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent timing each case")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the JSON report")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown vs the baseline median (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="onboarding-bench-")
+    try:
+        # Service start-up chatter (emoji logs) would drown the table
+        with contextlib.redirect_stdout(io.StringIO()):
+            cases = [c for c in build_cases(workdir) if args.filter in c.name]
+        if not cases:
+            print(f"No benchmark matches '{args.filter}'")
+            return 2
+
+        print(f"⏱️ Running {len(cases)} benchmarks ({args.min_time}s each)")
+        console = sys.stdout
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = run_cases(cases, args.min_time, log=lambda line: print(line, file=console, flush=True))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    comparison = None
+    if args.baseline:
+        baseline = {name: stats for name, stats in load_report(args.baseline)["results"].items()
+                    if args.filter in name}
+        comparison = compare(results, baseline, args.threshold)
+        print(f"\n📊 Against {args.baseline} (threshold {args.threshold:.0%}):")
+        for row in comparison:
+            if "ratio" in row:
+                print(f"  {row['status']:<10} {row['name']:<52} {format_seconds(row['baseline']):>10} -> "
+                      f"{format_seconds(row['current']):>10}  x{row['ratio']:.2f}")
+            else:
+                print(f"  {row['status']:<10} {row['name']}")
+
+    write_report(args.output, results, comparison)
+    print(f"💾 Results written to {args.output}")
+
+    regressions = [row for row in comparison or [] if row["status"] == "regression"]
+    if regressions:
+        print(f"❌ {len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""
+A stand-in Ollama server for load tests: same /api/chat wire format, no GPU.
+
+    python -m benchmarks.stub_ollama --port 11435 --latency lognormal --latency-ms 800 \\
+        --tokens-per-second 40 --error-rate 0.02
+    OLLAMA_HOSTS=127.0.0.1:11435 make backend
+
+Each reply waits for a "prompt" latency drawn from the chosen distribution, then
+generates its tokens at --tokens-per-second (streamed one by one when stream=true).
+Requests with a JSON schema in "format" get a candidate JSON object limited to the
+schema's properties; everything else gets a short policy answer.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from .mock_ollama import candidate_json
+
+POLICY_ANSWER = "You get *25 days* of paid annual leave per year, and up to 5 unused days carry over to the next year."
+
+# Latency distributions, parameterised by their mean (ms) and jitter (ms, or sigma for lognormal)
+DISTRIBUTIONS = ("fixed", "uniform", "normal", "exponential", "lognormal")
+
+
+class StubSettings:
+    def __init__(self, model: str = "ministral-3", latency: str = "lognormal", latency_ms: float = 500.0,
+                 jitter_ms: float = 200.0, sigma: float = 0.5, tokens_per_second: float = 50.0,
+                 error_rate: float = 0.0, seed: Optional[int] = None):
+        if latency not in DISTRIBUTIONS:
+            raise ValueError(f"latency must be one of {DISTRIBUTIONS}")
+        self.model = model
+        self.latency = latency
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.sigma = sigma
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "errors": 0, "streams": 0}
+
+    def prompt_delay(self) -> float:
+        """Seconds before the first token."""
+        mean, rnd = self.latency_ms / 1000.0, self.random
+        if self.latency == "fixed":
+            delay = mean
+        elif self.latency == "uniform":
+            delay = rnd.uniform(mean - self.jitter_ms / 1000.0, mean + self.jitter_ms / 1000.0)
+        elif self.latency == "normal":
+            delay = rnd.gauss(mean, self.jitter_ms / 1000.0)
+        elif self.latency == "exponential":
+            delay = rnd.expovariate(1.0 / mean) if mean > 0 else 0.0
+        else:
+            # lognormal with the requested median; long right tail like a busy GPU
+            delay = mean * rnd.lognormvariate(0.0, self.sigma)
+        return max(0.0, delay)
+
+    def token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+
+def _tokens(text: str):
+    """Words with their leading whitespace, a rough stand-in for model tokens."""
+    return re.findall(r"\s*\S+", text)
+
+
+def _reply_content(body: dict) -> str:
+    schema = body.get("format")
+    if isinstance(schema, dict):
+        wanted = set(schema.get("properties", {}))
+        data = json.loads(candidate_json())
+        return json.dumps({k: v for k, v in data.items() if not wanted or k in wanted})
+    if schema == "json":
+        return candidate_json()
+    return POLICY_ANSWER
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def create_app(settings: StubSettings) -> FastAPI:
+    app = FastAPI(title="Stub Ollama")
+
+    @app.get("/api/version")
+    async def version():
+        return {"version": "0.0.0-stub"}
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": settings.model, "model": settings.model}]}
+
+    @app.get("/stats")
+    async def stats():
+        return settings.stats
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        settings.stats["requests"] += 1
+        started = time.perf_counter()
+        prompt_delay = settings.prompt_delay()
+        await asyncio.sleep(prompt_delay)
+
+        if settings.random.random() < settings.error_rate:
+            settings.stats["errors"] += 1
+            return JSONResponse(status_code=500, content={"error": "stub: injected model failure"})
+
+        content = _reply_content(body)
+        tokens = _tokens(content)
+        prompt_tokens = sum(len(m.get("content", "")) for m in body.get("messages", [])) // 4
+        model = body.get("model") or settings.model
+
+        def final(extra: dict) -> dict:
+            return {
+                "model": model, "created_at": _now(), "done": True, "done_reason": "stop",
+                "total_duration": int((time.perf_counter() - started) * 1e9),
+                "load_duration": 0,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int(prompt_delay * 1e9),
+                "eval_count": len(tokens),
+                "eval_duration": int(len(tokens) * settings.token_delay() * 1e9),
+                **extra,
+            }
+
+        if not body.get("stream", True):
+            await asyncio.sleep(len(tokens) * settings.token_delay())
+            return final({"message": {"role": "assistant", "content": content}})
+
+        settings.stats["streams"] += 1
+
+        async def parts():
+            for token in tokens:
+                await asyncio.sleep(settings.token_delay())
+                yield json.dumps({"model": model, "created_at": _now(), "done": False,
+                                  "message": {"role": "assistant", "content": token}}) + "\n"
+            yield json.dumps(final({"message": {"role": "assistant", "content": ""}})) + "\n"
+
+        return StreamingResponse(parts(), media_type="application/x-ndjson")
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--model", default="ministral-3")
+    parser.add_argument("--latency", choices=DISTRIBUTIONS, default="lognormal",
+                        help="distribution of the time to first token")
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="mean (median for lognormal)")
+    parser.add_argument("--jitter-ms", type=float, default=200.0, help="spread for uniform / normal")
+    parser.add_argument("--sigma", type=float, default=0.5, help="shape for lognormal")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="generation speed (0 = instant)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with a 500")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    settings = StubSettings(
+        model=args.model, latency=args.latency, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        sigma=args.sigma, tokens_per_second=args.tokens_per_second, error_rate=args.error_rate, seed=args.seed,
+    )
+    print(f"🦙 Stub Ollama on http://{args.host}:{args.port} ({args.latency}, {args.latency_ms:.0f} ms, "
+          f"{args.tokens_per_second:g} tok/s, {args.error_rate:.0%} errors)")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
+import json
 import requests
 import os
 
-BASE_URL = "http://127.0.0.1:8000"
+# Set BACKEND_URL when the API runs on another host
+BASE_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
 
 def generate_onboarding_packet(raw_text):
     """
@@ -33,11 +35,31 @@ def ask_policy_question(question):
     except Exception as e:
         return {"answer": f"⚠️ Error connecting to HR Brain: {e}"}
 
-def get_file_content(file_path):
+def stream_policy_question(question):
     """
-    Helper to read the generated PDF for display.
+    Streams the HR Policy Bot answer token by token (for st.write_stream).
     """
-    if os.path.exists(file_path):
-        with open(file_path, "rb") as f:
-            return f.read()
-    return None
\ No newline at end of file
+    try:
+        with requests.post(
+            f"{BASE_URL}/ask-policy/stream",
+            json={"question": question},
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    yield json.loads(line).get("token", "")
+    except Exception as e:
+        yield f"⚠️ Error connecting to HR Brain: {e}"
+
+def get_file_content(contract_url):
+    """
+    Helper to fetch the generated PDF for display.
+    contract_url is the '/contracts/{id}' path returned in generated_files.
+    """
+    try:
+        response = requests.get(f"{BASE_URL}{contract_url}")
+        response.raise_for_status()
+        return response.content
+    except Exception:
+        return None
\ No newline at end of file
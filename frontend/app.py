@@ -2,7 +2,7 @@ import streamlit as st
 import base64
 import difflib
 import os
-from api_client import generate_onboarding_packet, get_file_content, ask_policy_question
+from api_client import generate_onboarding_packet, get_file_content, stream_policy_question
 
 # 1. Page Config
 st.set_page_config(
@@ -197,8 +197,8 @@ if app_mode == "🚀 Onboarding Engine":
             with c_act1:
                  # PDF Preview
                 st.markdown("#### 📄 PDF Preview")
-                pdf_path = data["generated_files"][0]
-                pdf_bytes = get_file_content(pdf_path)
+                pdf_url = data["generated_files"][0]
+                pdf_bytes = get_file_content(pdf_url)
                 if pdf_bytes:
                     base64_pdf = base64.b64encode(pdf_bytes).decode('utf-8')
                     pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height="600" type="application/pdf"></iframe>'
@@ -252,11 +252,8 @@ elif app_mode == "💬 Ask HR Assistant":
         with st.chat_message("user", avatar="👤"):
             st.write(prompt)
 
-        # AI Response
+        # AI Response (rendered token by token as it streams in)
         with st.chat_message("assistant", avatar="🤖"):
-            with st.spinner("Consulting the handbook..."):
-                data = ask_policy_question(prompt)
-                answer = data.get("answer", "Error retrieving answer.")
-                st.write(answer)
+            answer = st.write_stream(stream_policy_question(prompt)) or "Error retrieving answer."
         
         st.session_state["chat_history"].append({"role": "assistant", "content": answer})
\ No newline at end of file
@@ -1,11 +1,21 @@
+import atexit
 import pytest
+import shutil
 import sys
 import os
+import tempfile
 from unittest.mock import MagicMock
 
 # Add project root to path so we can import backend modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Databases the app opens at import go to a scratch dir, never the real data/ files
+# (set before anything imports backend.config)
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="onboarding-tests-")
+atexit.register(shutil.rmtree, TEST_DATA_DIR, ignore_errors=True)
+os.environ["HISTORY_DB_PATH"] = os.path.join(TEST_DATA_DIR, "onboarding.sqlite3")
+os.environ["JOBS_DB_PATH"] = os.path.join(TEST_DATA_DIR, "jobs.sqlite3")
+
 from backend.models.schemas import CandidateProfile
 
 @pytest.fixture
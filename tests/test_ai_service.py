@@ -1,12 +1,14 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, patch
-from backend.services.ai_service import AIService
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.services.ai_service import AIService, ExtractionFailed
+from backend.services.cache import ExtractionCache
 
 @pytest.fixture
 def ai_service():
     # Patch the Client init so we don't try to connect to real Ollama
-    with patch("backend.services.ai_service.Client") as mock_client:
-        service = AIService()
+    with patch("backend.services.ollama_pool.Client") as mock_client:
+        service = AIService(cache=ExtractionCache(path=None))
         service.client = MagicMock()
         yield service
 
@@ -36,3 +38,156 @@ def test_extract_candidate_fallback_on_error(ai_service):
     # Should return MOCK_RESPONSE
     assert result.name == "Alex Smith"
     assert result.role == "Senior DevOps Engineer"
+
+@pytest.mark.asyncio
+async def test_extract_candidate_async(ai_service):
+    mock_response = MagicMock()
+    mock_response.message.content = '{"name": "Jane Roe", "role": "QA", "job_family": "Engineering"}'
+    ai_service.async_client = MagicMock()
+    ai_service.async_client.chat = AsyncMock(return_value=mock_response)
+
+    result = await ai_service.extract_candidate_data_async("Hire Jane Roe")
+    assert result.name == "Jane Roe"
+    ai_service.async_client.chat.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_extract_candidate_async_timeout_falls_back(ai_service):
+    async def slow_chat(**kwargs):
+        await asyncio.sleep(5)
+
+    ai_service.timeout = 0.01
+    ai_service.async_client = MagicMock()
+    ai_service.async_client.chat = slow_chat
+
+    result = await ai_service.extract_candidate_data_async("Hire someone slow")
+    assert result.name == "Alex Smith"
+
+@pytest.mark.asyncio
+async def test_strict_extraction_raises_instead_of_falling_back(ai_service):
+    async def failing_chat(**kwargs):
+        await asyncio.sleep(0.01)
+        raise ConnectionError("Ollama Down")
+
+    ai_service.async_client = MagicMock()
+    ai_service.async_client.chat = failing_chat
+
+    # Both callers share the one failed generation; only the strict one raises
+    lenient, strict = await asyncio.gather(
+        ai_service.extract_candidate_data_async("Hire someone"),
+        ai_service.extract_candidate_data_async("Hire someone", strict=True),
+        return_exceptions=True,
+    )
+    assert lenient.name == "Alex Smith"
+    assert isinstance(strict, ExtractionFailed) and "Ollama Down" in str(strict)
+
+def test_extract_candidate_uses_cache(ai_service):
+    mock_response = MagicMock()
+    mock_response.message.content = '{"name": "John Doe", "role": "Dev"}'
+    ai_service.client.chat.return_value = mock_response
+
+    first = ai_service.extract_candidate_data("Hire   John Doe")
+    second = ai_service.extract_candidate_data("Hire John Doe ")
+    assert first == second
+    assert ai_service.client.chat.call_count == 1
+    assert ai_service.cache.stats["memory_hits"] == 1
+
+def test_extract_candidate_fallback_not_cached(ai_service):
+    ai_service.client.chat.side_effect = Exception("Ollama Down")
+    ai_service.extract_candidate_data("Hire someone")
+    ai_service.extract_candidate_data("Hire someone")
+    assert ai_service.client.chat.call_count == 2
+
+@pytest.mark.asyncio
+async def test_stream_policy_answer_yields_tokens(ai_service):
+    async def parts():
+        for token in ["Up ", "to ", "4 weeks."]:
+            part = MagicMock()
+            part.message.content = token
+            yield part
+
+    ai_service.async_client = MagicMock()
+    ai_service.async_client.chat = AsyncMock(return_value=parts())
+
+    tokens = [t async for t in ai_service.stream_policy_answer("Remote work?")]
+    assert "".join(tokens) == "Up to 4 weeks."
+    assert ai_service.async_client.chat.call_args.kwargs["stream"] is True
+
+@pytest.mark.asyncio
+async def test_async_calls_respect_concurrency_cap(ai_service):
+    active, peak = 0, 0
+
+    async def chat(**kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        response = MagicMock()
+        response.message.content = "ok"
+        return response
+
+    ai_service.llm_slots = asyncio.Semaphore(2)
+    ai_service.async_client = MagicMock()
+    ai_service.async_client.chat = chat
+
+    await asyncio.gather(*(ai_service.answer_policy_question_async(f"q{i}") for i in range(6)))
+    assert peak == 2
+
+def test_extract_candidate_fast_path_skips_llm(ai_service):
+    result = ai_service.extract_candidate_data("Hire Alex Smith as Senior DevOps Engineer in Dubai for 25k AED")
+    assert result.name == "Alex Smith"
+    assert result.salary == 25000
+    ai_service.client.chat.assert_not_called()
+    assert ai_service.fast_extractor.stats["hits"] == 1
+
+@pytest.mark.asyncio
+async def test_duplicate_async_extractions_share_one_llm_call(ai_service):
+    async def chat(**kwargs):
+        await asyncio.sleep(0.01)
+        response = MagicMock()
+        response.message.content = '{"name": "John Doe", "role": "Dev"}'
+        return response
+
+    ai_service.async_client = MagicMock()
+    ai_service.async_client.chat = AsyncMock(side_effect=chat)
+
+    results = await asyncio.gather(*(ai_service.extract_candidate_data_async("Hire John Doe") for _ in range(3)))
+    assert all(r.name == "John Doe" for r in results)
+    assert ai_service.async_client.chat.await_count == 1
+
+def _chat_response(content):
+    response = MagicMock()
+    response.message.content = content
+    return response
+
+def test_extraction_uses_schema_and_repairs_only_invalid_fields(ai_service):
+    ai_service.client.chat.side_effect = [
+        _chat_response('{"name": "John Doe", "role": "Dev", "salary": "lots"}'),
+        _chat_response('{"salary": 5000}'),
+    ]
+
+    result = ai_service.extract_candidate_data("Hire John Doe for lots")
+    assert (result.name, result.salary) == ("John Doe", 5000.0)
+
+    first, repair = ai_service.client.chat.call_args_list
+    assert "job_family" in first.kwargs["format"]["properties"]
+    assert list(repair.kwargs["format"]["properties"]) == ["salary"]
+    assert "salary" in repair.kwargs["messages"][-1]["content"]
+
+def test_extraction_drops_fields_still_invalid_after_repairs(ai_service):
+    ai_service.max_repairs = 1
+    ai_service.client.chat.side_effect = [
+        _chat_response('{"name": "John Doe", "salary": "lots"}'),
+        _chat_response('{"salary": "still lots"}'),
+    ]
+
+    result = ai_service.extract_candidate_data("Hire John Doe for still lots")
+    assert (result.name, result.salary) == ("John Doe", 0.0)
+    assert ai_service.client.chat.call_count == 2
+
+def test_extraction_regenerates_on_malformed_json(ai_service):
+    ai_service.client.chat.side_effect = [
+        _chat_response('{"name": "John'),
+        _chat_response('{"name": "John Doe"}'),
+    ]
+    assert ai_service.extract_candidate_data("Hire John Doe again").name == "John Doe"
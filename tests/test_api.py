@@ -1,7 +1,12 @@
+import io
+import json
+import os
+import zipfile
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock, patch
-from backend.main import app
+from unittest.mock import AsyncMock, MagicMock, patch
+from backend.main import app, history, job_queue
+from backend.services.jobs import JobStore
 
 # Initialize TestClient
 client = TestClient(app)
@@ -19,10 +24,11 @@ def mock_services(mocker):
         name="Test", location_country="UAE", job_family="General", 
         citizenship="UAE", role="Tester", salary=1000, currency="USD"
     )
-    mocker.patch("backend.main.ai_service.extract_candidate_data", return_value=mock_candidate)
+    mocker.patch("backend.main.ai_service.extract_candidate_data_async", new_callable=AsyncMock, return_value=mock_candidate)
     mocker.patch("backend.main.ai_service.determine_jurisdiction", return_value="DIFC Law")
     mocker.patch("backend.main.pdf_service.generate_contract", return_value={
-        "path": "dummy.pdf",
+        "contract_id": "dummy",
+        "url": "/contracts/dummy",
         "original_text": "template",
         "final_text": "filled"
     })
@@ -40,11 +46,182 @@ def test_generate_onboarding(mock_services):
     assert response.status_code == 200
     data = response.json()
     assert data["jurisdiction_detected"] == "DIFC Law"
-    assert "dummy.pdf" in data["generated_files"]
+    assert "/contracts/dummy" in data["generated_files"]
 
 def test_ask_policy(mocker):
-    mocker.patch("backend.main.ai_service.answer_policy_question", return_value="You can work remotely.")
+    mocker.patch("backend.main.ai_service.answer_policy_question_async", new_callable=AsyncMock, return_value="You can work remotely.")
     
     response = client.post("/ask-policy", json={"question": "Remote work?"})
     assert response.status_code == 200
     assert response.json()["answer"] == "You can work remotely."
+
+def test_ask_policy_stream(mocker):
+    async def fake_stream(question):
+        for token in ["You ", "can ", "work remotely."]:
+            yield token
+
+    mocker.patch("backend.main.ai_service.stream_policy_answer", side_effect=fake_stream)
+
+    response = client.post("/ask-policy/stream", json={"question": "Remote work?"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    tokens = [json.loads(line)["token"] for line in response.text.splitlines()]
+    assert "".join(tokens) == "You can work remotely."
+
+def test_generate_onboarding_batch_streams_per_item_results(mock_services, mocker):
+    mocker.patch("backend.main.pdf_service.generate_contract", side_effect=[
+        {"contract_id": "a", "url": "/contracts/a", "original_text": "t", "final_text": "f"},
+        RuntimeError("PDF failed"),
+    ])
+
+    response = client.post("/generate-onboarding/batch", json=[
+        {"raw_text": "Hire A"},
+        {"raw_text": "Hire B"},
+    ])
+    assert response.status_code == 200
+    lines = sorted((json.loads(l) for l in response.text.splitlines()), key=lambda r: r["status"])
+    assert [r["status"] for r in lines] == ["error", "ok"]
+    assert lines[0]["error"] == "PDF failed"
+    assert lines[1]["package"]["generated_files"] == ["/contracts/a"]
+
+@pytest.fixture
+def failing_llm(mocker):
+    # The LLM is down and the fast path can't help: strict callers must not see "Alex Smith"
+    mocker.patch("backend.main.ai_service._extract_without_llm_async", new_callable=AsyncMock, return_value=None)
+    mocker.patch("backend.main.ai_service._extract_with_llm_async", new_callable=AsyncMock,
+                 side_effect=ConnectionError("Ollama Down"))
+
+def test_generate_onboarding_batch_reports_llm_failures(failing_llm):
+    response = client.post("/generate-onboarding/batch", json=[{"raw_text": "Hire A"}])
+    [line] = [json.loads(l) for l in response.text.splitlines()]
+    assert line["status"] == "error"
+    assert "Ollama Down" in line["error"]
+
+def test_generate_onboarding_batch_too_large(mocker):
+    mocker.patch("backend.main.BATCH_MAX_ITEMS", 1)
+    response = client.post("/generate-onboarding/batch", json=[{"raw_text": "a"}, {"raw_text": "b"}])
+    assert response.status_code == 413
+
+def test_bulk_contracts_stream_a_zip_with_manifest(mocker):
+    mocker.patch("backend.main.pdf_service.render_contract", side_effect=[
+        {"pdf": b"%PDF-A", "filename": "Contract_Ada_1.pdf", "original_text": "t", "final_text": "f"},
+        RuntimeError("PDF failed"),
+    ])
+    response = client.post("/contracts/bulk", json=[
+        {"name": "Ada", "location_country": "UK", "salary": 50000, "currency": "GBP"},
+        {"name": "Bob", "location_country": "Germany"},
+    ])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.testzip() is None
+    names = archive.namelist()
+    assert names[-1] == "manifest.json"
+    manifest = json.loads(archive.read("manifest.json"))["contracts"]
+    assert [e["index"] for e in manifest] == [0, 1]
+    ok = next(e for e in manifest if e["status"] == "ok")
+    failed = next(e for e in manifest if e["status"] == "error")
+    assert archive.read(ok["file"]) == b"%PDF-A"
+    assert ok["jurisdiction"] and isinstance(ok["compliance_alerts"], list)
+    assert failed["error"] == "PDF failed" and "file" not in failed
+
+def test_bulk_contract_names_are_ascii(mocker):
+    mocker.patch("backend.main.pdf_service.render_contract", return_value={
+        "pdf": b"%PDF-A", "filename": 'Contract_محمد_"علي"/../x_1.pdf', "original_text": "t", "final_text": "f",
+    })
+    response = client.post("/contracts/bulk", json=[{"name": "محمد علي", "location_country": "UAE"}])
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == ["0001_Contract_x_1.pdf", "manifest.json"]
+
+def test_bulk_contracts_too_large(mocker):
+    mocker.patch("backend.main.BATCH_MAX_ITEMS", 1)
+    response = client.post("/contracts/bulk", json=[{"name": "a"}, {"name": "b"}])
+    assert response.status_code == 413
+
+def test_submit_job_returns_immediately(mocker):
+    mocker.patch("backend.main.job_queue.store", JobStore())
+    mocker.patch("backend.services.jobs.resolve_host", new_callable=AsyncMock, return_value=["93.184.216.34"])
+    response = client.post("/jobs", json={"raw_text": "Hire Ada", "callback_url": "http://hr.example/hook"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+    assert response.json()["url"] == f"/jobs/{job_id}"
+
+    status = client.get(f"/jobs/{job_id}").json()
+    assert status["status"] == "queued"
+    assert set(status["stages"]) == {"extraction", "jurisdiction", "contract", "compliance"}
+    assert client.get("/jobs/unknown").status_code == 404
+
+def test_submit_job_rejects_non_http_callbacks():
+    for url in ("ftp://hr.example/hook", "file:///etc/passwd", "not a url"):
+        assert client.post("/jobs", json={"raw_text": "Hire Ada", "callback_url": url}).status_code == 422
+
+def test_submit_job_rejects_internal_callbacks(mocker):
+    store = JobStore()
+    mocker.patch("backend.main.job_queue.store", store)
+    mocker.patch("backend.services.jobs.resolve_host", new_callable=AsyncMock, return_value=["169.254.169.254"])
+    response = client.post("/jobs", json={"raw_text": "Hire Ada", "callback_url": "http://metadata.internal/hook"})
+    assert response.status_code == 400
+    assert "non-public" in response.json()["detail"]
+    assert store.counts() == {}
+
+@pytest.mark.asyncio
+async def test_job_runs_the_onboarding_pipeline(mock_services, mocker):
+    from backend.main import job_queue
+    mocker.patch.object(job_queue, "store", JobStore())
+    job = job_queue.submit("Hire someone")
+    await job_queue.process(job["job_id"])
+
+    done = job_queue.store.get(job["job_id"])
+    assert done["status"] == "done"
+    assert set(done["stages"].values()) == {"done"}
+    assert done["result"]["candidate"]["name"] == "Test"
+    assert done["result"]["generated_files"] == ["/contracts/dummy"]
+
+@pytest.mark.asyncio
+async def test_job_fails_when_extraction_fails(failing_llm, mocker):
+    mocker.patch.object(job_queue, "store", JobStore())
+    job = job_queue.submit("Hire someone")
+    await job_queue.process(job["job_id"])
+
+    failed = job_queue.store.get(job["job_id"])
+    assert failed["status"] == "failed"
+    assert "Ollama Down" in failed["error"]
+
+def test_app_databases_are_not_the_real_ones():
+    for path in (history.path, job_queue.store.path):
+        assert not os.path.abspath(path).startswith(os.path.abspath("data"))
+
+def test_onboarding_history_endpoints(mock_services, mocker, tmp_path):
+    from backend.database import OnboardingHistory
+    history = OnboardingHistory(str(tmp_path / "history.sqlite3"))
+    mocker.patch("backend.main.history", history)
+    client.post("/generate-onboarding", json={"raw_text": "Hire someone"})
+    history.flush()
+
+    page = client.get("/onboarding/history", params={"name": "test", "jurisdiction": "DIFC Law"}).json()
+    assert [item["candidate_name"] for item in page["items"]] == ["Test"]
+    assert page["next_cursor"] is None
+
+    record = client.get(f"/onboarding/history/{page['items'][0]['id']}").json()
+    assert record["package"]["generated_files"] == ["/contracts/dummy"]
+    assert client.get("/onboarding/history/999").status_code == 404
+    assert client.get("/onboarding/history", params={"limit": 0}).status_code == 400
+    history.close()
+
+def test_metrics_endpoint_reports_stages(mock_services):
+    client.post("/generate-onboarding", json={"raw_text": "Hire someone"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    for stage in ("extraction", "jurisdiction", "pdf", "compliance", "serialization"):
+        assert f'onboarding_stage_seconds_count{{stage="{stage}"}}' in response.text
+    assert "extraction_cache_hit_ratio" in response.text
+
+def test_generate_onboarding_backpressure(mock_services, mocker):
+    from backend.services.pdf_render import RenderQueueFull
+    mocker.patch("backend.main.pdf_service.generate_contract", side_effect=RenderQueueFull("busy"))
+    response = client.post("/generate-onboarding", json={"raw_text": "Hire someone"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
@@ -0,0 +1,113 @@
+import json
+
+import httpx
+import ollama
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.services.ai_service import MOCK_RESPONSE
+
+from benchmarks.harness import compare, measure
+from benchmarks.loadgen import is_llm_fallback, parse_mix, percentile, run_load, summarize
+from benchmarks.mock_ollama import MockOllamaClient, candidate_json, scripted
+from benchmarks.run import build_cases
+from benchmarks.stub_ollama import StubSettings, create_app
+
+
+def test_measure_reports_seconds_per_call():
+    stats = measure(lambda: sum(range(100)), min_time=0.01, min_rounds=3)
+    assert stats["rounds"] >= 3 and stats["loops"] >= 1
+    assert 0 < stats["min"] <= stats["median"] <= stats["p95"]
+
+
+def test_compare_flags_only_slowdowns_beyond_the_threshold():
+    baseline = {"a": {"median": 1.0}, "b": {"median": 1.0}, "c": {"median": 1.0}, "gone": {"median": 1.0}}
+    current = {"a": {"median": 1.1}, "b": {"median": 1.5}, "c": {"median": 0.5}, "new": {"median": 1.0}}
+    status = {row["name"]: row["status"] for row in compare(current, baseline, threshold=0.2)}
+    assert status == {"a": "ok", "b": "regression", "c": "faster", "gone": "missing", "new": "new"}
+
+
+def test_mock_client_replays_the_script():
+    client = MockOllamaClient(scripted("one", "two"))
+    assert [client.chat(model="m").message.content for _ in range(3)] == ["one", "two", "one"]
+
+
+def test_every_case_runs(tmp_path):
+    cases = build_cases(str(tmp_path))
+    assert len({case.name for case in cases}) == len(cases)
+    for case in cases:
+        case.fn()
+
+
+def stub_client(**settings) -> ollama.Client:
+    """An ollama.Client whose HTTP calls land on the stub app in-process."""
+    app = create_app(StubSettings(latency="fixed", latency_ms=0, tokens_per_second=0, seed=1, **settings))
+    client = ollama.Client(host="http://stub")
+    client._client = TestClient(app, base_url="http://stub")
+    return client
+
+
+def test_stub_ollama_speaks_the_chat_wire_format():
+    client = stub_client()
+    schema = {"type": "object", "properties": {"name": {}, "salary": {}}}
+    reply = client.chat(model="m", messages=[{"role": "user", "content": "hire Alex"}], format=schema)
+    assert json.loads(reply.message.content) == {"name": "Alex Smith", "salary": 25000}
+    assert reply.eval_count > 0
+
+    parts = list(client.chat(model="m", messages=[{"role": "user", "content": "leave?"}], stream=True))
+    assert parts[-1].done and not parts[0].done
+    assert "25 days" in "".join(p.message.content for p in parts)
+
+
+def test_stub_ollama_injects_errors():
+    client = stub_client(error_rate=1.0)
+    with pytest.raises(ollama.ResponseError):
+        client.chat(model="m", messages=[{"role": "user", "content": "hi"}])
+
+
+def test_percentile_and_summary():
+    assert percentile([], 50) is None
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+    assert percentile(list(range(1, 101)), 99) == 99
+    report = summarize([("a", 0.1, "ok"), ("a", 0.3, "ok"), ("b", 5.0, "timeout"), ("b", 0.2, "503")], elapsed=2.0)
+    assert report["overall"]["throughput_rps"] == 1.0
+    assert report["overall"]["errors"] == {"timeout": 1, "503": 1}
+    assert report["endpoints"]["a"]["p99"] == 0.3 and report["endpoints"]["b"]["p50"] is None
+
+
+def test_parse_mix_rejects_unknown_endpoints():
+    assert parse_mix("generate-onboarding=1,ask-policy=3") == {"generate-onboarding": 1.0, "ask-policy": 3.0}
+    with pytest.raises(ValueError):
+        parse_mix("delete-everything=1")
+
+
+@pytest.mark.asyncio
+async def test_run_load_counts_every_scheduled_request():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200 if request.url.path == "/ask-policy" else 503, json={})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://backend") as client:
+        report = await run_load("http://backend", rps=200, duration=0.1, mix={"generate-onboarding": 1, "ask-policy": 1},
+                                seed=3, client=client)
+    assert report["overall"]["requests"] == 20
+    assert report["endpoints"]["ask-policy"]["errors"] == {}
+    assert set(report["endpoints"]["generate-onboarding"]["errors"]) == {"503"}
+
+
+@pytest.mark.asyncio
+async def test_run_load_counts_llm_fallbacks_as_errors():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/ask-policy":
+            return httpx.Response(200, json={"answer": "Sorry, I couldn't process that. Error: ResponseError()"})
+        return httpx.Response(200, json={"candidate": MOCK_RESPONSE, "generated_files": []})
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://backend") as client:
+        report = await run_load("http://backend", rps=200, duration=0.1, mix={"generate-onboarding": 1, "ask-policy": 1},
+                                seed=3, client=client)
+    assert report["overall"]["ok"] == 0
+    assert report["overall"]["errors"] == {"llm_fallback": 20}
+
+
+def test_real_answers_are_not_fallbacks():
+    assert not is_llm_fallback("generate-onboarding", {"candidate": json.loads(candidate_json())})
+    assert not is_llm_fallback("ask-policy", {"answer": "You get 25 days of annual leave."})
@@ -0,0 +1,161 @@
+import io
+import json
+import random
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.models.schemas import CandidateProfile
+from backend.services.bulk_audit import BulkAuditor, load_csv, load_table
+from backend.services.compliance import ComplianceEngine
+from backend.services.jurisdictions import Jurisdiction, JurisdictionResolver
+
+client = TestClient(app)
+
+NOW = datetime(2025, 3, 10, 14, 30)
+LOCATIONS = ["UAE", "Dubai", "London", "United Kingdom", "Berlin", "DE", "France", "usa",
+             "Holland", "Netherlands", "United States", "Narnia", "Unknown", None]
+CITIZENSHIPS = ["British", "United Kingdom", "Germany", "UAE", "France", "India", "The Netherlands", "USA", None]
+
+
+def random_rows(n, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        offset = rng.randint(-40, 150)
+        start = rng.choice([
+            (NOW + timedelta(days=offset)).strftime("%Y-%m-%d"),
+            (NOW + timedelta(days=offset)).strftime("%Y-%m-%d"),
+            "2025-13-40", "next week", None,
+        ])
+        rows.append({
+            "citizenship": rng.choice(CITIZENSHIPS),
+            "location_country": rng.choice(LOCATIONS),
+            "salary": rng.choice([None, 0.0, 3000.0, 4999.0, 5000.0, 18000.0, 24999.5, 60000.0]),
+            "currency": rng.choice(["AED", "GBP", "EUR", None]),
+            "start_date": start,
+        })
+    return rows
+
+
+def scalar_alerts(engine, rows):
+    expected = []
+    for index, row in enumerate(rows):
+        # A missing location falls back to the schema default ("Unknown"), as in the bulk path
+        fields = {k: v for k, v in row.items() if not (k == "location_country" and v is None)}
+        candidate = CandidateProfile(**fields)
+        for alert in engine.analyze(candidate, now=NOW)["alerts"]:
+            expected.append({"index": index, **alert})
+    return expected
+
+
+def test_vectorized_audit_matches_scalar_path():
+    engine = ComplianceEngine()
+    rows = random_rows(3000)
+    columns = {name: [row[name] for row in rows] for name in rows[0]}
+
+    # Small chunks so grouping and re-ordering across chunk borders is exercised
+    bulk = list(BulkAuditor(engine, chunk_size=257).audit(columns, now=NOW))
+    assert bulk == scalar_alerts(engine, rows)
+    assert len(bulk) > 1000
+
+
+def test_csv_loader_fills_missing_columns():
+    columns = load_csv(b"Location_Country,Salary\nDubai,4000\nBerlin,\n")
+    assert columns["location_country"] == ["Dubai", "Berlin"]
+    assert columns["salary"] == ["4000", None]
+    assert columns["citizenship"] == [None, None]
+
+
+def test_parquet_round_trip():
+    pd = pytest.importorskip("pandas")
+    pytest.importorskip("pyarrow")
+    buffer = io.BytesIO()
+    pd.DataFrame({"location_country": ["Dubai"], "salary": [4000.0],
+                  "start_date": pd.to_datetime(["2025-04-01"])}).to_parquet(buffer)
+    columns = load_table(buffer.getvalue(), "offers.parquet")
+    assert columns["start_date"] == ["2025-04-01"]
+    assert columns["salary"] == [4000.0]
+
+
+def test_audit_endpoint_streams_alerts_then_summary():
+    response = client.post("/compliance/audit", json={
+        "location_country": ["Dubai", "Berlin"],
+        "salary": [4000, 90000],
+    })
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["index"] == 0 and "Low Salary Warning" in lines[0]["message"]
+    assert lines[-1] == {"rows": 2, "alerts": 1}
+
+
+def test_audit_file_endpoint_accepts_csv():
+    csv_bytes = b"location_country,citizenship,salary\nLondon,UAE,20000\n"
+    response = client.post("/compliance/audit/file", files={"file": ("offers.csv", csv_bytes, "text/csv")})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [l.get("id") for l in lines[:-1]] == ["visa_sponsorship", "minimum_wage"]
+
+
+def test_audit_rejects_ragged_columns():
+    response = client.post("/compliance/audit", json={"location_country": ["Dubai"], "salary": [1, 2]})
+    assert response.status_code == 400
+
+
+def test_feasibility_grid_finds_earliest_start():
+    engine = ComplianceEngine()
+    candidate = CandidateProfile(citizenship="United Kingdom", salary=30000, currency="GBP")
+    dates = [(NOW + timedelta(days=d)).strftime("%Y-%m-%d") for d in (-5, 10, 20, 30, 50)]
+
+    grid = BulkAuditor(engine).feasibility(candidate, ["Dubai", "Berlin", "London"], dates, now=NOW)
+    by_location = {row["location"]: row for row in grid}
+
+    dubai = by_location["Dubai"]
+    assert dubai["visa_required"] and dubai["visa_lead_days"] == 21
+    assert [c["feasible"] for c in dubai["cells"]] == [False, False, False, True, True]
+    assert dubai["earliest_feasible_start"] == dates[3]
+    assert dubai["cells"][0]["probation_end"] == (NOW + timedelta(days=175)).strftime("%Y-%m-%d")
+
+    # Below the German floor: no start date fixes that
+    assert by_location["Berlin"]["earliest_feasible_start"] is None
+    # Local hire: no visa, only the past date is blocked
+    assert not by_location["London"]["visa_required"]
+    assert by_location["London"]["earliest_feasible_start"] == dates[1]
+
+    # Each cell matches a full analyze() run for that location and date
+    cell = dubai["cells"][2]
+    scalar = engine.analyze(candidate.model_copy(update={"location_country": "Dubai", "start_date": dates[2]}), now=NOW)
+    assert cell["alerts"] == scalar["alerts"]
+    assert cell["probation_end"] == scalar["projected_dates"]["probation_end"]
+
+
+def test_feasibility_uses_the_engines_resolver():
+    resolver = JurisdictionResolver([Jurisdiction(country="united arab emirates", display_name="UAE",
+                                                  label="Custom UAE Law", template_file="uae_labor.md",
+                                                  aliases=("dubai",))])
+    candidate = CandidateProfile(citizenship="India", salary=30000, currency="AED")
+    (row,) = BulkAuditor(ComplianceEngine(resolver=resolver)).feasibility(candidate, ["Dubai"], ["2025-06-01"], now=NOW)
+    assert row["jurisdiction"] == "Custom UAE Law"
+
+
+def test_feasibility_endpoint_expands_date_ranges():
+    response = client.post("/compliance/feasibility", json={
+        "candidate": {"citizenship": "UAE", "salary": 90000},
+        "locations": ["Berlin", "Dubai"],
+        "date_ranges": [{"start": "2030-01-01", "end": "2030-01-29", "step_days": 7}],
+    })
+    assert response.status_code == 200
+    locations = response.json()["locations"]
+    assert [len(l["cells"]) for l in locations] == [5, 5]
+    assert locations[1]["jurisdiction"] == "DIFC Employment Law (UAE)"
+    assert locations[1]["earliest_feasible_start"] == "2030-01-01"
+
+
+def test_feasibility_endpoint_needs_dates():
+    response = client.post("/compliance/feasibility", json={"candidate": {}, "locations": ["Dubai"]})
+    assert response.status_code == 400
+
+
+def test_rule_file_aliases_are_local_hires_in_bulk():
+    columns = {"citizenship": ["Netherlands", "USA"], "location_country": ["Holland", "United States"],
+               "salary": [None, None], "currency": [None, None], "start_date": [None, None]}
+    assert list(BulkAuditor(ComplianceEngine()).audit(columns, now=NOW)) == []
@@ -0,0 +1,127 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.services.cache import ExtractionCache, LRUCache, RenderCache
+
+def test_key_ignores_whitespace_and_date_for_absolute_text():
+    a = ExtractionCache.make_key("Hire  Alex\nSmith, starting 2026-03-01", "m", "v1", "2026-01-01")
+    b = ExtractionCache.make_key("Hire Alex Smith, starting 2026-03-01", "m", "v1", "2026-01-02")
+    assert a == b
+
+@pytest.mark.parametrize("text", [
+    "Alex starts 1 March 2026",
+    "Alex starts March 3rd, 2026",
+    "Alex starts 03/03/2026",
+])
+def test_key_not_scoped_to_date_for_absolute_dates(text):
+    assert ExtractionCache.make_key(text, "m", "v1", "2026-01-01") == ExtractionCache.make_key(text, "m", "v1", "2026-01-02")
+
+@pytest.mark.parametrize("text", [
+    "Alex starts next month",
+    "Alex starts in two weeks",
+    "Alex starts in a fortnight",
+    "Alex starts on the last day of the month",
+    "Alex starts at the end of next quarter",
+    "Alex starts in March",
+    "Hire Alex Smith",  # no date at all: the model may still fill one in from today
+    "Alex starts 2026-03-01, or in two weeks if the visa is late",
+])
+def test_key_scoped_to_date_for_relative_text(text):
+    assert ExtractionCache.make_key(text, "m", "v1", "2026-01-01") != ExtractionCache.make_key(text, "m", "v1", "2026-01-02")
+
+def test_key_changes_with_model_and_prompt_version():
+    base = ExtractionCache.make_key("Hire Alex", "m", "v1", "2026-01-01")
+    assert base != ExtractionCache.make_key("Hire Alex", "other", "v1", "2026-01-01")
+    assert base != ExtractionCache.make_key("Hire Alex", "m", "v2", "2026-01-01")
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ExtractionCache(path=path)
+    cache.set("k", {"name": "Alex"})
+
+    reopened = ExtractionCache(path=path)
+    assert reopened.get("k") == {"name": "Alex"}
+    assert reopened.stats["disk_hits"] == 1
+    assert reopened.get("k") == {"name": "Alex"}
+    assert reopened.stats["memory_hits"] == 1
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ExtractionCache(path=str(tmp_path / "cache.sqlite3"), ttl_seconds=-1)
+    cache.set("k", {"name": "Alex"})
+    assert cache.get("k") is None
+    assert cache.stats["misses"] == 1
+
+def test_disk_eviction_keeps_most_recent(tmp_path):
+    cache = ExtractionCache(path=str(tmp_path / "cache.sqlite3"), max_disk_entries=2)
+    for i in range(5):
+        cache.set(f"k{i}", {"i": i})
+        time.sleep(0.001)
+    cache.evict()
+    cache.memory.clear()
+    assert cache.get("k0") is None
+    assert cache.get("k4") == {"i": 4}
+
+def test_disk_reads_count_as_access_for_eviction(tmp_path):
+    cache = ExtractionCache(path=str(tmp_path / "cache.sqlite3"), max_disk_entries=2)
+    for i in range(3):
+        cache.set(f"k{i}", {"i": i})
+        time.sleep(0.001)
+    cache.memory.clear()
+    assert cache.get("k0") == {"i": 0}   # access time is only noted, written at eviction
+    cache.evict()
+    cache.memory.clear()
+    assert cache.get("k1") is None
+    assert cache.get("k0") == {"i": 0}
+
+@pytest.mark.asyncio
+async def test_async_access_reads_the_disk_tier_off_the_loop(tmp_path, mocker):
+    cache = ExtractionCache(path=str(tmp_path / "cache.sqlite3"))
+    to_thread = mocker.spy(asyncio, "to_thread")
+    await cache.aset("k", {"name": "Alex"})
+    cache.memory.clear()
+    assert await cache.aget("k") == {"name": "Alex"}
+    assert await cache.aget("k") == {"name": "Alex"}   # memory hit: no thread hop
+    assert to_thread.call_count == 2
+    assert cache.stats == {"memory_hits": 1, "disk_hits": 1, "misses": 0, "writes": 1}
+
+def test_lru_evicts_oldest():
+    lru = LRUCache(max_entries=2)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1
+
+
+def test_render_cache_is_bounded_by_bytes():
+    cache = RenderCache(max_bytes=10)
+    cache.set("a", b"12345")
+    cache.set("b", b"12345")
+    cache.get("a")                      # b is now least recently used
+    cache.set("c", b"123")
+    assert cache.get("b") is None and cache.get("a") == (b"12345", None)
+    assert cache.bytes == 8 and cache.stats["evictions"] == 1
+    cache.set("huge", b"x" * 11)        # larger than the whole budget: not kept
+    assert cache.get("huge") is None
+
+
+def test_render_cache_key_ignores_unused_fields():
+    values = {"name": "Ada", "salary": 1.0, "timestamp": 1}
+    key = RenderCache.make_key(values, frozenset({"name"}), "t", "c", "UK", "Jan 01")
+    assert key == RenderCache.make_key(dict(values, salary=2.0, timestamp=2), frozenset({"name"}), "t", "c", "UK", "Jan 01")
+    assert key != RenderCache.make_key(values, frozenset({"name"}), "t", "c", "UK", "Jan 02")
+    assert key != RenderCache.make_key(values, frozenset({"name"}), "t2", "c", "UK", "Jan 01")
+
+
+def test_render_cache_drops_renders_of_an_edited_template():
+    cache = RenderCache()
+    cache.check_version("/t.md", "v1")
+    cache.set("a", b"pdf", sources=("/t.md", ""))
+    cache.set("b", b"pdf", sources=("/other.md", ""))
+    cache.check_version("/t.md", "v1")
+    assert len(cache) == 2
+    cache.check_version("/t.md", "v2")
+    assert cache.get("a") is None and cache.get("b") is not None
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from urllib.parse import unquote
+import pytest
+from fastapi.testclient import TestClient
+from backend.main import app, pdf_service
+from backend.services.contract_store import ContractStore, ascii_filename, parse_range
+
+client = TestClient(app)
+
+
+def test_memory_budget_spills_least_recently_read(tmp_path):
+    store = ContractStore(str(tmp_path), max_memory_bytes=10, spill_threshold=8)
+    a = store.put(b"aaaaa", "a.pdf")
+    b = store.put(b"bbbbb", "b.pdf")
+    store.read(a.id)                       # a is now the most recently read
+    c = store.put(b"ccccc", "c.pdf")
+
+    assert b.path and os.path.exists(b.path)
+    assert a.path is None and c.path is None
+    assert store.memory_bytes == 10
+    assert store.read(b.id, 1, 3) == b"bb"  # range read straight from disk
+
+    big = store.put(b"x" * 9, "big.pdf")    # above the spill threshold
+    assert big.path and store.read(big.id) == b"x" * 9
+
+
+def test_entries_expire(tmp_path):
+    store = ContractStore(str(tmp_path), ttl_seconds=0.01)
+    entry = store.put(b"data", "a.pdf")
+    time.sleep(0.02)
+    assert store.read(entry.id) is None
+    assert len(store) == 0
+
+
+def test_reconcile_removes_orphaned_spill_files(tmp_path):
+    (tmp_path / "old.pdf").write_bytes(b"x")
+    store = ContractStore(str(tmp_path), spill_threshold=0)
+    kept = store.put(b"data", "a.pdf")
+    store.reconcile()
+    assert not (tmp_path / "old.pdf").exists()
+    assert os.path.exists(kept.path)
+
+
+def test_reconcile_never_deletes_a_file_spilled_during_the_scan(tmp_path, monkeypatch):
+    store = ContractStore(str(tmp_path), spill_threshold=0)
+    added = []
+    listdir = os.listdir
+
+    def listdir_while_putting(path):
+        # Another request stores a contract while reconcile is scanning
+        writer = threading.Thread(target=lambda: added.append(store.put(b"new", "new.pdf")))
+        writer.start()
+        writer.join(timeout=0.2)
+        listdir_while_putting.writer = writer
+        return listdir(path)
+
+    monkeypatch.setattr("backend.services.contract_store.os.listdir", listdir_while_putting)
+    store.reconcile()
+    listdir_while_putting.writer.join()
+    assert store.read(added[0].id) == b"new"
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-3", (0, 4)),
+    ("bytes=5-", (5, 10)),
+    ("bytes=-4", (6, 10)),
+    ("bytes=8-100", (8, 10)),
+    ("items=0-1", None),
+    ("bytes=0-1,3-4", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 10) == expected
+
+
+def test_parse_range_unsatisfiable():
+    with pytest.raises(ValueError):
+        parse_range("bytes=10-", 10)
+
+
+def test_contract_endpoint_etag_and_ranges():
+    entry = pdf_service.store.put(b"%PDF-1.3 hello %%EOF", "Contract_Test.pdf")
+    url = f"/contracts/{entry.id}"
+
+    full = client.get(url)
+    assert full.status_code == 200 and full.content.startswith(b"%PDF")
+    assert full.headers["content-type"] == "application/pdf"
+    etag = full.headers["etag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    part = client.get(url, headers={"Range": "bytes=0-3"})
+    assert part.status_code == 206 and part.content == b"%PDF"
+    assert part.headers["content-range"] == f"bytes 0-3/{entry.size}"
+
+    stale = client.get(url, headers={"Range": "bytes=0-3", "If-Range": '"old"'})
+    assert stale.status_code == 200 and len(stale.content) == entry.size
+
+    assert client.get(url, headers={"Range": "bytes=999-"}).status_code == 416
+    assert client.get("/contracts/nope").status_code == 404
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("Contract_Ada_Lovelace_1.pdf", "Contract_Ada_Lovelace_1.pdf"),
+    ("Contract_Zoë_O’Neil_1.pdf", "Contract_Zoe_ONeil_1.pdf"),
+    ("Contract_محمد_علي_1.pdf", "Contract_1.pdf"),
+    ('Contract_"x"\r\nSet-Cookie:_a_1.pdf', "Contract_x_Set-Cookie_a_1.pdf"),
+    ("", "contract.pdf"),
+])
+def test_ascii_filename(name, expected):
+    assert ascii_filename(name) == expected
+
+
+def test_contract_endpoint_serves_non_latin_names():
+    name = 'Contract_محمد_علي_"1"\n.pdf'
+    entry = pdf_service.store.put(b"%PDF-1.3 hello %%EOF", name)
+    response = client.get(f"/contracts/{entry.id}")
+    assert response.status_code == 200
+
+    disposition = response.headers["content-disposition"]
+    assert disposition.startswith('inline; filename="Contract_1.pdf"; ')
+    assert unquote(disposition.split("filename*=UTF-8''")[1]) == 'Contract_محمد_علي_"1".pdf'
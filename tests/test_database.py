@@ -0,0 +1,84 @@
+import time
+import pytest
+from backend.database import OnboardingHistory
+from backend.models.db_models import OnboardingRecord, name_key
+from backend.models.schemas import CandidateProfile, OnboardingPackage
+
+
+def package(name, jurisdiction="Employment Rights Act 1996 (UK)", job_family="General"):
+    return OnboardingPackage(
+        candidate=CandidateProfile(name=name, job_family=job_family),
+        generated_files=["/contracts/x"],
+        compliance_alerts=["Visa required"],
+        jurisdiction_detected=jurisdiction,
+    )
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = OnboardingHistory(str(tmp_path / "history.sqlite3"), pool_size=2, batch_size=3)
+    yield store
+    store.close()
+
+
+def test_name_key_ignores_case_accents_and_spacing():
+    assert name_key("  Zoë   O'Neil ") == name_key("zoe o'neil")
+
+
+def test_saved_packets_are_written_in_batches(history):
+    for i in range(7):
+        history.save(package(f"Ada {i}"))
+    history.flush()
+    assert history.stats["written"] == 7
+    assert history.stats["batches"] >= 3          # batch_size=3
+
+
+def test_keyset_pagination_walks_every_record_newest_first(history):
+    for i in range(5):
+        history.save(package(f"Ada {i}"))
+    history.flush()
+
+    seen, cursor = [], None
+    while True:
+        page = history.list(limit=2, before_id=cursor)
+        seen += [item["candidate_name"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"Ada {i}" for i in reversed(range(5))]
+
+
+def test_filters(history):
+    history.save(package("Zoë Smith", jurisdiction="German Civil Code (BGB)", job_family="Sales"))
+    history.save(package("Zoltan Kiss", job_family="Engineering"))
+    history.save(package("Ada Lovelace", job_family="Engineering"))
+    history.flush()
+
+    def names(**filters):
+        return [item["candidate_name"] for item in history.list(**filters)["items"]]
+
+    assert names(name="zo") == ["Zoltan Kiss", "Zoë Smith"]
+    assert names(name="ZOE") == ["Zoë Smith"]
+    assert names(jurisdiction="German Civil Code (BGB)") == ["Zoë Smith"]
+    assert names(job_family="Engineering", name="ada") == ["Ada Lovelace"]
+    assert names(created_from=time.time() + 60) == []
+    assert len(names(created_from=0, created_to=time.time() + 60)) == 3
+
+
+def test_get_returns_the_full_packet(history):
+    history.save(package("Ada"))
+    history.flush()
+    record_id = history.list()["items"][0]["id"]
+    record = history.get(record_id)
+    assert isinstance(record, OnboardingRecord)
+    assert record.to_package()["candidate"]["name"] == "Ada"
+    assert history.get(record_id + 1) is None
+
+
+def test_list_queries_use_the_indexes(history):
+    with history.pool.connection() as db:
+        for column in ("jurisdiction", "job_family"):
+            plan = db.execute(
+                f"EXPLAIN QUERY PLAN SELECT id FROM onboarding WHERE {column} = ? ORDER BY id DESC LIMIT 50",
+                ("x",)).fetchall()
+            assert "USING COVERING INDEX" in plan[0][3]
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import time
+import pytest
+from backend.services.contract_store import ContractStore
+from backend.services.expiry import ExpiryScheduler
+from backend.services.pdf_render import RenderPool
+from backend.services.pdf_service import PDFService
+
+
+def test_runs_due_actions_in_expiry_order():
+    scheduler = ExpiryScheduler()
+    ran = []
+    scheduler.schedule(30, ran.append, "c")
+    scheduler.schedule(10, ran.append, "a")
+    scheduler.schedule(20, ran.append, "b")
+
+    assert scheduler.run_due(now=25) == 2
+    assert ran == ["a", "b"]
+    assert scheduler.next_due() == 30
+
+
+def test_failing_action_does_not_stop_the_sweep():
+    scheduler = ExpiryScheduler()
+    ran = []
+    scheduler.schedule(1, lambda: 1 / 0)
+    scheduler.schedule(2, ran.append, "ok")
+    scheduler.run_due(now=5)
+    assert ran == ["ok"] and scheduler.stats["errors"] == 1
+
+
+def test_store_expiry_is_driven_by_the_scheduler(tmp_path):
+    scheduler = ExpiryScheduler()
+    store = ContractStore(str(tmp_path), ttl_seconds=60, spill_threshold=0, scheduler=scheduler)
+    entry = store.put(b"data", "a.pdf")
+    assert len(scheduler) == 1 and os.path.exists(entry.path)
+
+    scheduler.run_due(now=time.time())           # not due yet
+    assert len(store) == 1
+    entry.expires_at = time.time() - 1           # pretend the TTL passed
+    scheduler.run_due(now=time.time() + 61)
+    assert len(store) == 0 and not os.path.exists(entry.path)
+
+
+def test_reconcile_deletes_old_pdfs_and_schedules_young_ones(tmp_path):
+    service = PDFService(render_pool=RenderPool(workers=0),
+                         store=ContractStore(str(tmp_path / "contracts")))
+    service.output_dir = str(tmp_path)
+    old, young = tmp_path / "old.pdf", tmp_path / "young.pdf"
+    old.write_bytes(b"x")
+    young.write_bytes(b"y")
+    past = time.time() - 3600
+    os.utime(old, (past, past))
+
+    # getctime can't be backdated, so shrink the window around the files instead
+    from backend.services import pdf_service as module
+    module.ARTIFACT_RETENTION_SECONDS, saved = 5, module.ARTIFACT_RETENTION_SECONDS
+    try:
+        original_getctime = os.path.getctime
+        os.path.getctime = lambda p: past if p.endswith("old.pdf") else original_getctime(p)
+        service._reconcile_artifacts()
+    finally:
+        os.path.getctime = original_getctime
+        module.ARTIFACT_RETENTION_SECONDS = saved
+
+    assert not old.exists() and young.exists()
+    assert len(service.expiry) == 1
+    service.expiry.run_due(now=time.time() + 10)
+    assert not young.exists()
+
+
+@pytest.mark.asyncio
+async def test_background_loop_reconciles_then_expires():
+    scans = []
+    scheduler = ExpiryScheduler(reconcile=lambda: scans.append(1), interval=0.05)
+    ran = []
+    scheduler.schedule(time.time() + 0.05, ran.append, "done")
+
+    task = asyncio.create_task(scheduler.run())
+    await asyncio.sleep(0.3)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert scans == [1] and ran == ["done"]
@@ -0,0 +1,49 @@
+import pytest
+from datetime import date
+from backend.services.fast_extractor import RuleBasedExtractor, resolve_start_date
+
+TODAY = date(2026, 10, 18)  # a Sunday
+
+@pytest.fixture
+def extractor():
+    return RuleBasedExtractor()
+
+def test_house_format(extractor):
+    result = extractor.extract("Hire Alex Smith as Senior DevOps Engineer in Dubai for 25k AED", TODAY)
+    cand = result.candidate
+    assert cand.name == "Alex Smith"
+    assert cand.role == "Senior DevOps Engineer"
+    assert cand.job_family == "Engineering"
+    assert cand.location_country == "UAE"
+    assert (cand.salary, cand.currency) == (25000, "AED")
+    assert result.confidence == 1.0
+
+def test_citizenship_date_and_equity(extractor):
+    text = "Onboard Maria Schmidt as VP of Sales in Berlin for EUR 95,000, starting next month. UK citizen, with stock options."
+    cand = extractor.extract(text, TODAY).candidate
+    assert cand.job_family == "Executive"
+    assert cand.location_country == "Germany"
+    assert cand.citizenship == "United Kingdom"
+    assert cand.start_date == "2026-11-01"
+    assert cand.equity_grant is True
+
+def test_missing_or_ambiguous_fields_defer_to_llm(extractor):
+    assert extractor.extract("Hire John Doe", TODAY).candidate is None
+    ambiguous = extractor.extract("Hire Jane Roe as Engineer in London or Berlin", TODAY)
+    assert ambiguous.candidate is None
+    assert "location_country" in ambiguous.missing
+    # Citizenship mentioned but not resolvable -> let the LLM handle it
+    assert extractor.extract("Hire Sam Lee as Engineer in London, Brazilian citizen", TODAY).candidate is None
+    assert extractor.stats == {"attempts": 3, "hits": 0}
+
+@pytest.mark.parametrize("text,expected", [
+    ("start 2026-12-01", date(2026, 12, 1)),
+    ("starting tomorrow", date(2026, 10, 19)),
+    ("starts next week", date(2026, 10, 19)),
+    ("start in 2 weeks", date(2026, 11, 1)),
+    ("start on March 3rd", date(2027, 3, 3)),
+    ("joining 5 November 2026", date(2026, 11, 5)),
+    ("start next friday", date(2026, 10, 23)),
+])
+def test_resolve_start_date(text, expected):
+    assert resolve_start_date(text, TODAY) == expected
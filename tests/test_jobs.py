@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from backend.services.jobs import DONE, FAILED, QUEUED, RUNNING, STAGES, JobQueue, JobStore
+
+
+async def fake_pipeline(raw_text, on_stage):
+    await on_stage("extraction", {"candidate": {"name": raw_text}})
+    await on_stage("jurisdiction", {"jurisdiction_detected": "UK"})
+    return {"candidate": {"name": raw_text}, "generated_files": ["/contracts/x"]}
+
+
+async def failing_pipeline(raw_text, on_stage):
+    await on_stage("extraction", {"candidate": {"name": raw_text}})
+    raise RuntimeError("PDF failed")
+
+
+def test_new_job_is_queued_with_pending_stages():
+    store = JobStore()
+    job = store.create("Hire Ada")
+    assert job["status"] == QUEUED
+    assert job["stages"] == {stage: "pending" for stage in STAGES}
+    assert store.get("missing") is None
+
+
+def test_job_can_only_be_claimed_once():
+    store = JobStore()
+    job = store.create("Hire Ada")
+    assert store.claim(job["job_id"]) is not None
+    assert store.claim(job["job_id"]) is None
+    assert store.get(job["job_id"])["status"] == RUNNING
+
+
+@pytest.mark.asyncio
+async def test_job_reports_stages_and_result():
+    queue = JobQueue(JobStore(), fake_pipeline)
+    job = queue.submit("Ada")
+    await queue.process(job["job_id"])
+
+    done = queue.store.get(job["job_id"])
+    assert done["status"] == DONE
+    assert done["stages"]["extraction"] == DONE and done["stages"]["contract"] == "pending"
+    assert done["result"]["generated_files"] == ["/contracts/x"]
+
+
+@pytest.mark.asyncio
+async def test_failed_job_keeps_partial_result():
+    queue = JobQueue(JobStore(), failing_pipeline)
+    job = queue.submit("Ada")
+    await queue.process(job["job_id"])
+
+    failed = queue.store.get(job["job_id"])
+    assert failed["status"] == FAILED and failed["error"] == "PDF failed"
+    assert failed["result"]["candidate"] == {"name": "Ada"}
+
+
+@pytest.mark.asyncio
+async def test_interrupted_jobs_resume_after_restart(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    before = JobStore(path)
+    interrupted = before.create("Ada")
+    before.claim(interrupted["job_id"])
+    before.record_stage(interrupted["job_id"], "extraction", {"candidate": {}})
+    waiting = before.create("Bob")
+
+    # New process: the same file, fresh workers
+    queue = JobQueue(JobStore(path), fake_pipeline, workers=2)
+    task = asyncio.create_task(queue.run())
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if all(queue.store.get(j["job_id"])["status"] == DONE for j in (interrupted, waiting)):
+            break
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    resumed = queue.store.get(interrupted["job_id"])
+    assert resumed["status"] == DONE and resumed["attempts"] == 2
+    assert queue.store.get(waiting["job_id"])["status"] == DONE
+
+
+@pytest.mark.asyncio
+async def test_callback_receives_final_status(mocker):
+    post = mocker.patch("backend.services.jobs.httpx.AsyncClient.post",
+                        new_callable=AsyncMock, return_value=MagicMock(status_code=200))
+    mocker.patch("backend.services.jobs.resolve_host", new_callable=AsyncMock, return_value=["93.184.216.34"])
+    queue = JobQueue(JobStore(), fake_pipeline)
+    job = queue.submit("Ada", callback_url="http://hr.example/hook")
+    await queue.process(job["job_id"])
+
+    url = post.call_args.args[0]
+    payload = post.call_args.kwargs["json"]
+    # Pinned to the address that passed the check, still addressed to the real host
+    assert str(url) == "http://93.184.216.34/hook"
+    assert post.call_args.kwargs["headers"] == {"Host": "hr.example"}
+    assert payload["job_id"] == job["job_id"] and payload["status"] == DONE
+    assert queue.store.get(job["job_id"])["callback"] == "delivered (200)"
+
+
+@pytest.mark.asyncio
+async def test_https_callback_keeps_the_hostname_for_tls(mocker):
+    post = mocker.patch("backend.services.jobs.httpx.AsyncClient.post",
+                        new_callable=AsyncMock, return_value=MagicMock(status_code=204))
+    mocker.patch("backend.services.jobs.resolve_host", new_callable=AsyncMock,
+                 return_value=["2606:2800:220:1:248:1893:25c8:1946"])
+    queue = JobQueue(JobStore(), fake_pipeline)
+    job = queue.submit("Ada", callback_url="https://hr.example:8443/hook")
+    await queue.process(job["job_id"])
+
+    assert str(post.call_args.args[0]) == "https://[2606:2800:220:1:248:1893:25c8:1946]:8443/hook"
+    assert post.call_args.kwargs["headers"] == {"Host": "hr.example:8443"}
+    assert post.call_args.kwargs["extensions"] == {"sni_hostname": "hr.example"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("addresses", [["127.0.0.1"], ["10.0.0.7"], ["169.254.169.254"], ["93.184.216.34", "::1"]])
+async def test_callback_to_internal_addresses_is_refused(mocker, addresses):
+    post = mocker.patch("backend.services.jobs.httpx.AsyncClient.post", new_callable=AsyncMock)
+    mocker.patch("backend.services.jobs.resolve_host", new_callable=AsyncMock, return_value=addresses)
+    queue = JobQueue(JobStore(), fake_pipeline)
+    job = queue.submit("Ada", callback_url="http://metadata.internal/hook")
+    await queue.process(job["job_id"])
+
+    post.assert_not_called()
+    assert queue.store.get(job["job_id"])["callback"].startswith("failed: ValueError")
+
+
+@pytest.mark.asyncio
+async def test_any_callback_error_is_recorded():
+    # Private callbacks allowed, so the URL reaches httpx, which rejects the scheme
+    queue = JobQueue(JobStore(), fake_pipeline, allow_private_callbacks=True)
+    job = queue.submit("Ada", callback_url="ftp://hr.example/hook")
+    await queue.process(job["job_id"])
+    assert queue.store.get(job["job_id"])["callback"].startswith("failed: UnsupportedProtocol")
+
+
+def test_prune_drops_only_old_finished_jobs():
+    store = JobStore()
+    old = store.create("Ada")
+    store.finish(old["job_id"], {})
+    pending = store.create("Bob")
+    assert store.prune(older_than=float("inf")) == 1
+    assert store.get(old["job_id"]) is None and store.get(pending["job_id"]) is not None
+
+
+@pytest.mark.asyncio
+async def test_running_queue_keeps_pruning():
+    queue = JobQueue(JobStore(), fake_pipeline, retention_seconds=0, prune_interval=0.01)
+    runner = asyncio.create_task(queue.run())
+    try:
+        for name in ("Ada", "Bob"):  # one finishes before the first prune, one long after
+            job = queue.store.create(name)
+            queue.store.finish(job["job_id"], {})
+            await asyncio.sleep(0.05)
+            assert queue.store.get(job["job_id"]) is None
+    finally:
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
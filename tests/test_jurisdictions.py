@@ -0,0 +1,47 @@
+from backend.services.jurisdictions import AhoCorasick, JurisdictionResolver, RESOLVER
+from backend.services.compliance import ComplianceEngine
+from backend.services.pdf_service import PDFService
+
+
+def test_automaton_finds_overlapping_whole_words():
+    automaton = AhoCorasick({"new york": "ny", "york": "york", "ork": "ork"})
+    matches = automaton.search("Office in New York")
+    assert (10, 18, "ny") in matches
+    assert (14, 18, "york") in matches
+    assert all(value != "ork" for _, _, value in matches)  # inside a word
+
+
+def test_resolves_cities_codes_and_free_text():
+    assert RESOLVER.resolve("Dubai").template_file == "uae_labor.md"
+    assert RESOLVER.resolve("London, UK").country == "united kingdom"
+    assert RESOLVER.resolve("DE").label == "German Civil Code (BGB)"
+    assert RESOLVER.resolve("Remote - Abu Dhabi office").country == "united arab emirates"
+
+
+def test_short_aliases_only_match_exactly():
+    assert RESOLVER.resolve("Rio de Janeiro") is RESOLVER.default
+    assert RESOLVER.resolve("Ukraine") is RESOLVER.default
+    assert RESOLVER.resolve(None) is RESOLVER.default
+
+
+def test_label_round_trip():
+    for record in RESOLVER.jurisdictions:
+        assert RESOLVER.from_label(record.label) is record
+    assert RESOLVER.from_label("General International Contractor Agreement") is RESOLVER.default
+
+
+def test_normalize_country_keeps_unknown_names():
+    assert RESOLVER.normalize_country("U.A.E.") == "united arab emirates"
+    assert RESOLVER.normalize_country(" France ") == "france"
+    assert RESOLVER.normalize_country("") == "unknown"
+
+
+def test_services_share_the_registry():
+    resolver = JurisdictionResolver()
+    engine = ComplianceEngine(resolver)
+    pdf = PDFService.__new__(PDFService)
+
+    label = resolver.resolve("Munich").label
+    assert pdf._select_template_file(label) == "german_employment.md"
+    assert pdf._select_template_file(resolver.resolve("Munich")) == "german_employment.md"
+    assert engine._normalize_country("Munich") == "germany"
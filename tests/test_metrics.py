@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+from backend.services.metrics import MetricsRegistry, record_llm_usage, LLM_PROMPT_TOKENS, LLM_EVAL_SECONDS
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    hist = registry.histogram("stage_seconds", "help", buckets=(0.1, 1.0))
+    hist.observe(0.05, stage="pdf")
+    hist.observe(0.5, stage="pdf")
+    hist.observe(5.0, stage="pdf")
+
+    text = registry.render()
+    assert '# TYPE stage_seconds histogram' in text
+    assert 'stage_seconds_bucket{stage="pdf",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="pdf",le="1"} 2' in text
+    assert 'stage_seconds_bucket{stage="pdf",le="+Inf"} 3' in text
+    assert 'stage_seconds_count{stage="pdf"} 3' in text
+
+def test_counter_and_callback_gauge():
+    registry = MetricsRegistry()
+    registry.counter("calls_total", "help").inc(2, outcome="ok")
+    registry.gauge("ratio", "help", fn=lambda: 0.75)
+
+    text = registry.render()
+    assert 'calls_total{outcome="ok"} 2' in text
+    assert "ratio 0.75" in text
+
+def test_record_llm_usage_reads_ollama_fields():
+    before = LLM_PROMPT_TOKENS.value(purpose="unit")
+    response = SimpleNamespace(prompt_eval_count=120, eval_count=30, eval_duration=2_000_000_000,
+                               load_duration=None, prompt_eval_duration=None)
+    record_llm_usage(response, "unit")
+    assert LLM_PROMPT_TOKENS.value(purpose="unit") == before + 120
+    assert LLM_EVAL_SECONDS.value(purpose="unit") >= 2.0
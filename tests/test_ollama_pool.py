@@ -0,0 +1,162 @@
+import asyncio
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from backend.services.ollama_pool import CircuitBreaker, NoHealthyHostError, OllamaPool, normalize_host
+
+def make_stub(answer: str):
+    """A tiny HTTP server speaking the two Ollama endpoints the pool uses."""
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._send({"version": "0.0.0-stub"})
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._send({
+                "model": "stub", "created_at": "2026-01-01T00:00:00Z", "done": True,
+                "message": {"role": "assistant", "content": answer},
+            })
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def dead_host():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return f"127.0.0.1:{port}"
+
+@pytest.fixture
+def stub():
+    server = make_stub("from stub")
+    yield f"127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+def test_normalize_host():
+    assert normalize_host("10.0.0.5") == "http://10.0.0.5:11434"
+    assert normalize_host("http://box:8080/") == "http://box:8080"
+
+def test_failover_to_healthy_host(stub):
+    pool = OllamaPool([dead_host(), stub], failure_threshold=1)
+    pool.endpoints[1].total_requests = 5  # make the dead host the first choice
+
+    response = pool.chat(model="m", messages=[{"role": "user", "content": "hi"}])
+    assert response.message.content == "from stub"
+    assert pool.endpoints[0].breaker.state == CircuitBreaker.OPEN
+
+@pytest.mark.asyncio
+async def test_async_failover_and_open_circuit_is_skipped(stub):
+    dead = dead_host()
+    pool = OllamaPool([dead, stub], failure_threshold=1, reset_timeout=60)
+    pool.endpoints[1].total_requests = 5
+
+    first = await pool.achat(model="m", messages=[])
+    assert first.message.content == "from stub"
+    # Circuit is open now, so the dead host isn't even tried
+    assert [e.host for e in pool._ranked()] == [pool.endpoints[1].host]
+
+@pytest.mark.asyncio
+async def test_probe_marks_hosts(stub):
+    pool = OllamaPool([dead_host(), stub])
+    await pool.probe_all()
+    assert [e.healthy for e in pool.endpoints] == [False, True]
+
+    pool.endpoints[1].healthy = False
+    with pytest.raises(NoHealthyHostError):
+        await pool.achat(model="m", messages=[])
+
+@pytest.mark.asyncio
+async def test_probe_leaves_the_breaker_alone(stub):
+    pool = OllamaPool([stub], failure_threshold=1, reset_timeout=60)
+    breaker = pool.endpoints[0].breaker
+    breaker.record_failure()
+
+    assert await pool.probe(pool.endpoints[0]) is True
+    assert pool.endpoints[0].healthy
+    assert breaker.state == CircuitBreaker.OPEN  # only a successful trial call closes it
+
+def test_least_outstanding_balancing():
+    pool = OllamaPool(["a", "b", "c"])
+    pool.endpoints[0].outstanding = 3
+    pool.endpoints[1].outstanding = 1
+    pool.endpoints[2].outstanding = 2
+    assert pool._ranked()[0].host == "http://b:11434"
+
+def test_circuit_breaker_half_open_allows_one_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.allow() is True       # reset window passed -> half-open trial
+    assert breaker.allow() is False      # only one trial at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+async def hang(**kwargs):
+    await asyncio.sleep(60)
+
+@pytest.mark.asyncio
+async def test_host_timeout_counts_as_failure():
+    pool = OllamaPool(["a"], failure_threshold=1)
+    pool.request_timeout = 0.05
+    pool.endpoints[0].async_client.chat = hang
+    with pytest.raises(asyncio.TimeoutError):
+        await pool.achat(model="m", messages=[])
+    assert pool.endpoints[0].breaker.state == CircuitBreaker.OPEN
+
+@pytest.mark.asyncio
+async def test_cancelled_trial_frees_the_slot_without_a_verdict():
+    pool = OllamaPool(["a"], failure_threshold=1, reset_timeout=0)
+    endpoint = pool.endpoints[0]
+    endpoint.async_client.chat = hang
+
+    endpoint.breaker.record_failure()  # open; reset window already passed -> next call is the trial
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(pool.achat(model="m", messages=[]), timeout=0.05)
+    assert endpoint.breaker.failures == 1   # the caller gave up; not held against the host
+    assert endpoint.outstanding == 0
+    assert endpoint.breaker.allow() is True  # the cancelled trial didn't keep the slot
+
+@pytest.mark.asyncio
+async def test_cancelled_stream_consumer_leaves_the_breaker_closed():
+    pool = OllamaPool(["a"], failure_threshold=1)
+    endpoint = pool.endpoints[0]
+
+    async def one_token_then_wait():
+        yield "Hello"
+        await asyncio.sleep(60)
+
+    async def chat(stream=False, **kwargs):
+        return one_token_then_wait()
+    endpoint.async_client.chat = chat
+
+    first = asyncio.Event()
+
+    async def consumer():
+        async for _ in pool.astream(model="m", messages=[]):
+            first.set()
+
+    task = asyncio.create_task(consumer())
+    await first.wait()
+    task.cancel()   # the client closed the Ask HR chat mid-answer
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert endpoint.breaker.state == CircuitBreaker.CLOSED and endpoint.breaker.failures == 0
+    assert endpoint.available and endpoint.outstanding == 0
@@ -0,0 +1,136 @@
+import os
+import pickle
+import pytest
+from datetime import datetime, timedelta
+from backend.models.schemas import CandidateProfile
+from fpdf import FPDF
+from backend.services import pdf_render
+from backend.services.pdf_render import (
+    LayoutPDF, RenderJob, RenderPool, RenderQueueFull, draw_contract, render_contract_pdf,
+)
+from backend.services.contract_store import ContractStore
+from backend.services.pdf_service import PDFService
+
+TEMPLATE = os.path.abspath("backend/templates/uk_employment.md")
+CLAUSE = os.path.abspath("backend/templates/clauses/ip_assignment.md")
+
+
+def make_job(**values):
+    base = {"date": "January 01, 2025", "timestamp": 1, "name": "Ada", "role": "Engineer",
+            "citizenship": "UK", "start_date": "2025-02-01", "currency": "GBP", "salary": 50000.0}
+    base.update(values)
+    return RenderJob(TEMPLATE, CLAUSE, base, "Employment Rights Act 1996 (UK)")
+
+
+def test_job_round_trips_through_pickle():
+    job = make_job()
+    assert pickle.loads(pickle.dumps(job)) == job
+
+
+def test_inline_render_returns_pdf_bytes():
+    data = render_contract_pdf(make_job())
+    assert data.startswith(b"%PDF") and data.rstrip().endswith(b"%%EOF")
+
+
+def test_process_pool_render():
+    pool = RenderPool(workers=1, max_queue=1)
+    try:
+        assert pool.render(make_job(name="Grace")).startswith(b"%PDF")
+    finally:
+        pool.shutdown()
+    assert pool.in_flight == 0
+
+
+def test_broken_worker_pool_is_replaced():
+    pool = RenderPool(workers=1, max_queue=1)
+    try:
+        broken = pool._get_executor()
+        with pytest.raises(Exception):
+            broken.submit(os._exit, 1).result()  # the worker dies, as if OOM-killed
+
+        assert pool.render(make_job(name="Grace")).startswith(b"%PDF")
+        assert pool._executor is not broken
+    finally:
+        pool.shutdown()
+    assert pool.in_flight == 0
+
+
+def test_full_queue_is_rejected():
+    pool = RenderPool(workers=0, max_queue=0, queue_timeout=0.01)
+    assert pool.capacity == 1
+    pool._slots.acquire()  # someone else holds the only slot
+    with pytest.raises(RenderQueueFull):
+        pool.render(make_job())
+    assert pool.rejected == 1
+    pool._slots.release()
+    assert pool.render(make_job()).startswith(b"%PDF")
+
+
+def test_pdf_service_stores_rendered_bytes(tmp_path):
+    service = PDFService(render_pool=RenderPool(workers=0), store=ContractStore(str(tmp_path)))
+    result = service.generate_contract(CandidateProfile(name="Ada Lovelace"), "German Civil Code (BGB)")
+    assert result["url"] == f"/contracts/{result['contract_id']}"
+    assert service.store.read(result["contract_id"], 0, 4) == b"%PDF"
+    assert "Ada Lovelace" in result["final_text"]
+
+
+class SecondsLater(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz) + timedelta(seconds=5)
+
+
+def test_identical_contract_is_served_from_the_render_cache(tmp_path, mocker):
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    source = open("backend/templates/uae_labor.md", encoding="utf-8").read()
+    (template_dir / "uae_labor.md").write_text(source, encoding="utf-8")
+    service = PDFService(render_pool=RenderPool(workers=0), store=ContractStore(str(tmp_path / "store")))
+    service.template_dir = str(template_dir)
+    render = mocker.spy(service.render_pool, "render")
+    jurisdiction = "DIFC Employment Law (UAE)"
+
+    first = service.generate_contract(CandidateProfile(name="Ada", salary=1000.0), jurisdiction)
+    mocker.patch("backend.services.pdf_service.datetime", SecondsLater)
+    again = service.generate_contract(CandidateProfile(name="Ada", salary=1000.0), jurisdiction)
+    assert render.call_count == 1 and service.render_cache.stats["hits"] == 1
+    # The contract number ({timestamp}) is kept, so the text still matches the cached PDF
+    assert again["final_text"] == first["final_text"]
+    assert service.store.read(again["contract_id"]) == service.store.read(first["contract_id"])
+
+    mocker.stopall()
+    render = mocker.spy(service.render_pool, "render")
+    service.generate_contract(CandidateProfile(name="Ada", salary=2000.0), jurisdiction)
+    assert render.call_count == 1
+
+    # Editing the template drops every render of the old version
+    path = template_dir / "uae_labor.md"
+    path.write_text(source + "\nAmended.", encoding="utf-8")
+    os.utime(path, ns=(0, 10 ** 18))
+    service.generate_contract(CandidateProfile(name="Ada", salary=1000.0), jurisdiction)
+    assert render.call_count == 2
+    assert service.render_cache.stats["invalidations"] == 2
+
+
+@pytest.mark.parametrize("template", sorted(f for f in os.listdir("backend/templates") if f.endswith(".md")))
+def test_cached_layout_matches_plain_fpdf(template, tmp_path):
+    path = os.path.abspath(os.path.join("backend/templates", template))
+    # A long slot value exercises justified breaks, an unbreakable word and page breaks
+    job = make_job(name="Ada " * 200 + "X" * 300)._replace(template_path=path)
+    expected = draw_contract(FPDF(), job).pages
+
+    compiled = pdf_render._TEMPLATES.get(path)
+    clause = pdf_render._CLAUSES.get(CLAUSE)
+    static = (compiled.static_texts, clause.static_texts)
+    assert compiled.static_texts and clause.static_texts
+    assert draw_contract(LayoutPDF(static=static), job).pages == expected   # cold
+    assert draw_contract(LayoutPDF(static=static), job).pages == expected   # replayed
+
+
+def test_only_static_paragraphs_are_cached():
+    layouts = pdf_render.LRUCache(100)
+    job = make_job(name="Someone Unique")
+    compiled = pdf_render._TEMPLATES.get(TEMPLATE)
+    draw_contract(LayoutPDF(static=(compiled.static_texts,), layouts=layouts), job)
+    cached = {key[-1] for key in layouts._data}
+    assert cached and cached <= compiled.static_texts
@@ -0,0 +1,47 @@
+import os
+import time
+from backend.services.retrieval import HandbookIndex, split_sections
+
+HANDBOOK = """COMPANY HANDBOOK
+
+1. REMOTE WORK POLICY
+Employees may work remotely for up to 4 weeks per year.
+
+2. EXPENSE POLICY
+Coworking spaces are reimbursable up to $300 per month.
+
+3. LEAVE POLICY
+Annual leave is 30 calendar days per year.
+"""
+
+def test_split_sections_on_numbered_headings():
+    chunks = split_sections(HANDBOOK)
+    titles = [c.title for c in chunks]
+    assert titles == ["", "1. REMOTE WORK POLICY", "2. EXPENSE POLICY", "3. LEAVE POLICY"]
+    assert "4 weeks" in chunks[1].text
+
+def test_split_long_section_keeps_heading():
+    body = "\n\n".join(f"Paragraph {i} " + "x" * 80 for i in range(10))
+    chunks = split_sections(f"1. LONG SECTION\n{body}", max_chars=300)
+    assert len(chunks) > 1
+    assert all(c.title == "1. LONG SECTION" for c in chunks)
+
+def test_search_returns_relevant_section(tmp_path):
+    path = tmp_path / "handbook.txt"
+    path.write_text(HANDBOOK)
+    index = HandbookIndex(str(path), top_k=1)
+
+    assert index.search("Can I work remotely from Bali?")[0].title == "1. REMOTE WORK POLICY"
+    assert index.search("Is coworking reimbursable?")[0].title == "2. EXPENSE POLICY"
+    assert index.search("quantum entanglement") == []
+
+def test_index_rebuilds_when_file_changes(tmp_path):
+    path = tmp_path / "handbook.txt"
+    path.write_text(HANDBOOK)
+    index = HandbookIndex(str(path), top_k=1)
+    assert index.search("sabbatical") == []
+
+    path.write_text(HANDBOOK + "\n4. SABBATICAL\nFour weeks of paid sabbatical after 5 years.\n")
+    later = time.time() + 5
+    os.utime(path, (later, later))
+    assert index.search("sabbatical")[0].title == "4. SABBATICAL"
@@ -0,0 +1,112 @@
+import json
+import os
+from datetime import datetime
+import pytest
+from backend.models.schemas import CandidateProfile
+from backend.services.compliance import ComplianceEngine
+from backend.services.jurisdictions import RESOLVER
+from backend.services.rules import RuleSet, compile_rules
+
+NOW = datetime(2025, 1, 1)
+
+BASE_RULES = {
+    "defaults": {"visa_lead_days": 30},
+    "countries": {
+        "france": {"minimum_wage": 21000, "visa_lead_days": 60},
+        "united states": {"minimum_wage": 15080, "aliases": ["usa"]},
+    },
+    "rules": [
+        {"id": "wage", "category": "wage", "type": "COMPLIANCE_RISK", "severity": "HIGH",
+         "when": [{"fact": "salary", "op": "lt", "param": "minimum_wage"}],
+         "message": "{salary} < {minimum_wage}"},
+        {"id": "fr_only", "type": "INFO", "severity": "LOW", "countries": ["France"],
+         "when": [], "message": "Register with URSSAF"},
+    ],
+}
+
+
+def write_rules(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+def test_rules_are_indexed_per_country():
+    tables = compile_rules(BASE_RULES)
+    assert [r.id for r in tables.by_country["france"].rules] == ["wage", "fr_only"]
+    assert [r.id for r in tables.by_country["united states"].rules] == ["wage"]
+    # No minimum wage and no country filter match -> nothing to evaluate
+    assert tables.fallback.rules == ()
+    assert tables.aliases == {"usa": "united states"}
+
+
+def test_params_are_bound_at_compile_time():
+    table = compile_rules(BASE_RULES).by_country["france"]
+    alerts = RuleSet.evaluate(table, {"salary": 20000, **table.params}, category="wage")
+    assert alerts[0]["message"] == "20000 < 21000"
+    assert RuleSet.evaluate(table, {"salary": None, **table.params}, category="wage") == []
+
+
+@pytest.mark.parametrize("bad", [
+    {"rules": [{"id": "x", "type": "t", "severity": "s", "message": "m", "when": [{"fact": "salary", "op": "between"}]}]},
+    {"rules": [{"id": "x", "type": "t", "severity": "s", "message": "m", "when": [{"fact": "salry", "op": "is_true"}]}]},
+    {"rules": [{"id": "x", "type": "t", "severity": "s", "message": "{nope}", "when": []}]},
+])
+def test_invalid_rules_are_rejected(bad):
+    with pytest.raises(ValueError):
+        compile_rules(bad)
+
+
+def test_hot_reload_keeps_last_good_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    write_rules(path, BASE_RULES)
+    rules = RuleSet(str(path))
+    assert rules.for_country("france").params["minimum_wage"] == 21000
+
+    updated = json.loads(json.dumps(BASE_RULES))
+    updated["countries"]["france"]["minimum_wage"] = 23000
+    write_rules(path, updated)
+    os.utime(path, ns=(0, 10**9))
+    assert rules.for_country("france").params["minimum_wage"] == 23000
+
+    path.write_text("{ not json", encoding="utf-8")
+    os.utime(path, ns=(0, 2 * 10**9))
+    assert rules.for_country("france").params["minimum_wage"] == 23000
+
+
+def test_shipped_rules_only_carry_the_baseline_figures():
+    rules = RuleSet("backend/rules/compliance_rules.json", normalize=RESOLVER.normalize_country)
+    with_wage = {c for c in rules.countries if "minimum_wage" in rules.for_country(c).params}
+    assert with_wage == {"united arab emirates", "united kingdom", "germany"}
+
+    # No statutory floor on file -> no wage alert
+    swede = CandidateProfile(salary=250000, currency="SEK", location_country="Sweden", citizenship="Sweden")
+    assert ComplianceEngine().check_wage_compliance(swede, now=NOW) == []
+
+
+def test_engine_uses_rules_for_unregistered_countries(tmp_path):
+    with open("backend/rules/compliance_rules.json", encoding="utf-8") as f:
+        data = json.load(f)
+    data["countries"]["france"] = {"minimum_wage": 21000, "visa_lead_days": 60}
+    path = tmp_path / "rules.json"
+    write_rules(path, data)
+
+    engine = ComplianceEngine(rules=RuleSet(str(path), normalize=RESOLVER.normalize_country))
+    candidate = CandidateProfile(salary=20000, location_country="France", citizenship="Germany",
+                                 start_date="2025-01-15")
+    messages = [a["message"] for a in engine.analyze(candidate, now=NOW)["alerts"]]
+    assert messages == [
+        "🛂 Visa Sponsorship Required: Germany citizen hiring in France.",
+        "⚠️ Start Date Risk: 14 days is too short for France visa (avg 60 days). Suggested Start: 2025-03-09",
+        "📉 Low Salary Warning: 20000.0 is below the France minimum of 21000.",
+    ]
+
+
+@pytest.mark.parametrize("citizenship,location", [
+    ("Netherlands", "Holland"),
+    ("USA", "United States"),
+    ("America", "U.S."),
+])
+def test_rule_file_aliases_count_as_the_same_country(citizenship, location):
+    engine = ComplianceEngine()
+    candidate = CandidateProfile(citizenship=citizenship, location_country=location, start_date="2025-01-15")
+    assert engine.check_visa_requirements(candidate, now=NOW) == []
+    assert engine._normalize_country(location) == engine._normalize_country(citizenship)
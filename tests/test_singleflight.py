@@ -0,0 +1,49 @@
+import asyncio
+import pytest
+from backend.services.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+    assert results == ["done"] * 5
+    assert calls == 1
+    assert flight.stats == {"started": 1, "coalesced": 4}
+    assert len(flight) == 0
+
+@pytest.mark.asyncio
+async def test_errors_propagate_and_key_is_released():
+    flight = SingleFlight()
+
+    async def boom():
+        raise ValueError("nope")
+
+    with pytest.raises(ValueError):
+        await flight.do("k", boom)
+
+    async def ok():
+        return 1
+
+    assert await flight.do("k", ok) == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("k", work))
+    second = asyncio.ensure_future(flight.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "done"
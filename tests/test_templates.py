@@ -0,0 +1,102 @@
+import os
+import pytest
+from backend.services.contract_store import ContractStore
+from backend.services.pdf_render import TEMPLATE_FIELDS, RenderPool
+from backend.services.pdf_service import CLAUSE_FILES, PDFService
+from backend.services.templates import BLANK, H1, H2, TEXT, Block, CompiledTemplate, TemplateCache, sanitize_text
+
+TEMPLATE_DIR = "backend/templates"
+INCLUDES = frozenset({"dynamic_clauses"})
+
+
+def legacy_render(raw_text, values):
+    """What generate_contract did before templates were compiled."""
+    try:
+        filled = raw_text.format(**values)
+    except Exception:
+        filled = raw_text
+    blocks = []
+    for line in sanitize_text(filled).split('\n'):
+        line = line.strip()
+        if not line:
+            blocks.append(Block(BLANK, ""))
+        elif line.startswith("# "):
+            blocks.append(Block(H1, line.replace("# ", "").upper()))
+        elif line.startswith("## "):
+            blocks.append(Block(H2, line.replace("## ", "")))
+        else:
+            blocks.append(Block(TEXT, line))
+    return filled, blocks
+
+
+def values(**overrides):
+    base = {
+        "date": "January 01, 2025", "timestamp": 1735689600,
+        "name": "Zoë O’Neil", "role": "Staff Engineer — Platform", "citizenship": "UAE",
+        "start_date": "2025-02-01", "currency": "AED", "salary": 12345.678,
+    }
+    base.update(overrides)
+    return base
+
+
+@pytest.mark.parametrize("template_file", sorted(f for f in os.listdir(TEMPLATE_DIR) if f.endswith(".md")))
+@pytest.mark.parametrize("clause_file", [None] + sorted(CLAUSE_FILES.values()))
+def test_compiled_render_matches_format_and_sanitize(template_file, clause_file):
+    with open(os.path.join(TEMPLATE_DIR, template_file), encoding="utf-8") as f:
+        raw = f.read()
+    clause_text = ""
+    if clause_file:
+        with open(os.path.join(TEMPLATE_DIR, "clauses", clause_file), encoding="utf-8") as f:
+            clause_text = f.read()
+
+    compiled = CompiledTemplate(raw, TEMPLATE_FIELDS, INCLUDES)
+    rendered = compiled.render(values(), includes={"dynamic_clauses": CompiledTemplate(clause_text)})
+    assert (rendered.final_text, rendered.blocks) == legacy_render(raw, values(dynamic_clauses=clause_text))
+
+
+@pytest.mark.parametrize("raw", [
+    "# Title {name}\nPay: {salary:,.2f} {currency!r}\n{dynamic_clauses}\n",
+    "Inline clause: {dynamic_clauses}\n## {role}",
+    "Escaped {{braces}} for {name}",
+    "Unknown {bonus} placeholder falls back",
+    "Stray } brace falls back {name}",
+])
+def test_edge_cases_match_legacy(raw):
+    compiled = CompiledTemplate(raw, TEMPLATE_FIELDS, INCLUDES)
+    clause = CompiledTemplate("## Clause “X”\nLiteral {braces} stay")
+    rendered = compiled.render(values(), includes={"dynamic_clauses": clause})
+    assert (rendered.final_text, rendered.blocks) == legacy_render(raw, values(dynamic_clauses=clause.text))
+
+
+def test_bad_value_falls_back_to_raw_template():
+    compiled = CompiledTemplate("Pay {salary:,.2f}", TEMPLATE_FIELDS)
+    assert compiled.render(values(salary="n/a")).final_text == "Pay {salary:,.2f}"
+
+
+def test_cache_recompiles_on_mtime_change(tmp_path):
+    path = tmp_path / "t.md"
+    path.write_text("Hello {name}", encoding="utf-8")
+    cache = TemplateCache(lambda text: CompiledTemplate(text, TEMPLATE_FIELDS), missing=lambda p: "missing")
+
+    first = cache.get(str(path))
+    assert cache.get(str(path)) is first
+
+    path.write_text("Bye {name}", encoding="utf-8")
+    os.utime(path, ns=(0, 10**9))
+    assert cache.get(str(path)).render(values()).final_text == "Bye Zoë O’Neil"
+    assert cache.get(str(tmp_path / "nope.md")).text == "missing"
+
+
+def test_pdf_service_reads_each_template_once(tmp_path, monkeypatch):
+    service = PDFService(render_pool=RenderPool(workers=0), store=ContractStore(str(tmp_path)))
+    from backend.models.schemas import CandidateProfile
+    candidate = CandidateProfile(name="Ada", job_family="Engineering")
+
+    service.generate_contract(candidate, "DIFC Employment Law (UAE)")
+    opened = []
+    real_open = open
+    monkeypatch.setattr("builtins.open", lambda *a, **k: opened.append(a[0]) or real_open(*a, **k))
+    result = service.generate_contract(candidate, "DIFC Employment Law (UAE)")
+
+    assert not [p for p in opened if str(p).endswith(".md")]
+    assert "Ada" in result["final_text"] and "{name}" in result["original_text"]